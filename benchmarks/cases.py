@@ -0,0 +1,252 @@
+"""
+The benchmark matrix shared by 'runbenchmarks.py' and the pytest-benchmark suite.
+
+Transform modules are generated on the fly, so that chains of any length can be measured. Every
+generated transform renames 'field_<n - 1>' to 'field_<n>', and clients always request version 1,
+so the whole chain runs for every request.
+"""
+from collections import namedtuple, OrderedDict
+import io
+import json
+import sys
+import types
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+from rest_framework_transforms.decoders import get_json_decoder
+from rest_framework_transforms.operations import Rename
+from rest_framework_transforms.parsers import BaseVersioningParser
+from rest_framework_transforms.serializers import BaseVersioningSerializer
+from rest_framework_transforms.transforms import BaseTransform, DeclarativeTransform
+from rest_framework_transforms.utils import get_transform_classes, transform_registry
+
+
+TRANSFORM_KINDS = ('imperative', 'declarative')
+CHAIN_DEPTHS = (1, 10, 100)
+# number of nested records in a payload; 'large' is roughly 4MB of JSON
+PAYLOAD_SIZES = OrderedDict([('small', 0), ('medium', 1000), ('large', 40000)])
+LIST_SIZES = (1, 100, 10000)
+
+QUICK_CHAIN_DEPTHS = (1, 10)
+QUICK_PAYLOAD_SIZES = OrderedDict([('small', 0), ('medium', 1000)])
+QUICK_LIST_SIZES = (1, 100)
+# the JSON decoders compared by the 'parse-decoder' group, when installed
+JSON_DECODER_NAMES = ('json', 'orjson', 'ujson')
+
+
+BenchmarkCase = namedtuple('BenchmarkCase', ['name', 'group', 'params', 'setup'])
+
+
+def make_imperative_transform(version):
+    old, new = 'field_%d' % (version - 1), 'field_%d' % version
+
+    class Transform(BaseTransform):
+        def forwards(self, data, request):
+            if old in data:
+                data[new] = data.pop(old)
+            return data
+
+        def backwards(self, data, request, instance):
+            if new in data:
+                data[old] = data.pop(new)
+            return data
+
+    return Transform
+
+
+def make_declarative_transform(version):
+    class Transform(DeclarativeTransform):
+        operations = [
+            Rename('field_%d' % (version - 1), 'field_%d' % version),
+        ]
+
+    return Transform
+
+
+TRANSFORM_FACTORIES = {
+    'imperative': make_imperative_transform,
+    'declarative': make_declarative_transform,
+}
+
+
+def get_transform_base(kind, depth):
+    """
+    Generates (once) a module holding 'depth' transforms of the given kind, for versions 2 to 'depth' + 1.
+
+    :returns: The 'transform_base' naming the generated transforms.
+    """
+    module_name = '_benchmark_transforms_%s_%d' % (kind, depth)
+    if module_name not in sys.modules:
+        module = types.ModuleType(module_name)
+        for version in range(2, depth + 2):
+            transform_class = TRANSFORM_FACTORIES[kind](version)
+            transform_class.__name__ = 'BenchmarkTransform%04d' % version
+            transform_class.__module__ = module_name
+            setattr(module, transform_class.__name__, transform_class)
+        sys.modules[module_name] = module
+    return '%s.BenchmarkTransform' % module_name
+
+
+def make_record(index):
+    return {
+        'id': index,
+        'title': 'Record %d' % index,
+        'tags': ['alpha', 'beta', 'gamma'],
+        'score': index * 0.5,
+        'active': index % 2 == 0,
+    }
+
+
+def make_payload(version, records):
+    return {
+        'field_%d' % version: 'value',
+        'name': 'payload',
+        'records': [make_record(index) for index in range(records)],
+    }
+
+
+class BenchmarkInstance(object):
+    pk = None
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def make_parser(transform_base, json_decoder=None):
+    parser_class = type('BenchmarkParser', (BaseVersioningParser,), {
+        'media_type': 'application/json',
+        'transform_base': transform_base,
+        'json_decoder': json_decoder,
+    })
+    return parser_class()
+
+
+class RecordSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    tags = serializers.ListField(child=serializers.CharField())
+    score = serializers.FloatField()
+    active = serializers.BooleanField()
+
+
+def make_serializer_class(transform_base, depth):
+    return type('BenchmarkSerializer', (BaseVersioningSerializer, serializers.Serializer), {
+        'transform_base': transform_base,
+        'field_%d' % (depth + 1): serializers.CharField(),
+        'name': serializers.CharField(),
+        'records': RecordSerializer(many=True),
+    })
+
+
+def make_request(version=1):
+    request = APIRequestFactory().get('')
+    request.version = version
+    return request
+
+
+def registry_case(kind, depth, warm):
+    def setup():
+        transform_base = get_transform_base(kind, depth)
+        if warm:
+            get_transform_classes(transform_base, base_version=1)
+            return lambda: get_transform_classes(transform_base, base_version=1)
+
+        def run():
+            transform_registry.invalidate(transform_base)
+            return get_transform_classes(transform_base, base_version=1)
+        return run
+
+    return BenchmarkCase(
+        name='get_transform_classes-%s-%s-depth%d' % ('warm' if warm else 'cold', kind, depth),
+        group='get_transform_classes',
+        params={'kind': kind, 'depth': depth, 'warm': warm},
+        setup=setup,
+    )
+
+
+def parse_case(kind, depth, size=None, list_size=None):
+    def setup():
+        parser = make_parser(get_transform_base(kind, depth))
+        if list_size is None:
+            body = json.dumps(make_payload(1, PAYLOAD_SIZES[size])).encode('utf-8')
+        else:
+            body = json.dumps([make_payload(1, 0) for _ in range(list_size)]).encode('utf-8')
+        parser_context = {'request': make_request()}
+        return lambda: parser.parse(io.BytesIO(body), 'application/json', parser_context)
+
+    return _io_case('parse', kind, depth, size, list_size, setup)
+
+
+def decoder_case(json_decoder, size):
+    def setup():
+        parser = make_parser(get_transform_base('declarative', 1), json_decoder)
+        body = json.dumps(make_payload(1, PAYLOAD_SIZES[size])).encode('utf-8')
+        parser_context = {'request': make_request()}
+        return lambda: parser.parse(io.BytesIO(body), 'application/json', parser_context)
+
+    return BenchmarkCase(
+        name='parse-decoder-%s-%s' % (json_decoder, size),
+        group='parse-decoder',
+        params={'decoder': json_decoder, 'payload': size, 'records': PAYLOAD_SIZES[size]},
+        setup=setup,
+    )
+
+
+def get_installed_json_decoders():
+    """
+    :returns: The names in 'JSON_DECODER_NAMES' whose decoder can be imported.
+    """
+    return [name for name in JSON_DECODER_NAMES if get_json_decoder(name)[0] == name]
+
+
+def serialize_case(kind, depth, size=None, list_size=None):
+    def setup():
+        serializer_class = make_serializer_class(get_transform_base(kind, depth), depth)
+        context = {'request': make_request()}
+        if list_size is None:
+            instance = BenchmarkInstance(**make_payload(depth + 1, PAYLOAD_SIZES[size]))
+            serializer = serializer_class(instance, context=context)
+            return lambda: serializer.to_representation(instance)
+        instances = [BenchmarkInstance(**make_payload(depth + 1, 0)) for _ in range(list_size)]
+        serializer = serializer_class(instances, many=True, context=context)
+        return lambda: serializer.to_representation(instances)
+
+    return _io_case('to_representation', kind, depth, size, list_size, setup)
+
+
+def _io_case(group, kind, depth, size, list_size, setup):
+    params = {'kind': kind, 'depth': depth}
+    if list_size is None:
+        params['payload'] = size
+        params['records'] = PAYLOAD_SIZES[size]
+        name = '%s-%s-depth%d-%s' % (group, kind, depth, size)
+    else:
+        group += '-many'
+        params['items'] = list_size
+        name = '%s-%s-depth%d-items%d' % (group, kind, depth, list_size)
+    return BenchmarkCase(name=name, group=group, params=params, setup=setup)
+
+
+def get_cases(quick=False):
+    """
+    :returns: The list of 'BenchmarkCase's in the benchmark matrix, or in its smaller 'quick' variant.
+    """
+    depths = QUICK_CHAIN_DEPTHS if quick else CHAIN_DEPTHS
+    sizes = QUICK_PAYLOAD_SIZES if quick else PAYLOAD_SIZES
+    list_sizes = QUICK_LIST_SIZES if quick else LIST_SIZES
+
+    cases = []
+    for kind in TRANSFORM_KINDS:
+        for depth in depths:
+            cases.append(registry_case(kind, depth, warm=False))
+            cases.append(registry_case(kind, depth, warm=True))
+    for case_factory in (parse_case, serialize_case):
+        for kind in TRANSFORM_KINDS:
+            for depth in depths:
+                for size in sizes:
+                    cases.append(case_factory(kind, depth, size=size))
+                for list_size in list_sizes:
+                    cases.append(case_factory(kind, depth, list_size=list_size))
+    for json_decoder in get_installed_json_decoders():
+        for size in sizes:
+            cases.append(decoder_case(json_decoder, size))
+    return cases
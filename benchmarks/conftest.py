@@ -0,0 +1,4 @@
+def pytest_configure():
+    from benchmarks.settings import configure
+
+    configure()
@@ -0,0 +1,28 @@
+def configure():
+    """
+    Configures the minimal Django settings needed to run the benchmarks, unless settings are already configured.
+    """
+    from django.conf import settings
+
+    if settings.configured:
+        return
+
+    settings.configure(
+        DEBUG=False,
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                               'NAME': ':memory:'}},
+        SECRET_KEY='not very secret in benchmarks',
+        USE_I18N=False,
+        INSTALLED_APPS=(
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+
+            'rest_framework',
+        ),
+    )
+
+    try:
+        import django
+        django.setup()
+    except AttributeError:
+        pass
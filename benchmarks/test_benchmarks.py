@@ -0,0 +1,16 @@
+"""
+The benchmark matrix from 'benchmarks.cases', for pytest-benchmark:
+
+    py.test benchmarks/test_benchmarks.py --benchmark-json=results.json
+"""
+import pytest
+from benchmarks.cases import get_cases
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.parametrize('case', get_cases(), ids=lambda case: case.name)
+def test_benchmark(benchmark, case):
+    benchmark.group = case.group
+    benchmark.extra_info.update(case.params)
+    benchmark(case.setup())
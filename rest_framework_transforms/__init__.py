@@ -1 +1,3 @@
 __version__ = '0.5.0'
+
+default_app_config = 'rest_framework_transforms.apps.RestFrameworkTransformsConfig'
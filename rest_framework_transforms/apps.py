@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from django.apps import AppConfig
+from django.core import checks
+
+
+class RestFrameworkTransformsConfig(AppConfig):
+    """
+    Registers the transform system checks and, when the 'WARMUP' setting is True, builds every
+    transform chain at startup.
+
+    The 'WARMUP_MODULES' submodules of every installed app are imported first, both by the checks and
+    before warming up, so that versioning parsers and serializers defined in them are found.
+    """
+    name = 'rest_framework_transforms'
+    verbose_name = 'REST framework version transforms'
+
+    def ready(self):
+        from rest_framework_transforms.checks import check_transform_bases
+        from rest_framework_transforms.settings import get_setting
+        from rest_framework_transforms.warmup import autodiscover, warm_up
+
+        checks.register(check_transform_bases, 'rest_framework_transforms')
+
+        if get_setting('WARMUP'):
+            autodiscover()
+            warm_up()
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Transforms, parsers and serializers for async views. Requires Python 3.5 or later.
+"""
+import asyncio
+import inspect
+import io
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from rest_framework_transforms.datastructures import thaw, wrap_copy_on_write
+from rest_framework_transforms.exceptions import TransformBaseNotDeclaredException
+from rest_framework_transforms.instrumentation import default_timer, instrumentation, TransformTiming
+from rest_framework_transforms.parsers import BaseVersioningParser
+from rest_framework_transforms.serializers import BaseVersioningListSerializer, BaseVersioningSerializer
+from rest_framework_transforms.transforms import (
+    _get_function, BaseTransform, CompositeTransform, CopyOnWriteTransform, get_item_keys, reads_argument,
+)
+from rest_framework_transforms.utils import get_transform_chain
+from rest_framework_transforms.versions import get_request_version
+
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # asgiref is installed with Django 3.0 and later
+    async_to_sync = sync_to_async = None
+
+
+def _require_asgiref():
+    if async_to_sync is None:
+        raise ImproperlyConfigured("Calling async transforms from synchronous code requires the 'asgiref' package.")
+
+
+class AsyncTransform(BaseTransform):
+    """
+    A transform whose conversions are coroutines, for transforms that need I/O such as database or
+    cache lookups.
+
+    Override '.aforwards()' and '.abackwards()'. In lists, '.abackwards_many()' and '.aforwards_many()' convert
+    every item concurrently, with at most 'concurrency' items in flight when it is set.
+
+    Async chains await these methods directly. Synchronous chains call '.forwards()' and '.backwards()',
+    which run the coroutines with asgiref's 'async_to_sync'.
+    """
+    concurrency = None
+
+    async def aforwards(self, data, request):
+        raise NotImplementedError(".aforwards() must be overridden.")
+
+    async def abackwards(self, data, request, instance):
+        raise NotImplementedError(".abackwards() must be overridden.")
+
+    async def aforwards_many(self, items, request):
+        return await self._gather([self.aforwards(data, request) for data in items])
+
+    async def abackwards_many(self, items, request, instances):
+        return await self._gather([
+            self.abackwards(data, request, instance)
+            for data, instance in zip(items, instances)
+        ])
+
+    async def _gather(self, coroutines):
+        if self.concurrency:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def limited(coroutine):
+                async with semaphore:
+                    return await coroutine
+
+            coroutines = [limited(coroutine) for coroutine in coroutines]
+        return list(await asyncio.gather(*coroutines))
+
+    def reads_request(self, direction):
+        """
+        :returns: Whether the coroutines for the given direction read 'request'; the synchronous methods only pass it on.
+        """
+        cls = self.__class__
+        names = ['a' + direction]
+        if _get_function(cls, 'a%s_many' % direction) is not _get_function(AsyncTransform, 'a%s_many' % direction):
+            names.append('a%s_many' % direction)
+        return any(reads_argument(getattr(cls, name), 2) for name in names)
+
+    def forwards(self, data, request):
+        _require_asgiref()
+        return async_to_sync(self.aforwards)(data, request)
+
+    def backwards(self, data, request, instance):
+        _require_asgiref()
+        return async_to_sync(self.abackwards)(data, request, instance)
+
+    def forwards_many(self, items, request):
+        _require_asgiref()
+        return async_to_sync(self.aforwards_many)(items, request)
+
+    def backwards_many(self, items, request, instances):
+        _require_asgiref()
+        return async_to_sync(self.abackwards_many)(items, request, instances)
+
+
+def _get_async_method(step, name):
+    method = getattr(step, 'a' + name, None)
+    if method is not None and inspect.iscoroutinefunction(method):
+        return method, True
+    return getattr(step, name), False
+
+
+class AsyncCompositeTransform(CompositeTransform):
+    """
+    A 'CompositeTransform' that can also be awaited, for use in async views.
+
+    The async methods await the async methods of 'AsyncTransform' steps and call every other step directly.
+    Chains are pruned and instrumented in the same way as synchronous chains.
+    """
+    def __init__(self, steps):
+        super(AsyncCompositeTransform, self).__init__(steps)
+        self._aforwards = tuple(_get_async_method(step, 'forwards') for step in self.steps)
+        self._abackwards = tuple(_get_async_method(step, 'backwards') for step in self.steps)
+        self._aforwards_many = tuple(_get_async_method(step, 'forwards_many') for step in self.steps)
+        self._abackwards_many = tuple(_get_async_method(step, 'backwards_many') for step in self.steps)
+
+    async def aforwards(self, data, request):
+        methods, labels = self._aforwards, self.labels
+        if self._prune_forwards and hasattr(data, 'keys'):
+            methods, labels = self._prune('aforwards', 'forwards', frozenset(data.keys()))
+        return await self._arun('forwards', methods, labels, data, (request,), request, 1)
+
+    async def abackwards(self, data, request, instance):
+        methods, labels = self._abackwards, self.labels
+        if self._prune_backwards and hasattr(data, 'keys'):
+            methods, labels = self._prune('abackwards', 'backwards', frozenset(data.keys()))
+        return await self._arun('backwards', methods, labels, data, (request, instance), request, 1)
+
+    async def aforwards_many(self, items, request):
+        methods, labels = self._aforwards_many, self.labels
+        keys = get_item_keys(items) if self._prune_forwards else None
+        if keys is not None:
+            methods, labels = self._prune('aforwards_many', 'forwards', keys)
+        return await self._arun('forwards_many', methods, labels, items, (request,), request, len(items))
+
+    async def abackwards_many(self, items, request, instances):
+        methods, labels = self._abackwards_many, self.labels
+        keys = get_item_keys(items) if self._prune_backwards else None
+        if keys is not None:
+            methods, labels = self._prune('abackwards_many', 'backwards', keys)
+        return await self._arun('backwards_many', methods, labels, items, (request, instances), request, len(items))
+
+    async def _arun(self, direction, methods, labels, data, args, request, items):
+        timed = bool(instrumentation.hooks)
+        request_version = getattr(request, 'version', None)
+        for (name, version), (method, is_async) in zip(labels, methods):
+            start = default_timer() if timed else None
+            data = method(data, *args)
+            if is_async:
+                data = await data
+            if timed:
+                elapsed = default_timer() - start
+                instrumentation.fire(TransformTiming(name, direction, version, request_version, items, elapsed))
+        return data
+
+
+class AsyncCopyOnWriteTransform(CopyOnWriteTransform):
+    """
+    A 'CopyOnWriteTransform' around an 'AsyncCompositeTransform'.
+    """
+    async def aforwards(self, data, request):
+        return thaw(await self.transform.aforwards(wrap_copy_on_write(data), request))
+
+    async def abackwards(self, data, request, instance):
+        return thaw(await self.transform.abackwards(wrap_copy_on_write(data), request, instance))
+
+    async def aforwards_many(self, items, request):
+        items = await self.transform.aforwards_many([wrap_copy_on_write(data) for data in items], request)
+        return [thaw(data) for data in items]
+
+    async def abackwards_many(self, items, request, instances):
+        items = await self.transform.abackwards_many([wrap_copy_on_write(data) for data in items], request, instances)
+        return [thaw(data) for data in items]
+
+
+class BaseAsyncVersioningParser(BaseVersioningParser):
+    """
+    A versioning parser whose transform chains may contain 'AsyncTransform's.
+
+    DRF parses request bodies synchronously, through '.parse()', which works in synchronous views. Async
+    views should read the body and call '.aparse()' instead, which awaits the async transforms.
+    """
+    def get_forwards_chain(self, request):
+        chain = get_transform_chain(self.transform_base, base_version=get_request_version(request), reverse=False, chain_class=AsyncCompositeTransform)
+        if self.copy_on_write:
+            chain = AsyncCopyOnWriteTransform(chain)
+        return chain
+
+    async def aparse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON and awaits the forwards transform chain for the requested version.
+        """
+        if not self.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        request = parser_context['request']
+        if not self.can_cache_promotion(request):
+            return await self.apromote(self.decode(stream, media_type, parser_context), request)
+
+        body = stream.read()
+        key = self.get_promotion_cache_key(body, request)
+        data = self.promotion_cache.get(key)
+        if data is None:
+            data = await self.apromote(self.decode(io.BytesIO(body), media_type, parser_context), request)
+            self.promotion_cache.set(key, data)
+        return data
+
+    async def apromote(self, data, request):
+        """
+        Awaits the forwards transform chain for the requested version over parsed request data.
+        """
+        if self.needs_promotion(request):
+            chain = self.get_forwards_chain(request)
+            if isinstance(data, list):
+                data = await chain.aforwards_many(data, request)
+            else:
+                data = await chain.aforwards(data, request)
+
+        return data
+
+
+class BaseAsyncVersioningSerializer(BaseVersioningSerializer):
+    """
+    A versioning serializer whose transform chains may contain 'AsyncTransform's.
+
+    In async views, await '.ato_representation()' instead of reading '.data'. Serializing the instance at
+    the latest version can query the database, so it runs in a thread with asgiref's 'sync_to_async';
+    the transforms are then awaited on the event loop. Lists demote their items concurrently.
+    """
+    def get_backwards_chain(self, request):
+        chain = get_transform_chain(self.transform_base, base_version=get_request_version(request), reverse=True, chain_class=AsyncCompositeTransform)
+        if self.copy_on_write:
+            chain = AsyncCopyOnWriteTransform(chain)
+        return chain
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_serializer = super(BaseAsyncVersioningSerializer, cls).many_init(*args, **kwargs)
+        if type(list_serializer) is BaseVersioningListSerializer:
+            list_serializer.__class__ = BaseAsyncVersioningListSerializer
+        return list_serializer
+
+    async def ato_representation(self, instance):
+        """
+        The async counterpart of '.to_representation()'. Serializers with a 'representation_cache' use the
+        synchronous '.to_representation()' in a thread.
+        """
+        _require_asgiref()
+        if not self.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        request = self.context.get('request')
+        if self.representation_cache is not None or not (instance and self.needs_demotion(request)):
+            return await sync_to_async(self.to_representation)(instance)
+
+        data = await sync_to_async(self.to_latest_representation)(instance)
+        return await self.get_backwards_chain(request).abackwards(data, request, instance)
+
+
+class BaseAsyncVersioningListSerializer(BaseVersioningListSerializer):
+    """
+    The list serializer for 'BaseAsyncVersioningSerializer', demoting the whole list with a single
+    awaited call to the backwards chain.
+    """
+    async def ato_representation(self, data):
+        _require_asgiref()
+        if not self.child.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        request = self.context.get('request')
+        if self.child.representation_cache is not None or not (self.is_batchable and self.child.needs_demotion(request)):
+            return await sync_to_async(self.to_representation)(data)
+
+        def serialize():
+            iterable = data.all() if isinstance(data, models.Manager) else data
+            instances = list(iterable)
+            return instances, [self.child.to_latest_representation(instance) for instance in instances]
+
+        instances, items = await sync_to_async(serialize)()
+        return await self.child.get_backwards_chain(request).abackwards_many(items, request, instances)
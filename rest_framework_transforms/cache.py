@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple, OrderedDict
+import copy
+import hashlib
+import pickle
+import threading
+from timeit import default_timer
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+
+
+RepresentationCacheKey = namedtuple(
+    'RepresentationCacheKey',
+    ['model', 'pk', 'version_token', 'target_version', 'transform_base', 'serializer'],
+)
+
+
+def get_model_label(model):
+    return '%s.%s' % (model._meta.app_label, model._meta.model_name)
+
+
+class BaseRepresentationCache(object):
+    """
+    A store for already-demoted representations, keyed by 'RepresentationCacheKey'.
+
+    Entries for an instance are invalidated when it is saved or deleted in a process that watches its
+    model; see '.watch()'. Versioning serializers watch their 'Meta.model' as soon as the serializer class
+    is created (before Python 3.6, when it is first instantiated), and any other model the first time they
+    store one of its representations. Saves in a process that never imports the serializer, and changes
+    that send no signals such as 'QuerySet.update()', are not seen; shared caches should give their
+    entries a timeout.
+    """
+    def __init__(self):
+        self._watched = set()
+        self._watch_lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :returns: The cached representation for 'key', or None.
+        """
+        raise NotImplementedError(".get() must be overridden.")
+
+    def set(self, key, data):
+        raise NotImplementedError(".set() must be overridden.")
+
+    def invalidate(self, model, pk):
+        """
+        Discards every cached representation of the given instance.
+        """
+        raise NotImplementedError(".invalidate() must be overridden.")
+
+    def get_many(self, keys):
+        """
+        :returns: A dictionary of the cached representations found for 'keys'.
+        """
+        found = {}
+        for key in keys:
+            data = self.get(key)
+            if data is not None:
+                found[key] = data
+        return found
+
+    def set_many(self, mapping):
+        for key, data in mapping.items():
+            self.set(key, data)
+
+    def watch(self, model):
+        """
+        Invalidates cached representations of 'model' instances whenever one is saved or deleted.
+        """
+        if model in self._watched:
+            return
+        with self._watch_lock:
+            if model not in self._watched:
+                dispatch_uid = 'rest_framework_transforms.cache.%d.%s' % (id(self), get_model_label(model))
+                post_save.connect(self._handle_change, sender=model, weak=False, dispatch_uid=dispatch_uid)
+                post_delete.connect(self._handle_change, sender=model, weak=False, dispatch_uid=dispatch_uid)
+                self._watched.add(model)
+
+    def _handle_change(self, sender, instance, **kwargs):
+        self.invalidate(sender, instance.pk)
+
+
+class LRURepresentationCache(BaseRepresentationCache):
+    """
+    An in-process cache holding at most 'max_size' representations, evicting the least recently used.
+
+    Representations are copied on the way in and out, one level deep; nested values are shared and
+    must not be changed in place.
+    """
+    def __init__(self, max_size=1024):
+        super(LRURepresentationCache, self).__init__()
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._instance_keys = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is None:
+                return None
+            self._entries[key] = data
+        return copy.copy(data)
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = copy.copy(data)
+            self._instance_keys.setdefault((key.model, key.pk), set()).add(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard_instance_key(evicted)
+
+    def _discard_instance_key(self, key):
+        keys = self._instance_keys.get((key.model, key.pk))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._instance_keys[(key.model, key.pk)]
+
+    def invalidate(self, model, pk):
+        with self._lock:
+            for key in self._instance_keys.pop((get_model_label(model), pk), ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._instance_keys.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoRepresentationCache(BaseRepresentationCache):
+    """
+    A cache backed by one of the caches configured in Django's 'CACHES' setting.
+
+    Every instance has a generation counter stored alongside its representations. Saving or deleting
+    the instance in a process that watches its model bumps the counter, which orphans all of its cached
+    representations at once. Because other processes may not watch the model, representations expire
+    after 'timeout' seconds; pass None to keep them until they are evicted.
+    """
+    def __init__(self, alias='default', timeout=300, key_prefix='rest_framework_transforms'):
+        super(DjangoRepresentationCache, self).__init__()
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_generation_key(self, model_label, pk):
+        return '%s:generation:%s:%s' % (self.key_prefix, model_label, pk)
+
+    def make_key(self, key, generation):
+        digest = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+        return '%s:%s:%s:%s:%s' % (self.key_prefix, key.model, key.pk, generation, digest)
+
+    def _get_cache_keys(self, keys):
+        generation_keys = dict((key, self.get_generation_key(key.model, key.pk)) for key in keys)
+        generations = self.cache.get_many(list(set(generation_keys.values())))
+        return dict((key, self.make_key(key, generations.get(generation_keys[key], 0))) for key in keys)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, data):
+        self.set_many({key: data})
+
+    def get_many(self, keys):
+        cache_keys = self._get_cache_keys(keys)
+        found = self.cache.get_many(list(cache_keys.values()))
+        return dict((key, found[cache_key]) for key, cache_key in cache_keys.items() if cache_key in found)
+
+    def set_many(self, mapping):
+        cache_keys = self._get_cache_keys(list(mapping))
+        self.cache.set_many(dict((cache_keys[key], data) for key, data in mapping.items()), self.timeout)
+
+    def invalidate(self, model, pk):
+        generation_key = self.get_generation_key(get_model_label(model), pk)
+        try:
+            self.cache.incr(generation_key)
+        except ValueError:
+            self.cache.set(generation_key, 1, None)
+
+
+PromotionCacheKey = namedtuple('PromotionCacheKey', ['body_hash', 'target_version', 'transform_base', 'parser'])
+
+
+class PromotionCache(object):
+    """
+    An in-process cache of promoted request data, for parsers that receive the same request body many
+    times, such as when clients retry a request.
+
+    At most 'max_size' entries are kept, evicting the least recently used, and entries are dropped once
+    they are older than 'timeout' seconds (never, if 'timeout' is None). Entries are pickled, so every hit
+    returns a new copy that views may change; data that cannot be pickled is not cached.
+    """
+    def __init__(self, max_size=256, timeout=60):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :returns: The promoted data cached for 'key', or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, payload = entry
+            if expires is not None and expires < default_timer():
+                return None
+            self._entries[key] = entry
+        return pickle.loads(payload)
+
+    def set(self, key, data):
+        try:
+            payload = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        expires = None if self.timeout is None else default_timer() + self.timeout
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, payload)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
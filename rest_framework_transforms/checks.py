@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from django.core.checks import Error, Warning
+from rest_framework_transforms.transforms import DeclarativeTransform
+from rest_framework_transforms.utils import scan_transforms, TransformIndex
+from rest_framework_transforms.versions import is_date_version
+from rest_framework_transforms.warmup import autodiscover, get_versioning_classes
+
+
+def format_version_ranges(ranges):
+    """
+    :returns: The (first, last) version 'ranges' as text, e.g. '3, 4, 7-12' for [(3, 4), (7, 12)].
+    """
+    parts = []
+    for first, last in ranges:
+        if last - first > 1:
+            parts.append('%d-%d' % (first, last))
+        else:
+            parts.extend(str(version) for version in range(first, last + 1))
+    return ', '.join(parts)
+
+
+def check_transform_base(transform_base, obj=None):
+    """
+    Loads the transforms of 'transform_base' and builds all of its chains.
+
+    :returns: A list of the problems found, as Django system check messages.
+    """
+    if '.' not in transform_base:
+        return [Error(
+            "'transform_base' must be the dotted path of a module followed by the transform class name prefix, not '%s'." % transform_base,
+            hint="For example 'myapp.transforms.MyResourceTransform'.",
+            obj=obj,
+            id='rest_framework_transforms.E001',
+        )]
+
+    try:
+        versioned_transform_classes, jump_transform_classes = scan_transforms(transform_base)
+    except ImportError as exc:
+        return [Error(
+            "The module of transform base '%s' cannot be imported: %s" % (transform_base, exc),
+            obj=obj,
+            id='rest_framework_transforms.E002',
+        )]
+
+    if not versioned_transform_classes:
+        return [Error(
+            "No transform classes were found for transform base '%s'." % transform_base,
+            hint="Transform class names must start with the base name and end with their version, e.g. '%s0002'." % transform_base.rsplit('.', 1)[1],
+            obj=obj,
+            id='rest_framework_transforms.E003',
+        )]
+
+    messages = []
+    versions = [version for version, _ in versioned_transform_classes]
+    # dated transforms are not expected to cover every day in between
+    missing = [
+        (previous + 1, current - 1)
+        for previous, current in zip(versions, versions[1:])
+        if current - previous > 1 and not (is_date_version(previous) and is_date_version(current))
+    ]
+    if missing:
+        messages.append(Warning(
+            "The transforms for '%s' skip version(s) %s." % (transform_base, format_version_ranges(missing)),
+            hint="Requests for a skipped version are converted like requests for the version below it.",
+            obj=obj,
+            id='rest_framework_transforms.W001',
+        ))
+
+    for from_version, to_version, transform_class in jump_transform_classes:
+        if from_version >= to_version:
+            messages.append(Error(
+                "The jump transform '%s' must convert from a lower version to a higher one." % transform_class.__name__,
+                obj=obj,
+                id='rest_framework_transforms.E005',
+            ))
+
+    try:
+        transform_classes = [transform_class for _, transform_class in versioned_transform_classes]
+        transform_classes += [transform_class for _, _, transform_class in jump_transform_classes]
+        for transform_class in transform_classes:
+            if issubclass(transform_class, DeclarativeTransform):
+                transform_class.compile(tuple(transform_class.operations))
+        TransformIndex(versioned_transform_classes, jump_transform_classes).warm_up()
+    except Exception as exc:
+        messages.append(Error(
+            "The transform chains for '%s' cannot be built: %s: %s" % (transform_base, exc.__class__.__name__, exc),
+            obj=obj,
+            id='rest_framework_transforms.E004',
+        ))
+    return messages
+
+
+def check_transform_bases(app_configs=None, **kwargs):
+    """
+    Checks the 'transform_base' of every versioning parser and serializer, importing the 'WARMUP_MODULES'
+    of every installed app first so that the result does not depend on what happens to be imported.
+    """
+    autodiscover()
+    messages = []
+    for transform_base, versioning_classes in sorted(get_versioning_classes().items()):
+        messages.extend(check_transform_base(transform_base, obj=versioning_classes[0]))
+    return messages
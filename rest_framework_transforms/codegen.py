@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Generates transform modules from the differences between two serializers.
+"""
+import ast
+from collections import namedtuple
+from rest_framework.fields import empty
+from rest_framework_transforms.operations import AddDefault, FieldScope, Remove, Rename
+
+
+SerializerDiff = namedtuple('SerializerDiff', ['operations', 'changed_fields'])
+
+
+def get_field_default(field):
+    """
+    :returns: The default of a serializer field, or None when it has none.
+    """
+    default = getattr(field, 'default', empty)
+    return None if default is empty else default
+
+
+def diff_serializers(old_serializer_class, new_serializer_class, renames=()):
+    """
+    Compares the fields of two serializer classes.
+
+    Fields of the old serializer that are missing from the new one are removed, and new fields are
+    added with their default. Renames cannot be told apart from a removal and an addition, so they
+    must be given as (old name, new name) pairs in 'renames'.
+
+    :returns: A 'SerializerDiff' of the operations that promote a representation of the old serializer
+    to one of the new serializer, and the names of the fields whose class changed.
+    """
+    old_fields = old_serializer_class().fields
+    new_fields = new_serializer_class().fields
+    renames = list(renames)
+    for old, new in renames:
+        if old not in old_fields:
+            raise ValueError("'%s' is not a field of %s." % (old, old_serializer_class.__name__))
+        if new not in new_fields:
+            raise ValueError("'%s' is not a field of %s." % (new, new_serializer_class.__name__))
+
+    renamed = dict(renames)
+    renamed_to = set(renamed.values())
+    operations = [Rename(old, new) for old, new in renames]
+    operations.extend(
+        Remove(name, default=get_field_default(field))
+        for name, field in old_fields.items()
+        if name not in new_fields and name not in renamed
+    )
+    operations.extend(
+        AddDefault(name, get_field_default(field))
+        for name, field in new_fields.items()
+        if name not in old_fields and name not in renamed_to
+    )
+    changed_fields = [
+        name
+        for name, field in new_fields.items()
+        if name in old_fields and field.__class__ is not old_fields[name].__class__
+    ]
+    changed_fields.extend(
+        new
+        for old, new in renames
+        if new_fields[new].__class__ is not old_fields[old].__class__
+    )
+    return SerializerDiff(operations, changed_fields)
+
+
+BUILTIN_MODULES = ('builtins', '__builtin__')
+
+
+def get_builtin_name(value):
+    """
+    :returns: The name of a builtin callable such as 'list', or None for any other value.
+    """
+    if callable(value) and getattr(value, '__module__', None) in BUILTIN_MODULES:
+        return value.__name__
+    return None
+
+
+def literal(value):
+    """
+    :returns: The source of a Python literal for 'value', or None when it has none.
+    """
+    if callable(value):
+        return None
+    source = repr(value)
+    try:
+        if ast.literal_eval(source) == value:
+            return source
+    except (ValueError, SyntaxError):
+        pass
+    return None
+
+
+class ModuleWriter(object):
+    """
+    Writes the source of a transform module, noting every value that cannot be written as a literal.
+    """
+    def __init__(self):
+        self.todos = []
+
+    def constant(self, value):
+        source = literal(value)
+        if source is None:
+            self.todos.append(value)
+            return 'None'
+        return source
+
+    def default(self, value):
+        name = get_builtin_name(value)
+        return '%s()' % name if name else self.constant(value)
+
+    def generate_method(self, signature, operations):
+        lines = ['    def %s:' % signature]
+        for operation in operations:
+            lines.extend('        ' + line for line in operation.generate(self.default))
+        lines.append('        return data')
+        return lines
+
+    def format_operation(self, operation):
+        if isinstance(operation, Rename):
+            return 'Rename(%r, %r)' % (operation.old, operation.new)
+        arguments = '%r' % (operation.name,)
+        default = get_builtin_name(operation.default) or self.constant(operation.default)
+        if default != 'None':
+            arguments += ', %s' % (default,) if isinstance(operation, AddDefault) else ', default=%s' % (default,)
+        return '%s(%s)' % (operation.__class__.__name__, arguments)
+
+
+def format_field_scope(operations):
+    scope = FieldScope.combine(operation.get_field_scope() for operation in operations)
+    return 'FieldScope(frozenset(%r), %r)' % (sorted(scope.fields), scope.conditional)
+
+
+def generate_transform_module(class_name, operations, declarative=False, description=None, changed_fields=()):
+    """
+    Generates the source of a module holding a single transform class for the given operations.
+
+    By default the transform has hand-written style '.forwards()' and '.backwards()' methods of
+    straight-line code, and declares its field scope. With 'declarative', it is a 'DeclarativeTransform'
+    listing the operations, with 'generate_code' set so that they are compiled into functions when
+    the transform is first used.
+
+    :returns: The module source.
+    """
+    writer = ModuleWriter()
+    inverse = [operation.inverse() for operation in reversed(operations)]
+    if declarative:
+        imports = [
+            'from rest_framework_transforms.operations import %s' % ', '.join(
+                sorted(set(operation.__class__.__name__ for operation in operations))
+            ),
+            'from rest_framework_transforms.transforms import DeclarativeTransform',
+        ] if operations else ['from rest_framework_transforms.transforms import DeclarativeTransform']
+        body = ['    generate_code = True', '    operations = [']
+        body.extend('        %s,' % writer.format_operation(operation) for operation in operations)
+        body.append('    ]')
+        base_class = 'DeclarativeTransform'
+    else:
+        imports = [
+            'from rest_framework_transforms.operations import FieldScope',
+            'from rest_framework_transforms.transforms import BaseTransform',
+        ]
+        body = [
+            '    __slots__ = ()',
+            '',
+            '    def get_field_scope(self, direction):',
+            "        if direction == 'forwards':",
+            '            return %s' % format_field_scope(operations),
+            '        return %s' % format_field_scope(inverse),
+            '',
+        ]
+        body.extend(writer.generate_method('forwards(self, data, request)', operations))
+        body.append('')
+        body.extend(writer.generate_method('backwards(self, data, request, instance)', inverse))
+        base_class = 'BaseTransform'
+
+    lines = ['# -*- coding: utf-8 -*-']
+    if description:
+        lines.append('# %s' % description)
+    for name in changed_fields:
+        lines.append('# TODO: the class of field %r changed; convert its values by hand if needed.' % (name,))
+    for value in writer.todos:
+        lines.append('# TODO: replace the None default written for %r.' % (value,))
+    lines.extend(imports)
+    lines.extend(['', '', 'class %s(%s):' % (class_name, base_class)])
+    lines.extend(body)
+    return '\n'.join(line.rstrip() for line in lines) + '\n'
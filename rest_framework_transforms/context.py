@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import copy
+
+
+TRANSFORM_CONTEXT_KEY = 'rest_framework_transforms'
+
+
+class TransformContext(object):
+    """
+    State shared by every versioning serializer in a serializer tree while it serializes a request.
+
+    DRF gives nested serializers the context dictionary of the root serializer, so storing the
+    'TransformContext' there lets every level reuse the backwards chains resolved by the others, and
+    the demoted representations of instances that appear more than once in the tree.
+
+    Like 'LRURepresentationCache', representations are copied one level deep on the way in and out;
+    nested values are shared and must not be changed in place.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.chains = {}
+        self.representations = {}
+
+    def get_backwards_chain(self, serializer):
+        """
+        :returns: The backwards chain of 'serializer' for the request, resolved once per serializer class.
+        """
+        key = (serializer.__class__, serializer.transform_base)
+        chain = self.chains.get(key)
+        if chain is None:
+            chain = self.chains[key] = serializer.get_backwards_chain(self.request)
+        return chain
+
+    def get_representation(self, key):
+        """
+        :returns: The representation stored for 'key', or None.
+        """
+        data = self.representations.get(key)
+        return copy.copy(data) if isinstance(data, dict) else data
+
+    def set_representation(self, key, data):
+        self.representations[key] = copy.copy(data) if isinstance(data, dict) else data
+
+
+def get_transform_context(context, request):
+    """
+    :returns: The 'TransformContext' stored in the serializer 'context' for 'request', creating it if needed.
+    """
+    transform_context = context.get(TRANSFORM_CONTEXT_KEY)
+    if transform_context is None or transform_context.request is not request:
+        transform_context = context[TRANSFORM_CONTEXT_KEY] = TransformContext(request)
+    return transform_context
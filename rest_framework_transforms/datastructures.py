@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import copy
+
+try:
+    from collections.abc import MutableMapping, MutableSequence
+except ImportError:  # Python 2
+    from collections import MutableMapping, MutableSequence
+
+
+def wrap_copy_on_write(value):
+    """
+    Wraps dictionaries and lists in their copy-on-write counterparts; returns any other value unchanged.
+    """
+    if isinstance(value, dict):
+        return CopyOnWriteDict(value)
+    if isinstance(value, list):
+        return CopyOnWriteList(value)
+    return value
+
+
+def thaw(value):
+    """
+    Converts a copy-on-write wrapper back into plain dictionaries and lists.
+
+    Parts of the structure that were never changed are returned as the original objects, not copies.
+    Plain containers built by a transform around wrapped values are fixed up in place.
+    """
+    if isinstance(value, (CopyOnWriteDict, CopyOnWriteList)):
+        return value.thaw()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            thawed = thaw(item)
+            if thawed is not item:
+                value[key] = thawed
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            thawed = thaw(item)
+            if thawed is not item:
+                value[index] = thawed
+    return value
+
+
+class CopyOnWriteDict(MutableMapping):
+    """
+    A dictionary view over 'base' that copies only what is changed.
+
+    The first write makes a shallow copy of this level; nested dictionaries and lists are wrapped
+    on access, so changing a nested value only copies the containers on the path to it. 'base'
+    itself is never modified.
+    """
+    def __init__(self, base=None):
+        self._base = {} if base is None else base
+        self._own = None
+        self._children = {}
+        self._assigned = set()
+
+    @property
+    def _source(self):
+        return self._base if self._own is None else self._own
+
+    def _ensure_own(self):
+        if self._own is None:
+            self._own = copy.copy(self._base)
+
+    def __getitem__(self, key):
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        value = self._source[key]
+        if key in self._assigned:
+            return value
+        child = wrap_copy_on_write(value)
+        if child is not value:
+            self._children[key] = child
+        return child
+
+    def __setitem__(self, key, value):
+        self._ensure_own()
+        self._own[key] = value
+        self._children.pop(key, None)
+        self._assigned.add(key)
+
+    def __delitem__(self, key):
+        self._ensure_own()
+        del self._own[key]
+        self._children.pop(key, None)
+        self._assigned.discard(key)
+
+    def __contains__(self, key):
+        return key in self._source
+
+    def __iter__(self):
+        return iter(self._source)
+
+    def __len__(self):
+        return len(self._source)
+
+    @property
+    def is_changed(self):
+        return self._own is not None or any(child.is_changed for child in self._children.values())
+
+    def thaw(self):
+        if not self.is_changed:
+            return self._base
+        result = copy.copy(self._source)
+        for key, child in self._children.items():
+            result[key] = child.thaw()
+        for key in self._assigned:
+            result[key] = thaw(result[key])
+        return result
+
+    def __repr__(self):
+        return 'CopyOnWriteDict(%r)' % (self.thaw(),)
+
+
+class CopyOnWriteList(MutableSequence):
+    """
+    A list view over 'base' that copies only what is changed. See 'CopyOnWriteDict'.
+    """
+    def __init__(self, base=None):
+        self._base = [] if base is None else base
+        self._own = None
+        self._children = {}
+
+    def _ensure_own(self):
+        if self._own is None:
+            # Positions move on insert and delete, so the copy holds the wrapped items themselves.
+            self._own = [
+                self._children[index] if index in self._children else wrap_copy_on_write(value)
+                for index, value in enumerate(self._base)
+            ]
+            self._children = None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if self._own is not None:
+            return self._own[index]
+        if index < 0:
+            index += len(self._base)
+        child = self._children.get(index)
+        if child is not None:
+            return child
+        value = self._base[index]
+        child = wrap_copy_on_write(value)
+        if child is not value:
+            self._children[index] = child
+        return child
+
+    def __setitem__(self, index, value):
+        self._ensure_own()
+        self._own[index] = value
+
+    def __delitem__(self, index):
+        self._ensure_own()
+        del self._own[index]
+
+    def insert(self, index, value):
+        self._ensure_own()
+        self._own.insert(index, value)
+
+    def __len__(self):
+        return len(self._base if self._own is None else self._own)
+
+    @property
+    def is_changed(self):
+        if self._own is not None:
+            return True
+        return any(child.is_changed for child in self._children.values())
+
+    def thaw(self):
+        if not self.is_changed:
+            return self._base
+        if self._own is None:
+            return [
+                self._children[index].thaw() if index in self._children else value
+                for index, value in enumerate(self._base)
+            ]
+        return [thaw(value) for value in self._own]
+
+    def __repr__(self):
+        return 'CopyOnWriteList(%r)' % (self.thaw(),)
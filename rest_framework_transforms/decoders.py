@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from django.utils.module_loading import import_string
+from rest_framework_transforms.settings import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+# The 'loads' function of each known decoder. Other names are imported as dotted paths.
+JSON_DECODERS = {
+    'json': 'json.loads',
+    'orjson': 'orjson.loads',
+    'ujson': 'ujson.loads',
+}
+
+_decoders = {}
+_decoders_lock = threading.Lock()
+
+
+def get_json_decoder(names=None):
+    """
+    Picks the first of the given JSON decoders that can be imported, falling back to the standard
+    library's 'json'. A decoder is either one of the names in 'JSON_DECODERS' or the dotted path of a
+    function that takes the request body as bytes or text and returns the decoded data.
+
+    :param names: A decoder, or a sequence of decoders in order of preference. Defaults to the
+    'JSON_DECODER' setting.
+    :returns: A tuple of the name and the 'loads' function of the decoder.
+    """
+    if names is None:
+        names = get_setting('JSON_DECODER')
+    names = tuple(names) if isinstance(names, (list, tuple)) else (names,)
+
+    decoder = _decoders.get(names)
+    if decoder is None:
+        with _decoders_lock:
+            decoder = _decoders.get(names)
+            if decoder is None:
+                decoder = _decoders[names] = _import_json_decoder(names)
+    return decoder
+
+
+def _import_json_decoder(names):
+    for name in names:
+        try:
+            return name, import_string(JSON_DECODERS.get(name, name))
+        except ImportError:
+            continue
+    logger.warning("None of the JSON decoders %s can be imported; using 'json' instead.", ', '.join(names))
+    return 'json', import_string(JSON_DECODERS['json'])
@@ -1,4 +1,12 @@
+from rest_framework.exceptions import NotAcceptable
 
 
 class TransformBaseNotDeclaredException(Exception):
     pass
+
+
+class InvalidVersionException(NotAcceptable):
+    """
+    Raised for requested versions that cannot be resolved to a transform version. Rendered as a 406 response.
+    """
+    default_detail = 'Invalid version in request.'
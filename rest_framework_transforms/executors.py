@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from rest_framework_transforms.settings import get_setting
+from rest_framework_transforms.transforms import CopyOnWriteTransform
+from rest_framework_transforms.utils import get_transform_chain
+from rest_framework_transforms.versions import get_request_version
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+except ImportError:  # Python 2 without the 'futures' backport
+    ProcessPoolExecutor = ThreadPoolExecutor = None
+
+
+class InlineDemotionExecutor(object):
+    """
+    Demotes lists of representations in the calling thread. This is the default.
+    """
+    def backwards_many(self, serializer, chain, items, request, instances):
+        """
+        Runs the backwards chain of 'serializer' over the serialized 'items' of 'instances'.
+
+        :returns: The list of demoted representations, in the order of 'items'.
+        """
+        return chain.backwards_many(items, request, instances)
+
+    def shutdown(self):
+        pass
+
+
+class PoolDemotionExecutor(InlineDemotionExecutor):
+    """
+    Base class for executors that split large lists into chunks of 'chunk_size' items and demote the
+    chunks in parallel on a pool of 'max_workers' workers. Lists shorter than 'threshold' are demoted
+    inline, since handing them to the pool costs more than it saves.
+
+    The pool is started on first use and kept for the life of the executor.
+    """
+    pool_class = None
+
+    def __init__(self, max_workers=None, chunk_size=250, threshold=1000):
+        if self.pool_class is None:
+            raise ImproperlyConfigured("Parallel demotion requires 'concurrent.futures' (the 'futures' package on Python 2).")
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.threshold = threshold
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self.create_pool()
+        return self._pool
+
+    def create_pool(self):
+        return self.pool_class(max_workers=self.max_workers)
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def split(self, items, instances):
+        """
+        :returns: A list of ('items', 'instances') chunks of at most 'chunk_size' items each.
+        """
+        size = self.chunk_size
+        return [(items[start:start + size], instances[start:start + size]) for start in range(0, len(items), size)]
+
+    def backwards_many(self, serializer, chain, items, request, instances):
+        if len(items) < self.threshold or len(items) <= self.chunk_size:
+            return chain.backwards_many(items, request, instances)
+
+        representations = []
+        for chunk in self.map_chunks(serializer, chain, request, self.split(items, list(instances))):
+            representations.extend(chunk)
+        return representations
+
+    def map_chunks(self, serializer, chain, request, chunks):
+        """
+        :returns: An iterable of the demoted chunks, in order.
+        """
+        raise NotImplementedError(".map_chunks() must be overridden.")
+
+
+class ThreadPoolDemotionExecutor(PoolDemotionExecutor):
+    """
+    Demotes chunks of large lists on a thread pool.
+
+    Threads only help transforms that release the GIL, e.g. by waiting on I/O or calling into C
+    extensions. Transforms that query the database open a connection in every worker thread.
+    """
+    pool_class = ThreadPoolExecutor
+
+    def map_chunks(self, serializer, chain, request, chunks):
+        return self.get_pool().map(lambda chunk: chain.backwards_many(chunk[0], request, chunk[1]), chunks)
+
+
+class WorkerRequest(object):
+    """
+    The stand-in for the request passed to transforms run in a worker process. Only 'version' is set.
+    """
+    def __init__(self, version):
+        self.version = version
+
+
+# database connections inherited from the parent process, kept so that they are never closed from a worker
+_inherited_connections = []
+
+
+def drop_inherited_connections():
+    """
+    Makes the current process open its own database connections, without closing the ones it inherited
+    from the process it was forked from: closing them would also end them for that process. The inherited
+    connections are kept referenced until the worker exits, which does not run finalizers.
+    """
+    for alias in connections:
+        try:
+            _inherited_connections.append(connections[alias])
+            del connections[alias]
+        except AttributeError:
+            pass
+
+
+def demote_chunk(parent_pid, transform_base, version, base_version, copy_on_write, items, instances):
+    if os.getpid() != parent_pid and not _inherited_connections:
+        drop_inherited_connections()
+    chain = get_transform_chain(transform_base, base_version=base_version, reverse=True)
+    if copy_on_write:
+        chain = CopyOnWriteTransform(chain)
+    return chain.backwards_many(items, WorkerRequest(version), instances)
+
+
+class ProcessPoolDemotionExecutor(PoolDemotionExecutor):
+    """
+    Demotes chunks of large lists on a process pool, for CPU-bound transforms.
+
+    Representations and instances are pickled to and from the workers, and every worker builds its
+    own transform chains. Transforms receive a 'WorkerRequest' carrying only the requested 'version'
+    instead of the request. Workers are forked from the process that first uses the executor, so
+    Django is already set up in them. Workers drop the database connections they inherit from that process
+    before demoting their first chunk, so that none is shared with it; each opens its own on first use.
+
+    Workers only know the 'transform_base' of the serializer, so overrides of 'get_backwards_chain()'
+    on the serializer are not used in them: the workers run the default chain of the transform base.
+    """
+    pool_class = ProcessPoolExecutor
+
+    def map_chunks(self, serializer, chain, request, chunks):
+        pool = self.get_pool()
+        futures = [
+            pool.submit(
+                demote_chunk,
+                os.getpid(),
+                serializer.transform_base,
+                request.version,
+                get_request_version(request),
+                serializer.copy_on_write,
+                items,
+                instances,
+            )
+            for items, instances in chunks
+        ]
+        return (future.result() for future in futures)
+
+
+EXECUTOR_CLASSES = {
+    'inline': InlineDemotionExecutor,
+    'thread': ThreadPoolDemotionExecutor,
+    'process': ProcessPoolDemotionExecutor,
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_demotion_executor():
+    """
+    :returns: The shared executor configured by the 'DEMOTION_EXECUTOR', 'DEMOTION_WORKERS',
+    'DEMOTION_CHUNK_SIZE' and 'DEMOTION_THRESHOLD' settings.
+    """
+    mode = get_setting('DEMOTION_EXECUTOR')
+    if mode not in EXECUTOR_CLASSES:
+        raise ImproperlyConfigured(
+            "The 'DEMOTION_EXECUTOR' setting must be one of %s, not %r." % (', '.join(sorted(EXECUTOR_CLASSES)), mode)
+        )
+    if mode == 'inline':
+        options = ()
+    else:
+        options = (get_setting('DEMOTION_WORKERS'), get_setting('DEMOTION_CHUNK_SIZE'), get_setting('DEMOTION_THRESHOLD'))
+
+    key = (mode,) + options
+    executor = _executors.get(key)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = _executors[key] = EXECUTOR_CLASSES[mode](*options)
+    return executor
+
+
+def shutdown_demotion_executors():
+    """
+    Shuts down the pools of every executor returned by 'get_demotion_executor()'.
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left
+from collections import namedtuple
+import os
+import socket
+import threading
+import timeit
+from django.core.cache import caches
+
+
+TransformTiming = namedtuple(
+    'TransformTiming',
+    ['name', 'direction', 'version', 'request_version', 'items', 'elapsed'],
+)
+TransformTiming.__doc__ = """
+A single timed call of one step of a transform chain.
+
+'name' is the dotted path of the transform class, or of every class in a fused run of declarative
+transforms joined with '+'. 'direction' is one of 'forwards', 'backwards', 'forwards_many' or
+'backwards_many', and 'items' is the number of representations the call converted. 'elapsed' is
+in seconds.
+"""
+
+
+class TransformInstrumentation(object):
+    """
+    A registry of hooks called with a 'TransformTiming' after every step of every transform chain.
+
+    Transform chains are only timed while at least one hook is connected, so instrumentation costs
+    nothing when unused. Hooks run inline on the request thread and should be quick.
+    """
+    def __init__(self):
+        self.hooks = ()
+        self._lock = threading.Lock()
+
+    def connect(self, hook):
+        with self._lock:
+            if hook not in self.hooks:
+                self.hooks += (hook,)
+
+    def disconnect(self, hook):
+        with self._lock:
+            self.hooks = tuple(connected for connected in self.hooks if connected != hook)
+
+    def fire(self, timing):
+        for hook in self.hooks:
+            hook(timing)
+
+
+instrumentation = TransformInstrumentation()
+default_timer = timeit.default_timer
+
+
+# Upper bounds of the histogram buckets, in seconds, from 1 microsecond to 10 seconds.
+TIMING_BUCKETS = tuple(
+    scale * 10 ** exponent
+    for exponent in range(-6, 1)
+    for scale in (1, 2, 5)
+) + (10.0,)
+
+
+class TimingHistogram(object):
+    """
+    Counts timings in the fixed 'TIMING_BUCKETS'; the last bucket also counts anything slower than 10 seconds.
+    """
+    def __init__(self):
+        self.counts = [0] * len(TIMING_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed):
+        self.counts[min(bisect_left(TIMING_BUCKETS, elapsed), len(TIMING_BUCKETS) - 1)] += 1
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """
+        :returns: The upper bound of the bucket holding the given percentile, capped at the slowest timing seen.
+        """
+        if not self.count:
+            return 0.0
+        threshold = self.count * percent / 100.0
+        seen = 0
+        for bound, count in zip(TIMING_BUCKETS[:-1], self.counts):
+            seen += count
+            if seen >= threshold:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = list(data['counts'])
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.max = data['max']
+        return histogram
+
+
+class TransformTimingAggregator(object):
+    """
+    A hook that keeps a 'TimingHistogram' per transform and direction, in memory.
+
+    When 'cache_alias' names one of the caches in Django's 'CACHES' setting, every process also
+    publishes its histograms there at most every 'publish_interval' seconds, and '.collect()' merges
+    the histograms published by all processes. This is what the 'transform_timings' management
+    command reads, so use a cache shared between processes, such as memcached or redis.
+
+    Published histograms expire 'timeout' seconds after a process last published them, so those of
+    processes that have exited disappear, and their keys are dropped from the index of processes.
+    """
+    def __init__(self, cache_alias=None, publish_interval=10, key_prefix='rest_framework_transforms:timings', timeout=24 * 60 * 60):
+        self.cache_alias = cache_alias
+        self.publish_interval = publish_interval
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._published = default_timer()
+
+    def __call__(self, timing):
+        key = (timing.name, timing.direction)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = TimingHistogram()
+            histogram.record(timing.elapsed)
+        if self.cache_alias is not None and default_timer() - self._published >= self.publish_interval:
+            self.publish()
+
+    def snapshot(self):
+        """
+        :returns: A dictionary of copies of this process's histograms, keyed by (transform name, direction).
+        """
+        with self._lock:
+            return dict(
+                (key, TimingHistogram.from_dict(histogram.as_dict()))
+                for key, histogram in self._histograms.items()
+            )
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def index_key(self):
+        return '%s:processes' % self.key_prefix
+
+    @property
+    def process_key(self):
+        return '%s:%s:%d' % (self.key_prefix, socket.gethostname(), os.getpid())
+
+    def publish(self):
+        """
+        Stores this process's histograms in the cache, replacing those it published before.
+        """
+        self._published = default_timer()
+        snapshot = [
+            [name, direction, histogram.as_dict()]
+            for (name, direction), histogram in self.snapshot().items()
+        ]
+        cache = self.cache
+        process_key = self.process_key
+        cache.set(process_key, snapshot, self.timeout)
+        self._get_published(cache, include=process_key)
+
+    def _get_published(self, cache, include=None):
+        """
+        :returns: A dictionary of the histograms still published, keyed by process key. Keys of expired
+        histograms are dropped from the index, and 'include' is added to it.
+        """
+        processes = cache.get(self.index_key) or []
+        published = cache.get_many(processes)
+        live = [key for key in processes if key in published]
+        if include is not None and include not in live:
+            live.append(include)
+        if live != processes:
+            cache.set(self.index_key, live, self.timeout)
+        return published
+
+    def collect(self):
+        """
+        :returns: The histograms published by every process merged with this process's own, keyed by (transform name, direction).
+        """
+        histograms = self.snapshot()
+        if self.cache_alias is None:
+            return histograms
+        process_key = self.process_key
+        published = self._get_published(self.cache)
+        for snapshot in (snapshot for key, snapshot in published.items() if key != process_key):
+            for name, direction, data in snapshot:
+                histogram = histograms.get((name, direction))
+                if histogram is None:
+                    histograms[(name, direction)] = TimingHistogram.from_dict(data)
+                else:
+                    histogram.merge(TimingHistogram.from_dict(data))
+        return histograms
+
+    def clear(self):
+        """
+        Resets this process's histograms and discards every published histogram.
+        """
+        self.reset()
+        if self.cache_alias is not None:
+            cache = self.cache
+            cache.delete_many(cache.get(self.index_key) or [])
+            cache.delete(self.index_key)
+
+
+timing_aggregator = TransformTimingAggregator(cache_alias='default')
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from rest_framework_transforms.datastructures import thaw, wrap_copy_on_write
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+_MISSING = object()
+
+
+class LazyRepresentation(Mapping):
+    """
+    A demoted representation whose backwards transforms only run when its fields are read.
+
+    Reading a field runs only the steps of the chain that the field depends on, as found from their
+    'FieldScope's, over copy-on-write views of the fields those steps use. Each field is computed at
+    most once. Iterating over the representation, taking its length or calling '.evaluate()' runs the
+    whole chain once, after which every field is read from the result; so does reading a field when
+    a step of the chain has an unknown 'FieldScope'.
+
+    Renderers that copy the representation into a dictionary evaluate it in full, so laziness only saves
+    work when fields are read selectively first, e.g. with '.only()' for sparse fieldsets.
+    """
+    def __init__(self, data, chain, request, instance):
+        self._data = data
+        self._chain = chain
+        self._request = request
+        self._instance = instance
+        self._values = {}
+        self._evaluated = None
+
+    @property
+    def is_evaluated(self):
+        return self._evaluated is not None
+
+    def evaluate(self):
+        """
+        :returns: The fully demoted representation, as a dictionary.
+        """
+        if self._evaluated is None:
+            data = self._data
+            if self._values:
+                # Fields already computed may share unchanged values with the data.
+                data = wrap_copy_on_write(data)
+            self._evaluated = thaw(self._chain.backwards(data, self._request, self._instance))
+            self._data = self._values = None
+        return self._evaluated
+
+    def _compute(self, keys):
+        keys = [key for key in keys if key not in self._values]
+        if not keys:
+            return
+        plan = self._chain.select_output_steps('backwards', keys)
+        if plan is None:
+            self.evaluate()
+            return
+        indexes, fields = plan
+        data = wrap_copy_on_write(dict((field, self._data[field]) for field in fields if field in self._data))
+        data = self._chain.run_steps('backwards', indexes, data, self._request, self._instance)
+        for key in keys:
+            self._values[key] = thaw(data[key]) if key in data else _MISSING
+
+    def only(self, keys):
+        """
+        Computes just the given fields, running the steps they depend on together.
+
+        :returns: A dictionary of those of 'keys' that are in the demoted representation.
+        """
+        keys = tuple(keys)
+        if self._evaluated is None:
+            self._compute(keys)
+        if self._evaluated is not None:
+            return dict((key, self._evaluated[key]) for key in keys if key in self._evaluated)
+        return dict((key, self._values[key]) for key in keys if self._values[key] is not _MISSING)
+
+    def __getitem__(self, key):
+        if self._evaluated is None:
+            self._compute((key,))
+        if self._evaluated is not None:
+            return self._evaluated[key]
+        value = self._values[key]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self.evaluate())
+
+    def __len__(self):
+        return len(self.evaluate())
+
+    def __repr__(self):
+        if self._evaluated is None:
+            return '<LazyRepresentation (not evaluated)>'
+        return 'LazyRepresentation(%r)' % (self._evaluated,)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import io
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from rest_framework_transforms.codegen import diff_serializers, generate_transform_module
+from rest_framework_transforms.utils import scan_transform_classes
+
+
+class Command(BaseCommand):
+    help = "Generates a transform module from the differences between two serializers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('old_serializer', help='the dotted path of the serializer for the older version')
+        parser.add_argument('new_serializer', help='the dotted path of the serializer for the newer version')
+        parser.add_argument(
+            '--name',
+            help="the transform class name (default: the 'transform_base' of the new serializer followed by its next version)",
+        )
+        parser.add_argument(
+            '--rename', action='append', default=[], metavar='OLD:NEW',
+            help='a field renamed between the two serializers; may be given more than once',
+        )
+        parser.add_argument(
+            '--declarative', action='store_true',
+            help='generate a DeclarativeTransform whose operations are compiled into functions when first used',
+        )
+        parser.add_argument('--output', help='write the module to this file instead of standard output')
+
+    def handle(self, *args, **options):
+        old_serializer_class = self.import_serializer(options['old_serializer'])
+        new_serializer_class = self.import_serializer(options['new_serializer'])
+
+        renames = []
+        for rename in options['rename']:
+            old, _, new = rename.partition(':')
+            if not (old and new):
+                raise CommandError("--rename takes OLD:NEW field names, not '%s'." % rename)
+            renames.append((old, new))
+
+        try:
+            diff = diff_serializers(old_serializer_class, new_serializer_class, renames)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        source = generate_transform_module(
+            options['name'] or self.get_default_name(new_serializer_class),
+            diff.operations,
+            declarative=options['declarative'],
+            description='Generated by generate_transform from %s to %s.' % (options['old_serializer'], options['new_serializer']),
+            changed_fields=diff.changed_fields,
+        )
+
+        if options['output']:
+            with io.open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(source)
+        else:
+            self.stdout.write(source, ending='')
+
+    def import_serializer(self, path):
+        try:
+            return import_string(path)
+        except ImportError as exc:
+            raise CommandError("Cannot import serializer '%s': %s" % (path, exc))
+
+    def get_default_name(self, serializer_class):
+        transform_base = getattr(serializer_class, 'transform_base', None)
+        if not transform_base:
+            raise CommandError("%s has no 'transform_base'; pass --name." % serializer_class.__name__)
+        try:
+            versions = [version for version, _ in scan_transform_classes(transform_base)]
+        except ImportError:
+            versions = []
+        return '%s%04d' % (transform_base.rsplit('.', 1)[1], max(versions + [1]) + 1)
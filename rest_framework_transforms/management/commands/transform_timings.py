@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import json
+from django.core.management.base import BaseCommand
+from rest_framework_transforms.instrumentation import timing_aggregator
+
+
+SORT_KEYS = {
+    'p99': lambda histogram: histogram.percentile(99),
+    'p50': lambda histogram: histogram.percentile(50),
+    'mean': lambda histogram: histogram.mean,
+    'max': lambda histogram: histogram.max,
+    'total': lambda histogram: histogram.total,
+    'count': lambda histogram: histogram.count,
+}
+
+
+class Command(BaseCommand):
+    help = "Dumps the per-transform timing histograms published by 'timing_aggregator'."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='p99', help='the column to sort by, slowest first (default: p99)')
+        parser.add_argument('--limit', type=int, default=None, help='only show this many transforms')
+        parser.add_argument('--json', action='store_true', help='print the histograms as JSON')
+        parser.add_argument('--clear', action='store_true', help='discard every published histogram after dumping them')
+
+    def handle(self, *args, **options):
+        histograms = sorted(
+            timing_aggregator.collect().items(),
+            key=lambda item: SORT_KEYS[options['sort']](item[1]),
+            reverse=True,
+        )[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps([
+                dict(
+                    histogram.as_dict(),
+                    name=name,
+                    direction=direction,
+                    mean=histogram.mean,
+                    p50=histogram.percentile(50),
+                    p90=histogram.percentile(90),
+                    p99=histogram.percentile(99),
+                )
+                for (name, direction), histogram in histograms
+            ], indent=2, sort_keys=True))
+        elif not histograms:
+            self.stdout.write('No transform timings have been recorded.')
+        else:
+            self.stdout.write('%-60s %-15s %10s %10s %10s %10s %10s %10s' % (
+                'transform', 'direction', 'count', 'mean ms', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms',
+            ))
+            for (name, direction), histogram in histograms:
+                self.stdout.write('%-60s %-15s %10d %10.3f %10.3f %10.3f %10.3f %10.3f' % (
+                    name,
+                    direction,
+                    histogram.count,
+                    histogram.mean * 1000,
+                    histogram.percentile(50) * 1000,
+                    histogram.percentile(90) * 1000,
+                    histogram.percentile(99) * 1000,
+                    histogram.max * 1000,
+                ))
+
+        if options['clear']:
+            timing_aggregator.clear()
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple
+
+
+class FieldScope(namedtuple('FieldScope', ['fields', 'conditional'])):
+    """
+    The top-level fields a transform or operation can change, as used to prune transform chains.
+
+    'fields' is a frozenset of the field names read, changed, added or removed, or None when they are
+    not known. When 'conditional' is True, a representation with none of 'fields' is left unchanged.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def combine(cls, scopes):
+        """
+        :returns: The scope of running operations with the given scopes one after the other.
+        """
+        fields = frozenset()
+        conditional = True
+        for scope in scopes:
+            if scope.fields is None:
+                return UNKNOWN_SCOPE
+            fields |= scope.fields
+            conditional = conditional and scope.conditional
+        return cls(fields, conditional)
+
+
+UNKNOWN_SCOPE = FieldScope(None, False)
+
+
+class BaseOperation(object):
+    """
+    A single declarative change to the fields of a representation, used by 'DeclarativeTransform'.
+
+    Operations describe the forwards (promotion) direction. '.inverse()' returns the operation that
+    undoes them, which is used to demote representations.
+    """
+    def apply(self, data):
+        """
+        Applies the operation to the given dictionary.
+
+        :returns: The changed dictionary.
+        """
+        raise NotImplementedError(".apply() must be overridden.")
+
+    def inverse(self):
+        """
+        :returns: The operation that reverts this one.
+        """
+        raise NotImplementedError(".inverse() must be overridden.")
+
+    def get_field_scope(self):
+        """
+        :returns: The 'FieldScope' of the operation. Operations that do not override this method are never pruned.
+        """
+        return UNKNOWN_SCOPE
+
+
+class BaseFieldOperation(BaseOperation):
+    """
+    An operation that only renames, drops or adds top-level fields.
+
+    Consecutive field operations are folded into a single 'FieldMap', so that a whole run of them
+    is executed in one pass over the dictionary.
+    """
+    def fold(self, field_map):
+        """
+        Records the effect of this operation on the given 'FieldMap'.
+        """
+        raise NotImplementedError(".fold() must be overridden.")
+
+    def generate(self, default):
+        """
+        Generates straight-line Python statements that apply the operation to the dictionary 'data' in place.
+
+        :param default: A function returning the source of an expression for a given default value, which
+        calls the default when it is callable.
+        :returns: A list of source lines, without indentation.
+        """
+        raise NotImplementedError(".generate() must be overridden.")
+
+    def apply(self, data):
+        field_map = FieldMap()
+        self.fold(field_map)
+        return field_map.compile()(data)
+
+
+class Rename(BaseFieldOperation):
+    """
+    Renames the field 'old' to 'new', replacing any existing 'new' field when 'old' is present.
+    """
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+
+    def fold(self, field_map):
+        field_map.rename(self.old, self.new)
+
+    def generate(self, default):
+        if self.old == self.new:
+            return []
+        return [
+            'if %r in data:' % (self.old,),
+            '    data[%r] = data.pop(%r)' % (self.new, self.old),
+        ]
+
+    def inverse(self):
+        return Rename(self.new, self.old)
+
+    def get_field_scope(self):
+        return FieldScope(frozenset((self.old, self.new)), True)
+
+    def __repr__(self):
+        return 'Rename(%r, %r)' % (self.old, self.new)
+
+
+class Remove(BaseFieldOperation):
+    """
+    Drops the field 'name'. When reverted, the field is added back with 'default'.
+    """
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+    def fold(self, field_map):
+        field_map.remove(self.name)
+
+    def generate(self, default):
+        return ['data.pop(%r, None)' % (self.name,)]
+
+    def inverse(self):
+        return AddDefault(self.name, self.default)
+
+    def get_field_scope(self):
+        return FieldScope(frozenset((self.name,)), True)
+
+    def __repr__(self):
+        return 'Remove(%r)' % (self.name,)
+
+
+class AddDefault(BaseFieldOperation):
+    """
+    Adds the field 'name' with 'default' when it is not already present. When reverted, the field is dropped.
+
+    As with Django model fields, use a callable 'default' for mutable values such as lists or dictionaries.
+    """
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+    def fold(self, field_map):
+        field_map.add_default(self.name, self.default)
+
+    def generate(self, default):
+        return [
+            'if %r not in data:' % (self.name,),
+            '    data[%r] = %s' % (self.name, default(self.default)),
+        ]
+
+    def inverse(self):
+        return Remove(self.name, self.default)
+
+    def get_field_scope(self):
+        return FieldScope(frozenset((self.name,)), False)
+
+    def __repr__(self):
+        return 'AddDefault(%r, %r)' % (self.name, self.default)
+
+
+class Nest(BaseOperation):
+    """
+    Moves the top-level 'fields' into a new dictionary stored under the field 'into'.
+    """
+    def __init__(self, fields, into):
+        self.fields = tuple(fields)
+        self.into = into
+
+    def apply(self, data):
+        data[self.into] = dict(
+            (name, data.pop(name))
+            for name in self.fields
+            if name in data
+        )
+        return data
+
+    def inverse(self):
+        return Flatten(self.into, self.fields)
+
+    def get_field_scope(self):
+        return FieldScope(frozenset(self.fields + (self.into,)), False)
+
+    def __repr__(self):
+        return 'Nest(%r, %r)' % (self.fields, self.into)
+
+
+class Flatten(BaseOperation):
+    """
+    Moves 'fields' out of the dictionary stored under the field 'name' and onto the top level,
+    dropping the nested dictionary.
+    """
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(fields)
+
+    def apply(self, data):
+        nested = data.pop(self.name, None) or {}
+        for name in self.fields:
+            if name in nested:
+                data[name] = nested[name]
+        return data
+
+    def inverse(self):
+        return Nest(self.fields, self.name)
+
+    def get_field_scope(self):
+        return FieldScope(frozenset(self.fields + (self.name,)), True)
+
+    def __repr__(self):
+        return 'Flatten(%r, %r)' % (self.name, self.fields)
+
+
+class FieldMap(object):
+    """
+    The combined effect of a run of field operations, executed in a single pass over a dictionary.
+
+    Every field name mentioned by an operation is tracked by the original key it was read from.
+    Keys that end up under the same name are kept in priority order, so that a later rename onto
+    an existing field replaces it exactly as running the operations one by one would.
+    """
+    def __init__(self):
+        self.fates = {}
+        self.holders = {}
+        self.defaults = {}
+
+    def _mention(self, name):
+        if name not in self.fates:
+            self.fates[name] = name
+            self.holders.setdefault(name, []).insert(0, name)
+
+    def rename(self, old, new):
+        self._mention(old)
+        self._mention(new)
+        if old == new:
+            return
+        moving = self.holders.pop(old, [])
+        if old in self.defaults:
+            # 'old' is always present, so whatever 'new' held is always replaced.
+            for key in self.holders.pop(new, []):
+                self.fates[key] = None
+            self.defaults[new] = self.defaults.pop(old)
+        for key in moving:
+            self.fates[key] = new
+        self.holders.setdefault(new, []).extend(moving)
+
+    def remove(self, name):
+        self._mention(name)
+        for key in self.holders.pop(name, []):
+            self.fates[key] = None
+        self.defaults.pop(name, None)
+
+    def add_default(self, name, default):
+        self._mention(name)
+        self.defaults.setdefault(name, default)
+
+    def compile(self):
+        """
+        Freezes the recorded operations into the lookup tables used by '__call__'.
+        """
+        self.moves = tuple(
+            (key, name)
+            for name, keys in self.holders.items()
+            for key in keys
+            if not (keys == [name] and key == name)
+        )
+        self.tracked = frozenset(
+            key
+            for key, name in self.fates.items()
+            if name is None or (key, name) in self.moves
+        )
+        self.default_items = tuple(self.defaults.items())
+        return self
+
+    @property
+    def is_noop(self):
+        return not self.tracked and not self.default_items
+
+    def __call__(self, data):
+        tracked = self.tracked
+        result = data.__class__()
+        for key, value in data.items():
+            if key not in tracked:
+                result[key] = value
+        for key, name in self.moves:
+            if key in data:
+                result[name] = data[key]
+        for name, default in self.default_items:
+            if name not in result:
+                result[name] = default() if callable(default) else default
+        return result
+
+    def __repr__(self):
+        return 'FieldMap(moves=%r, dropped=%r, defaults=%r)' % (
+            self.moves,
+            sorted(key for key, name in self.fates.items() if name is None),
+            self.default_items,
+        )
+
+
+def generate_function(operations, name='apply_operations'):
+    """
+    Compiles field operations into a Python function that applies all of them to a dictionary in place,
+    with one straight-line statement per operation instead of a loop over the fields.
+
+    :returns: The function. Its generated source is stored in its 'source' attribute.
+    """
+    namespace = {}
+
+    def default(value):
+        default_name = '_default%d' % len(namespace)
+        namespace[default_name] = value
+        return default_name + '()' if callable(value) else default_name
+
+    lines = ['def %s(data):' % name]
+    for operation in operations:
+        lines.extend('    ' + line for line in operation.generate(default))
+    lines.append('    return data')
+    source = '\n'.join(lines) + '\n'
+    exec(compile(source, '<generated %s>' % name, 'exec'), namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+class OperationPlan(object):
+    """
+    A compiled list of operations.
+
+    Runs of field operations are fused into a single 'FieldMap' step, or into a generated function when
+    'generate_code' is True; other operations are kept as steps of their own. Steps that would not change
+    the representation are dropped.
+    """
+    def __init__(self, operations, generate_code=False):
+        self.steps = []
+        run = []
+        for operation in operations:
+            if isinstance(operation, BaseFieldOperation):
+                run.append(operation)
+            else:
+                self._add_run(run, generate_code)
+                run = []
+                self.steps.append(operation.apply)
+        self._add_run(run, generate_code)
+        self.steps = tuple(self.steps)
+
+    def _add_run(self, run, generate_code):
+        if not run:
+            return
+        field_map = FieldMap()
+        for operation in run:
+            operation.fold(field_map)
+        if field_map.compile().is_noop:
+            return
+        self.steps.append(generate_function(run) if generate_code else field_map)
+
+    @property
+    def is_noop(self):
+        return not self.steps
+
+    def __call__(self, data):
+        for step in self.steps:
+            data = step(data)
+        return data
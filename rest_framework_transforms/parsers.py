@@ -1,17 +1,43 @@
 # -*- coding: utf-8 -*-
 
+import codecs
+import hashlib
+import io
+import json
+import numbers
+import re
+from django.conf import settings
+from rest_framework.exceptions import ParseError
 from rest_framework.parsers import JSONParser
+from rest_framework_transforms.cache import PromotionCacheKey
+from rest_framework_transforms.decoders import get_json_decoder
 from rest_framework_transforms.exceptions import TransformBaseNotDeclaredException
-from rest_framework_transforms.utils import get_transform_classes
+from rest_framework_transforms.transforms import CopyOnWriteTransform, is_cacheable
+from rest_framework_transforms.utils import get_transform_chain, is_latest_version
+from rest_framework_transforms.versions import get_request_version
 
 
 class BaseVersioningParser(JSONParser):
     """
     A base class for parsers that automatically promote resource representations
     according to provided transform classes for that resource.
+
+    Set 'copy_on_write' to run the transforms over copy-on-write views of the parsed data.
+
+    Request bodies are decoded with the decoder named by the 'JSON_DECODER' setting, or by 'json_decoder'
+    when it is set; see 'get_json_decoder()'.
+
+    Requests for the latest version are returned as they were decoded, without looking up a transform chain.
+
+    Set 'promotion_cache' to a 'PromotionCache' to reuse the promoted data of identical request bodies
+    sent for the same version, e.g. by retrying clients. Only chains whose transforms are all cacheable
+    are cached; see 'BaseTransform.is_cacheable()'.
     """
     media_type = None
     transform_base = None
+    copy_on_write = False
+    json_decoder = None
+    promotion_cache = None
 
     def parse(self, stream, media_type=None, parser_context=None):
         """
@@ -19,16 +45,238 @@ class BaseVersioningParser(JSONParser):
         parsed representation to convert the requested version of this content type into the
         highest supported version of the content type.
 
+        A top-level JSON array is treated as a list of representations and promoted with '.forwards_many()'.
+
         :returns: A dictionary of upconverted request data in the most recent supported version of the content type.
         """
         if not self.transform_base:
             raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
 
-        json_data_dict = super(BaseVersioningParser, self).parse(stream, media_type, parser_context)
         request = parser_context['request']
+        if not self.can_cache_promotion(request):
+            json_data_dict = self.decode(stream, media_type, parser_context)
+            return self.promote(json_data_dict, request)
+
+        body = stream.read()
+        key = self.get_promotion_cache_key(body, request)
+        data = self.promotion_cache.get(key)
+        if data is None:
+            data = self.promote(self.decode(io.BytesIO(body), media_type, parser_context), request)
+            self.promotion_cache.set(key, data)
+        return data
+
+    def can_cache_promotion(self, request):
+        """
+        :returns: True when 'promotion_cache' is set and every transform promoting the request's version is cacheable.
+        """
+        return (
+            self.promotion_cache is not None
+            and self.needs_promotion(request)
+            and is_cacheable(self.get_forwards_chain(request))
+        )
+
+    def get_promotion_cache_key(self, body, request):
+        """
+        :returns: The 'PromotionCacheKey' of the promoted data for the raw request 'body'.
+        """
+        return PromotionCacheKey(
+            body_hash=hashlib.sha256(body).hexdigest(),
+            target_version=get_request_version(request),
+            transform_base=self.transform_base,
+            parser='%s.%s' % (self.__class__.__module__, self.__class__.__name__),
+        )
+
+    def decode(self, stream, media_type=None, parser_context=None):
+        """
+        Decodes the JSON request body without running any transforms.
+
+        The standard library decoder goes through DRF's 'JSONParser'. Other decoders are handed the raw
+        bytes of UTF-8 bodies, and the decoded text of bodies in any other charset.
+        """
+        name, loads = get_json_decoder(self.json_decoder)
+        if name == 'json':
+            return super(BaseVersioningParser, self).parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if codecs.lookup(encoding).name != 'utf-8':
+            body = body.decode(encoding)
+        try:
+            return loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+    def promote(self, data, request):
+        """
+        Runs the forwards transform chain for the requested version over parsed request data.
+        """
+        if self.needs_promotion(request):
+            chain = self.get_forwards_chain(request)
+            if isinstance(data, list):
+                data = chain.forwards_many(data, request)
+            else:
+                data = chain.forwards(data, request)
+
+        return data
+
+    def needs_promotion(self, request):
+        """
+        :returns: True when the request is versioned and asks for a version older than the latest one.
+        """
+        return hasattr(request, 'version') and not is_latest_version(self.transform_base, get_request_version(request))
+
+    def get_forwards_chain(self, request):
+        """
+        :returns: The 'CompositeTransform' that promotes a representation from the version of the given request.
+        """
+        chain = get_transform_chain(self.transform_base, base_version=get_request_version(request), reverse=False)
+        if self.copy_on_write:
+            chain = CopyOnWriteTransform(chain)
+        return chain
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# what may follow a complete array element
+ELEMENT_DELIMITERS = frozenset(' \t\n\r,]')
+# characters that may continue a number cut short by the end of a chunk, e.g. '1.' or '1.5e'
+NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+
+
+def strict_constant(value):
+    raise ValueError('Out of range float values are not JSON compliant: ' + repr(value))
+
+
+def may_be_cut_short(item, buffer, end):
+    """
+    :returns: True when the element 'item', decoded from 'buffer' up to 'end', may be the start of a longer
+    element: when it runs to the end of the buffer, or when it is a number followed only by characters
+    that could continue it, as with '1.' or '1.5e' when the next chunk holds the rest of '1.25' or '1.5e3'.
+    """
+    if end == len(buffer):
+        return True
+    if buffer[end] in ELEMENT_DELIMITERS:
+        return False
+    return (
+        isinstance(item, numbers.Number)
+        and not isinstance(item, bool)
+        and NUMBER_TAIL.match(buffer, end).end() == len(buffer)
+    )
+
+
+def iter_json_array(stream, decoder, buffer, chunk_size, strict=True):
+    """
+    Incrementally decodes the elements of a JSON array whose opening bracket has already been read.
+
+    'buffer' holds any text already read past the opening bracket. More of the stream is only read
+    when the buffered text does not contain a complete element. Decoding an incomplete element is only
+    retried once the buffer has grown by at least the size of that element, so an element spanning many
+    chunks is decoded a logarithmic number of times, and the buffer is trimmed at most once per chunk.
+
+    Like DRF's 'STRICT_JSON', 'strict' rejects 'NaN', 'Infinity' and '-Infinity'.
+    """
+    json_decoder = json.JSONDecoder(parse_constant=strict_constant if strict else None)
+    exhausted = False
+    expect_item = True
+    first = True
+    index = 0
+    # the buffer length at which decoding an incomplete element is retried
+    retry_at = 0
+
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        if index < len(buffer) and len(buffer) >= retry_at:
+            if buffer[index] == ']' and (first or not expect_item):
+                return
+            if not expect_item:
+                if buffer[index] != ',':
+                    raise ParseError("JSON parse error - Expected ',' or ']' between array elements.")
+                index += 1
+                expect_item = True
+                continue
+            try:
+                item, end = json_decoder.raw_decode(buffer, index)
+            except ValueError as exc:
+                if exhausted:
+                    raise ParseError('JSON parse error - %s' % str(exc))
+            else:
+                if exhausted or not may_be_cut_short(item, buffer, end):
+                    yield item
+                    index = end
+                    expect_item = False
+                    first = False
+                    continue
+            retry_at = 2 * len(buffer) - index
+        if exhausted:
+            raise ParseError('JSON parse error - Unterminated JSON array.')
+        if index:
+            buffer = buffer[index:]
+            retry_at -= index
+            index = 0
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buffer += decoder.decode(chunk)
+        else:
+            buffer += decoder.decode(b'', final=True)
+            exhausted = True
+            retry_at = 0
+
+
+class StreamingVersioningParser(BaseVersioningParser):
+    """
+    A versioning parser for request bodies that are large JSON arrays, such as bulk imports.
+
+    The elements of a top-level JSON array are decoded and promoted one at a time and returned as a
+    generator, so memory use follows the size of a single element rather than of the whole body.
+    Views must iterate the parsed data only once. Bodies that are not a JSON array are parsed and
+    promoted as usual.
+    """
+    chunk_size = 64 * 1024
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        :returns: A generator of upconverted items for a JSON array, or the upconverted data for any other body.
+        """
+        if not self.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        request = parser_context['request']
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        buffer = ''
+        while not buffer.strip():
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                break
+            buffer += decoder.decode(chunk)
+        buffer = buffer.lstrip()
+
+        if not buffer.startswith('['):
+            buffer += decoder.decode(stream.read(), final=True)
+            name, loads = get_json_decoder(self.json_decoder)
+            try:
+                if name == 'json':
+                    data = json.loads(buffer, parse_constant=strict_constant if getattr(self, 'strict', False) else None)
+                else:
+                    data = loads(buffer)
+            except ValueError as exc:
+                raise ParseError('JSON parse error - %s' % str(exc))
+            return self.promote(data, request)
 
-        if hasattr(request, 'version'):
-            for transform in get_transform_classes(self.transform_base, base_version=request.version, reverse=False):
-                json_data_dict = transform().forwards(data=json_data_dict, request=request)
+        items = iter_json_array(stream, decoder, buffer[1:], self.chunk_size, getattr(self, 'strict', False))
+        return self.promote_items(items, request)
+
+    def promote_items(self, items, request):
+        """
+        Lazily runs the forwards transform chain over each item.
+        """
+        if not self.needs_promotion(request):
+            for item in items:
+                yield item
+            return
 
-        return json_data_dict
+        chain = self.get_forwards_chain(request)
+        for item in items:
+            yield chain.forwards(item, request)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingVersionedResponse(StreamingHttpResponse):
+    """
+    Streams a list of versioned representations to the client as a JSON array.
+
+    Takes a 'many=True' versioning serializer and renders its items as they are demoted, so the
+    first bytes are sent before the whole list is serialized and memory use does not grow with the
+    size of the list. For example, in a view:
+
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return StreamingVersionedResponse(serializer)
+    """
+    encoder_class = JSONEncoder
+    buffer_size = 64 * 1024
+
+    def __init__(self, serializer, content_type='application/json', **kwargs):
+        super(StreamingVersionedResponse, self).__init__(
+            self.render(serializer.iter_representation(serializer.instance)),
+            content_type=content_type,
+            **kwargs
+        )
+
+    def render(self, items):
+        """
+        Encodes the items as a JSON array, yielding chunks of roughly 'buffer_size' bytes.
+        """
+        encoder = self.encoder_class(ensure_ascii=False, separators=(',', ':'))
+        chunk = [b'[']
+        size = 1
+        for index, item in enumerate(items):
+            encoded = encoder.encode(item).encode('utf-8')
+            if index:
+                chunk.append(b',')
+            chunk.append(encoded)
+            size += len(encoded) + 1
+            if size >= self.buffer_size:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(b']')
+        yield b''.join(chunk)
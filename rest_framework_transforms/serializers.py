@@ -1,15 +1,263 @@
 # -*- coding: utf-8 -*-
 
+from itertools import islice
+import django
+from django.db import models
+from django.db.models.query import QuerySet
+from rest_framework.serializers import ListSerializer
+from rest_framework_transforms.cache import get_model_label, RepresentationCacheKey
+from rest_framework_transforms.context import get_transform_context
 from rest_framework_transforms.exceptions import TransformBaseNotDeclaredException
-from rest_framework_transforms.utils import get_transform_classes
+from rest_framework_transforms.executors import get_demotion_executor
+from rest_framework_transforms.lazy import LazyRepresentation
+from rest_framework_transforms.transforms import _get_function, CopyOnWriteTransform, reads_request
+from rest_framework_transforms.utils import get_transform_chain, is_latest_version
+from rest_framework_transforms.versions import get_request_version
 
 
+# 'QuerySet.iterator()' takes a 'chunk_size' on Django 2.0 and later
+ITERATOR_CHUNK_SIZE = django.VERSION >= (2, 0)
+
 class BaseVersioningSerializer(object):
     """
     A base class for serializers that automatically demote resource representations
     according to provided transform classes for the resource.
+
+    Set 'representation_cache' to a 'BaseRepresentationCache' to reuse demoted representations of model
+    instances between requests. When the model has a field that changes on every update, such as a
+    modification timestamp, name it in 'representation_cache_version_field' so that changes made without
+    saving the instance (e.g. 'QuerySet.update()') are also picked up. Representations are cached per
+    instance and version only, and served to every client: they are not cached when a transform of the
+    chain reads the request, but serializers whose fields depend on it, e.g. absolute URLs or fields
+    computed from 'request.user', must override '.get_representation_cache_key()'.
+
+    Set 'copy_on_write' to run the transforms over copy-on-write views of the serialized data.
+
+    Set 'demotion_executor' to an executor from 'rest_framework_transforms.executors' to demote large
+    lists in parallel; by default the executor configured by the 'DEMOTION_EXECUTOR' setting is used.
+
+    Set 'lazy_demotion' to return a 'LazyRepresentation' instead of a dictionary, so that only the fields
+    that are read are demoted. Representations that are stored in 'representation_cache' are demoted eagerly.
+
+    Nested versioning serializers share a 'TransformContext' through the serializer context. Set
+    'share_representations' to serialize and demote a model instance that appears more than once in the
+    tree only once per serializer class and set of fields.
+
+    Requests for the latest version are serialized without looking up a transform chain. Only
+    'representation_cache' is still used for them, as it saves serializing the instance.
     """
     transform_base = None
+    copy_on_write = False
+    demotion_executor = None
+    lazy_demotion = False
+    share_representations = False
+    representation_cache = None
+    representation_cache_version_field = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Watches the model of every serializer class as soon as it is created, on Python 3.6 and later.
+        """
+        super(BaseVersioningSerializer, cls).__init_subclass__(**kwargs)
+        cls.watch_model()
+
+    def __init__(self, *args, **kwargs):
+        if '_watching_model' not in self.__class__.__dict__:
+            # on Python versions without '__init_subclass__', watch the model when the class is first used
+            self.__class__.watch_model()
+        super(BaseVersioningSerializer, self).__init__(*args, **kwargs)
+
+    @classmethod
+    def watch_model(cls):
+        """
+        Watches 'Meta.model' for changes when the serializer has a 'representation_cache', so that saves and
+        deletes invalidate its representations even before this process has cached any.
+        """
+        model = getattr(getattr(cls, 'Meta', None), 'model', None)
+        if cls.representation_cache is not None and model is not None:
+            cls.representation_cache.watch(model)
+        cls._watching_model = True
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Uses 'BaseVersioningListSerializer' for 'many=True' unless the serializer's Meta declares its own
+        'list_serializer_class'.
+        """
+        list_serializer = super(BaseVersioningSerializer, cls).many_init(*args, **kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if getattr(meta, 'list_serializer_class', None) is None and type(list_serializer) is ListSerializer:
+            list_serializer.__class__ = BaseVersioningListSerializer
+        return list_serializer
+
+    def needs_demotion(self, request):
+        """
+        :returns: True when 'request' is versioned and asks for a version older than the latest one.
+        """
+        return request is not None and hasattr(request, 'version') and not is_latest_version(self.transform_base, get_request_version(request))
+
+    def get_backwards_chain(self, request):
+        """
+        :returns: The 'CompositeTransform' that demotes a representation from the highest supported version
+        down to the version of the given request.
+        """
+        chain = get_transform_chain(self.transform_base, base_version=get_request_version(request), reverse=True)
+        if self.copy_on_write:
+            chain = CopyOnWriteTransform(chain)
+        return chain
+
+    def get_lazy_representation(self, instance, request):
+        """
+        :returns: A 'LazyRepresentation' of 'instance' at the version of the given request.
+        """
+        chain = get_transform_chain(self.transform_base, base_version=get_request_version(request), reverse=True)
+        return LazyRepresentation(self.to_latest_representation(instance), chain, request, instance)
+
+    def get_transform_context(self, request):
+        """
+        :returns: The 'TransformContext' shared by the serializer tree for 'request'.
+        """
+        return get_transform_context(self.context, request)
+
+    def get_shared_representation_key(self, instance):
+        """
+        :returns: The key of the representation of 'instance' in the 'TransformContext', or None when it is not shared.
+        """
+        if not (self.share_representations and isinstance(instance, models.Model)) or instance.pk is None:
+            return None
+        return (self.get_shared_representation_signature(), get_model_label(instance), instance.pk)
+
+    def get_shared_representation_signature(self):
+        """
+        :returns: What identifies the output of this serializer for an instance: its class and the names of its
+        fields. Serializers of the same class with different fields, such as a brief and a full variant, do not
+        share representations.
+        """
+        signature = self.__dict__.get('_shared_representation_signature')
+        if signature is None:
+            signature = self._shared_representation_signature = (self.__class__, tuple(self.fields))
+        return signature
+
+    def to_latest_representation(self, instance):
+        """
+        Serializes the instance at the highest supported version, without running any transforms.
+        """
+        return super(BaseVersioningSerializer, self).to_representation(instance)
+
+    def can_cache_representations(self, chain):
+        """
+        :returns: True when 'representation_cache' is set and no transform of the backwards 'chain' reads the request.
+        """
+        return self.representation_cache is not None and not reads_request(chain, 'backwards')
+
+    def get_representation_cache_key(self, instance, request):
+        """
+        :returns: The 'RepresentationCacheKey' for the demoted representation of 'instance', or None when it cannot be cached.
+
+        The key does not depend on the request, so the cached representation is served to every client asking
+        for the same version. Override this to return None, or a key with a per-client 'serializer' part, when
+        the serializer's output depends on the request, e.g. through 'HyperlinkedIdentityField' or a
+        'SerializerMethodField' reading 'request.user'.
+        """
+        pk = getattr(instance, 'pk', None)
+        if pk is None:
+            return None
+        version_token = None
+        if self.representation_cache_version_field:
+            version_token = getattr(instance, self.representation_cache_version_field)
+        return RepresentationCacheKey(
+            model=get_model_label(instance),
+            pk=pk,
+            version_token=version_token,
+            target_version=get_request_version(request),
+            transform_base=self.transform_base,
+            serializer='%s.%s' % (self.__class__.__module__, self.__class__.__name__),
+        )
+
+    def get_demotion_executor(self):
+        if self.demotion_executor is not None:
+            return self.demotion_executor
+        return get_demotion_executor()
+
+    def demote_many(self, chain, items, request, instances):
+        """
+        Runs the backwards chain over serialized 'items' with the serializer's demotion executor.
+        """
+        return self.get_demotion_executor().backwards_many(self, chain, items, request, instances)
+
+    def _store_representations(self, keys, items, instances):
+        cache = self.representation_cache
+        mapping = {}
+        for key, data, instance in zip(keys, items, instances):
+            if key is not None:
+                cache.watch(instance.__class__)
+                mapping[key] = data
+        if mapping:
+            cache.set_many(mapping)
+
+    def represent_many(self, instances, request, chain):
+        """
+        Serializes a list of instances and demotes them with a single call to the given backwards chain.
+        Representations found in 'representation_cache' are neither serialized nor demoted again.
+        """
+        if not self.can_cache_representations(chain):
+            if self.lazy_demotion:
+                return [self.get_lazy_representation(instance, request) for instance in instances]
+            items = [self.to_latest_representation(instance) for instance in instances]
+            return self.demote_many(chain, items, request, instances)
+
+        keys = [self.get_representation_cache_key(instance, request) for instance in instances]
+        cached = self.representation_cache.get_many([key for key in keys if key is not None])
+        missing = [index for index, key in enumerate(keys) if key is None or key not in cached]
+        if not missing:
+            return [cached[key] for key in keys]
+
+        missing_instances = [instances[index] for index in missing]
+        items = self.demote_many(
+            chain,
+            [self.to_latest_representation(instance) for instance in missing_instances],
+            request,
+            missing_instances,
+        )
+        missing_keys = [keys[index] for index in missing]
+        self._store_representations(missing_keys, items, missing_instances)
+
+        representations = [cached.get(key) for key in keys]
+        for index, data in zip(missing, items):
+            representations[index] = data
+        return representations
+
+    def represent_shared(self, instances, request):
+        """
+        Like '.represent_many()', but reuses and stores representations in the request's 'TransformContext'.
+        """
+        transform_context = self.get_transform_context(request)
+        keys = [self.get_shared_representation_key(instance) for instance in instances]
+        representations = [None if key is None else transform_context.get_representation(key) for key in keys]
+        missing = []
+        duplicates = []
+        pending = set()
+        for index, (key, data) in enumerate(zip(keys, representations)):
+            if data is not None:
+                continue
+            if key in pending:
+                duplicates.append(index)
+                continue
+            missing.append(index)
+            if key is not None:
+                pending.add(key)
+        if not missing:
+            return representations
+
+        missing_instances = [instances[index] for index in missing]
+        items = self.represent_many(missing_instances, request, transform_context.get_backwards_chain(self))
+        for index, data in zip(missing, items):
+            representations[index] = data
+            if keys[index] is not None:
+                transform_context.set_representation(keys[index], data)
+        for index in duplicates:
+            representations[index] = transform_context.get_representation(keys[index])
+        return representations
 
     def to_representation(self, instance):
         """
@@ -20,14 +268,119 @@ class BaseVersioningSerializer(object):
         if not self.transform_base:
             raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
 
-        data = super(BaseVersioningSerializer, self).to_representation(instance)
-        if instance:
-            request = self.context.get('request')
+        request = self.context.get('request')
+        if not (instance and request and hasattr(request, 'version')):
+            return self.to_latest_representation(instance)
+        if self.representation_cache is None and not self.needs_demotion(request):
+            return self.to_latest_representation(instance)
+
+        transform_context = self.get_transform_context(request)
+        shared_key = self.get_shared_representation_key(instance)
+        if shared_key is not None:
+            data = transform_context.get_representation(shared_key)
+            if data is not None:
+                return data
+
+        data = self.demote(instance, request, transform_context)
+        if shared_key is not None:
+            transform_context.set_representation(shared_key, data)
+        return data
+
+    def demote(self, instance, request, transform_context):
+        """
+        Serializes and demotes a single instance, using 'representation_cache' or lazy demotion when configured.
+        """
+        chain = transform_context.get_backwards_chain(self) if self.representation_cache is not None else None
+        cache_key = None
+        if chain is not None and self.can_cache_representations(chain):
+            cache_key = self.get_representation_cache_key(instance, request)
+            cached = self.representation_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                return cached
+        elif self.lazy_demotion:
+            return self.get_lazy_representation(instance, request)
+        if chain is None:
+            chain = transform_context.get_backwards_chain(self)
 
-            if request and hasattr(request, 'version'):
-                # demote data until we've run the transform just above the requested version
+        # demote data until we've run the transform just above the requested version
+        data = chain.backwards(self.to_latest_representation(instance), request, instance)
 
-                for transform in get_transform_classes(self.transform_base, base_version=request.version, reverse=True):
-                    data = transform().backwards(data, request, instance)
+        if cache_key is not None:
+            self._store_representations([cache_key], [data], [instance])
 
         return data
+
+
+class BaseVersioningListSerializer(ListSerializer):
+    """
+    A list serializer for 'BaseVersioningSerializer' children that demotes the whole list with a single
+    call to the backwards chain, rather than once for every serialized instance.
+
+    Children that override '.to_representation()' are serialized one item at a time with their own
+    '.to_representation()', so that the override is not bypassed.
+    """
+    stream_batch_size = 100
+
+    @property
+    def is_batchable(self):
+        """
+        True unless the child serializer overrides '.to_representation()'.
+        """
+        return _get_function(type(self.child), 'to_representation') is _get_function(BaseVersioningSerializer, 'to_representation')
+
+    def to_representation(self, data):
+        """
+        Serializes each item at the highest supported version and demotes the whole list at once.
+        """
+        if not self.child.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        request = self.context.get('request')
+
+        if not self.is_batchable:
+            return [self.child.to_representation(item) for item in iterable]
+        if not (request and hasattr(request, 'version')):
+            return [self.child.to_latest_representation(item) for item in iterable]
+        if self.child.representation_cache is None and not self.child.needs_demotion(request):
+            # the latest version needs neither chains nor shared representations, so skip the child's '.to_representation()'
+            return [self.child.to_latest_representation(item) for item in iterable]
+
+        return self.child.represent_shared(list(iterable), request)
+
+    def iter_representation(self, data):
+        """
+        Lazily serializes and demotes the given instances, 'stream_batch_size' at a time.
+
+        Querysets are read with '.iterator()', in chunks of 'stream_batch_size' on Django 2.0 and later, so
+        neither the instances nor their representations are held in memory all at once. Django 4.1 and later
+        also apply 'prefetch_related()' to each chunk.
+        """
+        if not self.child.transform_base:
+            raise TransformBaseNotDeclaredException("VersioningParser cannot correctly promote incoming resources with no transform classes.")
+
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if not isinstance(data, QuerySet):
+            iterable = iter(data)
+        elif ITERATOR_CHUNK_SIZE:
+            iterable = data.iterator(chunk_size=self.stream_batch_size)
+        else:
+            iterable = data.iterator()
+        request = self.context.get('request')
+        chain = None
+        if self.child.needs_demotion(request) or (self.child.representation_cache is not None and hasattr(request, 'version')):
+            chain = self.child.get_transform_context(request).get_backwards_chain(self.child)
+
+        while True:
+            instances = list(islice(iterable, self.stream_batch_size))
+            if not instances:
+                return
+            if not self.is_batchable:
+                items = [self.child.to_representation(instance) for instance in instances]
+            elif chain is None:
+                items = [self.child.to_latest_representation(instance) for instance in instances]
+            else:
+                items = self.child.represent_many(instances, request, chain)
+            for item in items:
+                yield item
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Settings for rest_framework_transforms are all namespaced in the REST_FRAMEWORK_TRANSFORMS setting:
+
+    REST_FRAMEWORK_TRANSFORMS = {
+        'WARMUP': True,
+    }
+"""
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Build every transform chain when Django starts, rather than on the first request using it.
+    # Off by default, since it imports the 'WARMUP_MODULES' of every installed app at startup.
+    'WARMUP': False,
+    # Submodules of every installed app imported before the system checks and warming up, so that
+    # their versioning parsers and serializers are found.
+    'WARMUP_MODULES': ('serializers', 'parsers'),
+    # The JSON decoder used by versioning parsers: 'json', 'orjson', 'ujson' or the dotted path of a
+    # 'loads' function, or a sequence of them in order of preference. Decoders that cannot be imported
+    # are skipped, falling back to 'json'.
+    'JSON_DECODER': 'json',
+    # The API versions in use, when they are not plain numbers or dates, e.g. ('1.0', '1.1', '2.0').
+    # Transform classes are then numbered by the position of the version they convert to, from 1.
+    'VERSIONS': None,
+    # How versioning list serializers demote large lists: 'inline', 'thread' or 'process'.
+    'DEMOTION_EXECUTOR': 'inline',
+    # The number of workers in the thread or process pool; None uses the pool's default.
+    'DEMOTION_WORKERS': None,
+    # The number of items demoted by a worker at a time.
+    'DEMOTION_CHUNK_SIZE': 250,
+    # Lists shorter than this are demoted inline even when a pool is configured.
+    'DEMOTION_THRESHOLD': 1000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'REST_FRAMEWORK_TRANSFORMS', {}).get(name, DEFAULTS[name])
@@ -1,3 +1,42 @@
+try:
+    from dis import get_instructions
+except ImportError:  # Python 2
+    get_instructions = None
+import re
+from rest_framework_transforms.datastructures import thaw, wrap_copy_on_write
+from rest_framework_transforms.instrumentation import default_timer, instrumentation, TransformTiming
+from rest_framework_transforms.operations import FieldScope, OperationPlan, Rename, UNKNOWN_SCOPE
+
+
+TRANSFORM_VERSION_PATTERN = re.compile(r'\d+$')
+
+
+def _get_function(cls, name):
+    method = getattr(cls, name)
+    return getattr(method, '__func__', method)
+
+
+def reads_argument(function, position):
+    """
+    :returns: False when the code of 'function' never reads its positional argument at 'position', counting
+    'self', and True when it does or when that cannot be told, e.g. for builtins or on Python 2.
+    """
+    function = getattr(function, '__func__', function)
+    code = getattr(function, '__code__', None)
+    if code is None or get_instructions is None or position >= code.co_argcount:
+        return True
+    name = code.co_varnames[position]
+    if name in code.co_cellvars or 'locals' in code.co_names or 'vars' in code.co_names:
+        return True
+    for instruction in get_instructions(code):
+        if instruction.opname.startswith(('LOAD_FAST', 'DELETE_FAST', 'STORE_FAST_LOAD_FAST')):
+            argval = instruction.argval
+            if argval == name or (isinstance(argval, tuple) and name in argval):
+                return True
+    return False
+
+
+_request_reading_methods = {}
 
 
 class BaseTransform(object):
@@ -5,7 +44,82 @@ class BaseTransform(object):
     All transforms should extend 'BaseTransform', overriding the two
     methods '.forwards()' and '.backwards()' to provide forwards and backwards
     conversions between representation versions.
+
+    Transforms that can convert a whole list of representations more efficiently than one at a
+    time (for example by prefetching related data in bulk) may also override '.forwards_many()'
+    and '.backwards_many()'.
+
+    Transforms are instantiated once per transform base and shared by every chain and request, so they
+    must not keep per-request state on 'self'; use '.get_request_state()' instead. Anything else kept on
+    'self' or on the class, such as a cache, must be safe to use from several threads. 'BaseTransform'
+    declares empty '__slots__', so subclasses that also declare '__slots__ = ()' have no instance
+    dictionary at all.
+
+    A transform that only reads and changes a few top-level fields may list them in 'fields'. It then
+    promises to leave any representation without one of those fields unchanged, so that chains can
+    skip it for partial representations, such as sparse fieldsets or PATCH bodies.
+
+    'cost' is a relative hint used to choose between a run of transforms and a jump transform covering
+    the same versions; the path with the lowest total cost is taken.
+
+    Set 'pure' on transforms whose '.forwards()' result depends only on the data it is given, so that
+    parsers with a 'PromotionCache' may reuse it for identical request bodies; see '.is_cacheable()'.
+    Transforms whose '.backwards()' never reads 'request' may have their results kept in a serializer's
+    'representation_cache'; see '.reads_request()'.
     """
+    __slots__ = ()
+    is_noop = False
+    fields = None
+    cost = 1
+    pure = False
+
+    def is_cacheable(self):
+        """
+        :returns: True when the transform is marked 'pure' and its '.forwards()' (and '.forwards_many()', when
+        overridden) never read 'request'. Transforms that look at the request, even through
+        '.get_request_state()', are never cached, whatever 'pure' says.
+        """
+        return bool(self.pure) and not self.reads_request('forwards')
+
+    def reads_request(self, direction):
+        """
+        :returns: False when the transform's method for the given direction, 'forwards' or 'backwards' (and its
+        '_many' variant, when overridden), never reads 'request', and True when it does or when that cannot be told.
+        """
+        cls = self.__class__
+        key = (cls, direction)
+        reads = _request_reading_methods.get(key)
+        if reads is None:
+            names = [direction]
+            if _get_function(cls, direction + '_many') is not _get_function(BaseTransform, direction + '_many'):
+                names.append(direction + '_many')
+            reads = _request_reading_methods[key] = any(reads_argument(getattr(cls, name), 2) for name in names)
+        return reads
+
+    def get_request_state(self, request):
+        """
+        :returns: A dictionary for this transform to keep per-request state in, such as data prefetched by
+        '.backwards_many()' for later calls. It is stored on the request and shared by all instances of the
+        transform's class; without a request, a new dictionary is returned on every call.
+        """
+        try:
+            states = request._transform_states
+        except AttributeError:
+            states = {}
+            try:
+                request._transform_states = states
+            except AttributeError:
+                return states
+        return states.setdefault(self.__class__, {})
+
+    def get_field_scope(self, direction):
+        """
+        :returns: The 'FieldScope' of the transform in the given direction, 'forwards' or 'backwards'.
+        """
+        if self.fields is None:
+            return UNKNOWN_SCOPE
+        return FieldScope(frozenset(self.fields), True)
+
     def forwards(self, data, request):
         """
         Converts from this transform's base version to the targeted version of the representation.
@@ -21,3 +135,437 @@ class BaseTransform(object):
         :returns: Dictionary with the correct structure for the base version of the representation.
         """
         raise NotImplementedError(".backwards() must be overridden.")
+
+    def forwards_many(self, items, request):
+        """
+        Converts a list of representations from this transform's base version to the targeted version.
+
+        :returns: A list of dictionaries, in the same order, with the structure of the targeted version.
+        """
+        return [self.forwards(data=data, request=request) for data in items]
+
+    def backwards_many(self, items, request, instances):
+        """
+        Converts a list of representations from the targeted version back to this transform's base version.
+        'instances' holds the serialized instance for each representation, in the same order.
+
+        :returns: A list of dictionaries, in the same order, with the structure of the base version.
+        """
+        return [self.backwards(data, request, instance) for data, instance in zip(items, instances)]
+
+
+class DeclarativeTransform(BaseTransform):
+    """
+    A transform described by a list of field operations instead of hand-written methods.
+
+    'operations' lists the changes needed to promote a representation from the base version, for example
+    '[Rename('test_field_one', 'new_test_field'), Remove('legacy_field', default='')]'. Demotion runs the
+    inverse of each operation in reverse order. The operations are compiled once per class into an
+    'OperationPlan' that renames, drops and adds fields in a single pass over the dictionary.
+
+    With 'generate_code' set, field operations are instead compiled into generated Python functions
+    that change the dictionary in place, one statement per operation.
+
+    Transforms whose operations are all 'Rename's report them through '.get_renames()', so that chains
+    made only of such transforms can rename every field in one step; see 'CompositeTransform'.
+    """
+    operations = ()
+    generate_code = False
+    pure = True
+
+    def __init__(self, operations=None, generate_code=None):
+        if generate_code is not None:
+            self.generate_code = generate_code
+        if operations is not None:
+            self.operations = tuple(operations)
+            self._plans = self.compile(self.operations, self.generate_code)
+
+    @classmethod
+    def compile(cls, operations, generate_code=None):
+        """
+        :returns: A tuple of the forwards and backwards 'OperationPlan' for the given operations.
+        """
+        if generate_code is None:
+            generate_code = cls.generate_code
+        return (
+            OperationPlan(operations, generate_code),
+            OperationPlan([operation.inverse() for operation in reversed(operations)], generate_code),
+        )
+
+    @property
+    def is_noop(self):
+        forwards_plan, backwards_plan = self.get_plans()
+        return forwards_plan.is_noop and backwards_plan.is_noop
+
+    def get_plans(self):
+        plans = self.__dict__.get('_plans')
+        if plans is None:
+            cls = self.__class__
+            plans = cls.__dict__.get('_class_plans')
+            if plans is None:
+                plans = self.compile(tuple(self.operations))
+                cls._class_plans = plans
+        return plans
+
+    def get_field_scope(self, direction):
+        """
+        Unless 'fields' is set, the scope is derived from the operations run in the given direction.
+        """
+        if self.fields is not None:
+            return super(DeclarativeTransform, self).get_field_scope(direction)
+        operations = self.operations
+        if direction == 'backwards':
+            operations = [operation.inverse() for operation in reversed(operations)]
+        return FieldScope.combine(operation.get_field_scope() for operation in operations)
+
+    def get_renames(self, direction):
+        """
+        :returns: A tuple of the (old, new) field names renamed in the given direction, in the order they are
+        renamed, or None unless the transform only renames fields.
+        """
+        cls = self.__class__
+        if any(_get_function(cls, name) is not _get_function(DeclarativeTransform, name) for name in ('forwards', 'backwards')):
+            return None
+        if not all(isinstance(operation, Rename) for operation in self.operations):
+            return None
+        renames = tuple((operation.old, operation.new) for operation in self.operations)
+        if direction == 'backwards':
+            renames = tuple((new, old) for old, new in reversed(renames))
+        return renames
+
+    def forwards(self, data, request):
+        return self.get_plans()[0](data)
+
+    def backwards(self, data, request, instance):
+        return self.get_plans()[1](data)
+
+
+def get_transform_label(transform):
+    """
+    Names a transform instance for instrumentation hooks. Fused declarative transforms are named after
+    every transform class they run.
+
+    :returns: A tuple of the dotted name and the version of the transform.
+    """
+    transform_classes = getattr(transform, 'transform_classes', None)
+    if not isinstance(transform_classes, tuple):
+        transform_classes = (transform.__class__,)
+    versions = [
+        int(match.group(0))
+        for match in (TRANSFORM_VERSION_PATTERN.search(cls.__name__) for cls in transform_classes)
+        if match
+    ]
+    name = '%s.%s' % (transform_classes[0].__module__, '+'.join(cls.__name__ for cls in transform_classes))
+    return name, max(versions) if versions else None
+
+
+def get_field_scope(transform, direction):
+    """
+    :returns: The 'FieldScope' of any transform instance, falling back to an unknown scope.
+    """
+    get_scope = getattr(transform, 'get_field_scope', None)
+    scope = get_scope(direction) if get_scope is not None else None
+    return scope if isinstance(scope, FieldScope) else UNKNOWN_SCOPE
+
+
+def is_cacheable(transform):
+    """
+    :returns: True when the '.forwards()' result of any transform instance may be reused; see 'BaseTransform.is_cacheable()'.
+    """
+    check = getattr(transform, 'is_cacheable', None)
+    return check is not None and check() is True
+
+
+def reads_request(transform, direction):
+    """
+    :returns: True unless any transform instance is known to never read 'request' in the given direction; see
+    'BaseTransform.reads_request()'.
+    """
+    check = getattr(transform, 'reads_request', None)
+    return check is None or check(direction) is not False
+
+
+def get_chain_renames(steps, direction):
+    """
+    :returns: A tuple of every (old, new) field names renamed by running 'steps' in the given direction, or
+    None when there are no steps or one of them does more than rename fields.
+    """
+    if not steps:
+        return None
+    renames = []
+    for step in steps:
+        get_renames = getattr(step, 'get_renames', None)
+        step_renames = get_renames(direction) if get_renames is not None else None
+        if not isinstance(step_renames, tuple):
+            return None
+        renames.extend(step_renames)
+    return tuple(renames)
+
+
+def get_item_keys(items):
+    """
+    :returns: A frozenset of the top-level fields of every representation in 'items', or None if one is not a dictionary.
+    """
+    keys = set()
+    for data in items:
+        if not hasattr(data, 'keys'):
+            return None
+        keys.update(data.keys())
+    return frozenset(keys)
+
+
+class CompositeTransform(BaseTransform):
+    """
+    A chain of transforms run as a single transform.
+
+    'steps' holds the transform instances in the order they are run, after fusing declarative transforms
+    and skipping transforms that would not change the representation. The bound methods of every step
+    are looked up once, when the composite is built.
+
+    When some steps declare their 'FieldScope', the steps that cannot change a representation with a
+    given set of top-level fields are pruned. The pruned chain is memoized for each set of fields seen,
+    up to 'max_plans' of them.
+
+    When every step only renames fields, the chain is run as a single rename instead: the new name of each
+    field is looked up in a table built once per direction and set of top-level fields, and each dictionary
+    is rebuilt once, as an instance of its own class, however many steps there are. Mappings that are not
+    dictionaries, such as copy-on-write views, still go through the steps.
+
+    While any hook is connected to 'instrumentation', every step is timed and reported as a 'TransformTiming'.
+    """
+    max_plans = 256
+
+    def __init__(self, steps):
+        self.steps = tuple(step for step in steps if getattr(step, 'is_noop', False) is not True)
+        self.labels = tuple(get_transform_label(step) for step in self.steps)
+        self._forwards = tuple(step.forwards for step in self.steps)
+        self._backwards = tuple(step.backwards for step in self.steps)
+        self._forwards_many = tuple(step.forwards_many for step in self.steps)
+        self._backwards_many = tuple(step.backwards_many for step in self.steps)
+        self.scopes = {
+            'forwards': tuple(get_field_scope(step, 'forwards') for step in self.steps),
+            'backwards': tuple(get_field_scope(step, 'backwards') for step in self.steps),
+        }
+        self._prune_forwards = any(scope.conditional for scope in self.scopes['forwards'])
+        self._prune_backwards = any(scope.conditional for scope in self.scopes['backwards'])
+        self.renames = {
+            'forwards': get_chain_renames(self.steps, 'forwards'),
+            'backwards': get_chain_renames(self.steps, 'backwards'),
+        }
+        self._plans = {}
+        self._output_plans = {}
+        self._rename_tables = {}
+        self._cacheable = None
+        self._reads_request = {}
+
+    @property
+    def is_noop(self):
+        return not self.steps
+
+    def is_cacheable(self):
+        """
+        :returns: True when every step is cacheable.
+        """
+        if self._cacheable is None:
+            self._cacheable = all(is_cacheable(step) for step in self.steps)
+        return self._cacheable
+
+    def reads_request(self, direction):
+        """
+        :returns: True when any step reads 'request' in the given direction.
+        """
+        reads = self._reads_request.get(direction)
+        if reads is None:
+            reads = self._reads_request[direction] = any(reads_request(step, direction) for step in self.steps)
+        return reads
+
+    def get_rename_table(self, direction, keys):
+        """
+        :returns: A dictionary mapping each of the top-level fields 'keys' to its name once the chain has run in
+        the given direction. Fields that a rename replaces are left out. Only rename-only chains have tables.
+        """
+        key = (direction, keys)
+        table = self._rename_tables.get(key)
+        if table is None:
+            # maps the current name of every field to the name it had in 'keys'
+            names = dict((name, name) for name in keys)
+            for old, new in self.renames[direction]:
+                if old in names and old != new:
+                    names[new] = names.pop(old)
+            table = dict((original, name) for name, original in names.items())
+            if len(self._rename_tables) < self.max_plans:
+                self._rename_tables[key] = table
+        return table
+
+    def rename(self, direction, data):
+        """
+        Runs a rename-only chain over a dictionary in a single pass.
+        """
+        table = self.get_rename_table(direction, frozenset(data))
+        if data.__class__ is dict:
+            return {table[key]: value for key, value in data.items() if key in table}
+        result = data.__class__()
+        for key, value in data.items():
+            if key in table:
+                result[table[key]] = value
+        return result
+
+    def select_steps(self, direction, keys):
+        """
+        :returns: The indexes of the steps that may change a representation with the given top-level fields.
+        """
+        known = set(keys)
+        selected = []
+        for index, scope in enumerate(self.scopes[direction]):
+            if known is not None and scope.conditional and scope.fields is not None and scope.fields.isdisjoint(known):
+                continue
+            selected.append(index)
+            if known is not None:
+                known = None if scope.fields is None else known | scope.fields
+        return tuple(selected)
+
+    def select_output_steps(self, direction, keys):
+        """
+        Finds the steps that the given top-level fields of the output depend on, by walking the chain
+        backwards from its last step.
+
+        :returns: A tuple of the indexes of those steps and the frozenset of the input fields they depend on,
+        or None when a step with an unknown 'FieldScope' makes every step and field a dependency.
+        """
+        key = (direction, frozenset(keys))
+        plan = self._output_plans.get(key)
+        if plan is None and key not in self._output_plans:
+            needed = set(keys)
+            selected = []
+            for index in reversed(range(len(self.steps))):
+                fields = self.scopes[direction][index].fields
+                if fields is None:
+                    plan = None
+                    break
+                if not fields.isdisjoint(needed):
+                    selected.append(index)
+                    needed |= fields
+            else:
+                plan = (tuple(reversed(selected)), frozenset(needed))
+            if len(self._output_plans) < self.max_plans:
+                self._output_plans[key] = plan
+        return plan
+
+    def run_steps(self, direction, indexes, data, *args):
+        """
+        Runs only the steps at 'indexes', such as those returned by '.select_output_steps()', in the given direction.
+        """
+        methods = getattr(self, '_' + direction)
+        for index in indexes:
+            data = methods[index](data, *args)
+        return data
+
+    def _prune(self, method_name, direction, keys):
+        key = (method_name, keys)
+        plan = self._plans.get(key)
+        if plan is None:
+            indexes = self.select_steps(direction, keys)
+            methods = getattr(self, '_' + method_name)
+            plan = (tuple(methods[index] for index in indexes), tuple(self.labels[index] for index in indexes))
+            if len(self._plans) < self.max_plans:
+                self._plans[key] = plan
+        return plan
+
+    def forwards(self, data, request):
+        if self.renames['forwards'] is not None and isinstance(data, dict) and not instrumentation.hooks:
+            return self.rename('forwards', data)
+        methods, labels = self._forwards, self.labels
+        if self._prune_forwards and hasattr(data, 'keys'):
+            methods, labels = self._prune('forwards', 'forwards', frozenset(data.keys()))
+        if instrumentation.hooks:
+            return self._run_timed('forwards', methods, labels, data, (request,), request, 1)
+        for forwards in methods:
+            data = forwards(data, request)
+        return data
+
+    def backwards(self, data, request, instance):
+        if self.renames['backwards'] is not None and isinstance(data, dict) and not instrumentation.hooks:
+            return self.rename('backwards', data)
+        methods, labels = self._backwards, self.labels
+        if self._prune_backwards and hasattr(data, 'keys'):
+            methods, labels = self._prune('backwards', 'backwards', frozenset(data.keys()))
+        if instrumentation.hooks:
+            return self._run_timed('backwards', methods, labels, data, (request, instance), request, 1)
+        for backwards in methods:
+            data = backwards(data, request, instance)
+        return data
+
+    def forwards_many(self, items, request):
+        if self.renames['forwards'] is not None and not instrumentation.hooks and all(isinstance(data, dict) for data in items):
+            return [self.rename('forwards', data) for data in items]
+        methods, labels = self._forwards_many, self.labels
+        keys = get_item_keys(items) if self._prune_forwards else None
+        if keys is not None:
+            methods, labels = self._prune('forwards_many', 'forwards', keys)
+        if instrumentation.hooks:
+            return self._run_timed('forwards_many', methods, labels, items, (request,), request, len(items))
+        for forwards_many in methods:
+            items = forwards_many(items, request)
+        return items
+
+    def backwards_many(self, items, request, instances):
+        if self.renames['backwards'] is not None and not instrumentation.hooks and all(isinstance(data, dict) for data in items):
+            return [self.rename('backwards', data) for data in items]
+        methods, labels = self._backwards_many, self.labels
+        keys = get_item_keys(items) if self._prune_backwards else None
+        if keys is not None:
+            methods, labels = self._prune('backwards_many', 'backwards', keys)
+        if instrumentation.hooks:
+            return self._run_timed('backwards_many', methods, labels, items, (request, instances), request, len(items))
+        for backwards_many in methods:
+            items = backwards_many(items, request, instances)
+        return items
+
+    def _run_timed(self, direction, methods, labels, data, args, request, items):
+        request_version = getattr(request, 'version', None)
+        for (name, version), method in zip(labels, methods):
+            start = default_timer()
+            data = method(data, *args)
+            elapsed = default_timer() - start
+            instrumentation.fire(TransformTiming(name, direction, version, request_version, items, elapsed))
+        return data
+
+    def __repr__(self):
+        return 'CompositeTransform(%r)' % (list(self.steps),)
+
+
+class CopyOnWriteTransform(BaseTransform):
+    """
+    Runs another transform over copy-on-write views of the representations it is given.
+
+    Transforms may then change the data they receive freely, without copying it first: only the
+    parts they change are copied, and the original representation is left untouched.
+    """
+    __slots__ = ('transform',)
+
+    def __init__(self, transform):
+        self.transform = transform
+
+    @property
+    def is_noop(self):
+        return getattr(self.transform, 'is_noop', False)
+
+    def is_cacheable(self):
+        return is_cacheable(self.transform)
+
+    def reads_request(self, direction):
+        return reads_request(self.transform, direction)
+
+    def forwards(self, data, request):
+        return thaw(self.transform.forwards(wrap_copy_on_write(data), request))
+
+    def backwards(self, data, request, instance):
+        return thaw(self.transform.backwards(wrap_copy_on_write(data), request, instance))
+
+    def forwards_many(self, items, request):
+        items = self.transform.forwards_many([wrap_copy_on_write(data) for data in items], request)
+        return [thaw(data) for data in items]
+
+    def backwards_many(self, items, request, instances):
+        items = self.transform.backwards_many([wrap_copy_on_write(data) for data in items], request, instances)
+        return [thaw(data) for data in items]
@@ -1,7 +1,224 @@
+from bisect import bisect_right
+import heapq
 from importlib import import_module
 import inspect
+import itertools
 import re
-from rest_framework_transforms.transforms import BaseTransform
+import threading
+from rest_framework_transforms.transforms import (
+    _get_function, BaseTransform, CompositeTransform, DeclarativeTransform, TRANSFORM_VERSION_PATTERN,
+)
+from rest_framework_transforms.versions import resolve_version
+
+
+JUMP_TRANSFORM_PATTERN = re.compile(r'(\d+)To(\d+)$')
+
+
+def scan_transforms(transform_base):
+    """
+    Imports the module named by 'transform_base' and collects every transform class matching its base name.
+
+    Classes named '<base><version>' convert between 'version' and the version before it. Classes named
+    '<base><from version>To<to version>' are jump transforms, converting between two distant versions in
+    a single step.
+
+    :returns: A tuple of a list of (version, transform class) tuples in ascending version order, and a
+    list of (from version, to version, transform class) tuples for the jump transforms.
+    """
+    module, base = transform_base.rsplit('.', 1)
+    mod = import_module(module)
+
+    transform_classes_dict = {}
+    jump_transform_classes = []
+
+    for name, transform_class in inspect.getmembers(mod):
+        if name.startswith(base) and issubclass(transform_class, BaseTransform):
+            jump_match = JUMP_TRANSFORM_PATTERN.search(name)
+            if jump_match:
+                jump_transform_classes.append((int(jump_match.group(1)), int(jump_match.group(2)), transform_class))
+                continue
+            transform_index_match = TRANSFORM_VERSION_PATTERN.search(name)
+            if transform_index_match:
+                transform_classes_dict[int(transform_index_match.group(0))] = transform_class
+
+    versioned_transform_classes = [
+        (key, transform_classes_dict[key])
+        for key
+        in sorted(transform_classes_dict)
+    ]
+    return versioned_transform_classes, sorted(jump_transform_classes, key=lambda jump: jump[:2])
+
+
+def scan_transform_classes(transform_base):
+    """
+    :returns: A list of (version, transform class) tuples in ascending version order; see 'scan_transforms()'.
+    """
+    return scan_transforms(transform_base)[0]
+
+
+class TransformIndex(object):
+    """
+    The precomputed transform chains for a single 'transform_base'.
+
+    Without jump transforms, the chain above any base version is a single slice of the transform classes
+    in ascending or descending order. With jump transforms, the planner searches the version graph for the
+    cheapest path to the latest version, using the 'cost' hint of every transform class; a jump is only
+    taken when it is strictly cheaper than the transforms it replaces. Both the planned path and the
+    'CompositeTransform' built for each starting version and direction are memoized. Every transform
+    class is instantiated once and its instance is shared by all the chains it appears in.
+
+    Base versions are resolved with 'resolve_version()', so they may be given as DRF versioning schemes
+    give them, e.g. 'v3'. The starting position of up to 'max_starts' resolved versions is memoized too.
+
+    'latest_version' is the version of the newest transform, or None when there are no transforms.
+    """
+    max_starts = 256
+
+    def __init__(self, versioned_transform_classes, jump_transform_classes=()):
+        self.versions = tuple(version for version, _ in versioned_transform_classes)
+        self.forwards = tuple(transform_class for _, transform_class in versioned_transform_classes)
+        self.backwards = tuple(reversed(self.forwards))
+        self.latest_version = self.versions[-1] if self.versions else None
+        # Graph nodes are positions in 'versions': node i is reached once every transform below versions[i] has run.
+        self.jumps = tuple(
+            (bisect_right(self.versions, from_version), bisect_right(self.versions, to_version), transform_class)
+            for from_version, to_version, transform_class in jump_transform_classes
+            if from_version < to_version
+        )
+        self._instances = {}
+        self._starts = {}
+        self._paths = {}
+        self._chains = {}
+
+    def get_start(self, base_version):
+        """
+        :returns: The graph node of 'base_version', i.e. the number of transform versions at or below it.
+        """
+        version = resolve_version(base_version)
+        start = self._starts.get(version)
+        if start is None:
+            start = bisect_right(self.versions, version)
+            if len(self._starts) < self.max_starts:
+                self._starts[version] = start
+        return start
+
+    def is_latest(self, base_version):
+        """
+        :returns: True when no transform applies to 'base_version', i.e. it is at or above the latest version.
+        """
+        return self.latest_version is None or resolve_version(base_version) >= self.latest_version
+
+    def _slice(self, start, reverse):
+        if reverse:
+            return self.backwards[:len(self.versions) - start]
+        return self.forwards[start:]
+
+    def get_path(self, start):
+        """
+        :returns: A tuple of the transform classes, in ascending version order, on the cheapest path from
+        the node 'start' to the latest version.
+        """
+        if not self.jumps:
+            return self.forwards[start:]
+        path = self._paths.get(start)
+        if path is None:
+            path = self._paths[start] = self._find_path(start)
+        return path
+
+    def _find_path(self, start):
+        end = len(self.versions)
+        edges = dict((node, [(node + 1, self.forwards[node], 0)]) for node in range(end))
+        for from_node, to_node, transform_class in self.jumps:
+            if start <= from_node < to_node:
+                edges[from_node].append((to_node, transform_class, 1))
+
+        # Paths are ranked by total cost, then by the number of jumps taken.
+        tie_breaker = itertools.count()
+        best = {start: (0, 0)}
+        queue = [(0, 0, next(tie_breaker), start, ())]
+        while queue:
+            cost, jumps, _, node, path = heapq.heappop(queue)
+            if node == end:
+                return path
+            if (cost, jumps) > best[node]:
+                continue
+            for next_node, transform_class, is_jump in edges[node]:
+                rank = (cost + transform_class.cost, jumps + is_jump)
+                if next_node not in best or rank < best[next_node]:
+                    best[next_node] = rank
+                    heapq.heappush(queue, rank + (next(tie_breaker), next_node, path + (transform_class,)))
+        return ()
+
+    def _get_classes(self, start, reverse):
+        if not self.jumps:
+            return self._slice(start, reverse)
+        path = self.get_path(start)
+        return tuple(reversed(path)) if reverse else path
+
+    def get_transform_classes(self, base_version=1, reverse=False):
+        """
+        :returns: A list of the transform classes that convert between 'base_version' and the latest version,
+        taking jump transforms where they are cheaper.
+        """
+        return list(self._get_classes(self.get_start(base_version), reverse))
+
+    def get_chain(self, base_version=1, reverse=False, chain_class=CompositeTransform):
+        """
+        :returns: The 'CompositeTransform' (or 'chain_class') that converts between 'base_version' and the latest version.
+        """
+        return self._get_chain(self.get_start(base_version), reverse, chain_class)
+
+    def _get_chain(self, start, reverse, chain_class=CompositeTransform):
+        key = (start, reverse, chain_class)
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = chain_class(build_transform_chain(self._get_classes(start, reverse), reverse=reverse, instances=self._instances))
+            self._chains[key] = chain
+        return chain
+
+    def warm_up(self):
+        """
+        Builds the chains in both directions for every supported version, so that no request has to.
+        """
+        for start in range(len(self.versions) + 1):
+            self._get_chain(start, reverse=False)
+            self._get_chain(start, reverse=True)
+
+
+class TransformRegistry(object):
+    """
+    A process-wide registry of transform classes.
+
+    Each 'transform_base' module is scanned once, on first use, and the resulting 'TransformIndex'
+    is reused for every later lookup. Call '.invalidate()' when transform modules change at runtime,
+    for instance between tests or after reloading a module.
+    """
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, transform_base):
+        index = self._indexes.get(transform_base)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(transform_base)
+                if index is None:
+                    index = TransformIndex(*scan_transforms(transform_base))
+                    self._indexes[transform_base] = index
+        return index
+
+    def invalidate(self, transform_base=None):
+        """
+        Discards the cached index for 'transform_base', or for every transform base when none is given.
+        """
+        with self._lock:
+            if transform_base is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(transform_base, None)
+
+
+transform_registry = TransformRegistry()
 
 
 def get_transform_classes(transform_base=None, base_version=1, reverse=False):
@@ -17,24 +234,99 @@ def get_transform_classes(transform_base=None, base_version=1, reverse=False):
     Running the '.backwards()' method of the returned transform classes (in descending order) over
     a dictionary of resource representation data will demote the dictionary from the highest supported version to the
     given 'base_version'.
+
+    When the module also holds jump transforms, the returned classes follow the cheapest path between
+    the two versions, which may replace a run of transforms with a single jump; see 'TransformIndex'.
+
+    Transform modules are only scanned on the first call for each 'transform_base'; see 'TransformRegistry'.
     """
-    module, base = transform_base.rsplit('.', 1)
-    mod = import_module(module)
+    return transform_registry.get_index(transform_base).get_transform_classes(base_version, reverse=reverse)
 
-    transform_classes_dict = {}
 
-    for name, transform_class in inspect.getmembers(mod):
-        if name.startswith(base) and issubclass(transform_class, BaseTransform):
-            transform_index_match = re.search('\d+$', name)
-            if transform_index_match:
-                int_transform_index = int(transform_index_match.group(0))
-                if base_version < int_transform_index:
-                    transform_classes_dict[int_transform_index] = transform_class
+def get_transform_chain(transform_base=None, base_version=1, reverse=False, chain_class=CompositeTransform):
+    """
+    Returns a single 'CompositeTransform' for the transforms that 'get_transform_classes()' would return.
 
-    ordered_transform_classes_list = [
-        transform_classes_dict[key]
-        for key
-        in sorted(transform_classes_dict, reverse=reverse)
-    ]
+    Call '.forwards()' on the composite to promote a representation from 'base_version', or '.backwards()'
+    on the reversed composite to demote it. Composites are built once per transform base, version and
+    direction; their '.steps' show the transforms that will actually run.
+    """
+    return transform_registry.get_index(transform_base).get_chain(base_version, reverse=reverse, chain_class=chain_class)
+
+
+def is_latest_version(transform_base=None, version=1):
+    """
+    :returns: True when 'version' is at or above the latest version of 'transform_base', so that promoting
+    or demoting a representation to it would run no transforms.
+    """
+    return transform_registry.get_index(transform_base).is_latest(version)
+
+
+def is_fusable(transform_class):
+    """
+    :returns: True for 'DeclarativeTransform' subclasses that rely only on their 'operations'.
+    """
+    if not (isinstance(transform_class, type) and issubclass(transform_class, DeclarativeTransform)):
+        return False
+    return all(
+        _get_function(transform_class, name) is _get_function(DeclarativeTransform, name)
+        for name in ('forwards', 'backwards')
+    )
+
+
+def fuse_declarative_transforms(transform_classes):
+    """
+    Combines consecutive 'DeclarativeTransform' classes, given in ascending version order, into a single
+    transform whose operations are compiled into one plan.
+    """
+    transform_classes = tuple(transform_classes)
+    if len(transform_classes) == 1:
+        return transform_classes[0]()
+    transform = DeclarativeTransform(
+        operations=[
+            operation
+            for transform_class in transform_classes
+            for operation in transform_class.operations
+        ],
+        generate_code=all(transform_class.generate_code for transform_class in transform_classes),
+    )
+    transform.transform_classes = transform_classes
+    return transform
+
+
+def build_transform_chain(transform_classes, reverse=False, instances=None):
+    """
+    Instantiates a list of transform classes as returned by 'get_transform_classes()'.
+
+    Each run of consecutive declarative transforms is replaced by a single fused transform, so that
+    promoting or demoting across many declarative versions takes one pass over the representation.
+
+    :param instances: A dictionary of transform instances to reuse, keyed by transform class (or by the
+    tuple of classes of a fused transform). New instances are added to it.
+    :returns: A list of transform instances in the same order as 'transform_classes'.
+    """
+    def get_instance(key, factory):
+        if instances is None:
+            return factory()
+        transform = instances.get(key)
+        if transform is None:
+            transform = instances.setdefault(key, factory())
+        return transform
+
+    def fuse(run):
+        run = tuple(reversed(run) if reverse else run)
+        return get_instance(run[0] if len(run) == 1 else run, lambda: fuse_declarative_transforms(run))
 
-    return ordered_transform_classes_list
+    chain = []
+    run = []
+    for transform_class in transform_classes:
+        if is_fusable(transform_class):
+            run.append(transform_class)
+            continue
+        if run:
+            chain.append(fuse(run))
+            run = []
+        chain.append(get_instance(transform_class, transform_class))
+    if run:
+        chain.append(fuse(run))
+    return chain
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Resolution of the versions given by DRF versioning schemes, such as 3, '3', 'v3', '2024-01-01' or
+'1.2.0', to the integer versions that transform classes are numbered with.
+"""
+from bisect import bisect_right
+import numbers
+import re
+import sys
+import threading
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework_transforms.exceptions import InvalidVersionException
+from rest_framework_transforms.settings import get_setting
+
+
+VERSION_PATTERN = re.compile(r'^[vV]?(\d+(?:[.\-_]\d+)*)$')
+VERSION_SEPARATOR_PATTERN = re.compile(r'[.\-_]')
+# what unversioned requests resolve to: above every transform version
+LATEST_VERSION = sys.maxsize
+
+
+def parse_version(version):
+    """
+    :returns: A tuple of the integer components of 'version', e.g. (3,) for 'v3', (2024, 1, 1) for
+    '2024-01-01' or (1, 2, 0) for '1.2.0', which sorts like the versions themselves.
+    """
+    if isinstance(version, numbers.Integral) and not isinstance(version, bool):
+        return (version,)
+    try:
+        match = VERSION_PATTERN.match(version.strip())
+    except (AttributeError, TypeError):
+        match = None
+    if match is None:
+        raise InvalidVersionException("Invalid version '%s' in request." % (version,))
+    return tuple(int(part) for part in VERSION_SEPARATOR_PATTERN.split(match.group(1)))
+
+
+def get_version_number(key):
+    """
+    :returns: The transform version for a parsed version that is not listed in the 'VERSIONS' setting:
+    the number itself for single-number versions, and YYYYMMDD for dates.
+    """
+    if len(key) == 1:
+        return key[0]
+    if len(key) == 3 and key[0] >= 1000 and 1 <= key[1] <= 12 and 1 <= key[2] <= 31:
+        return key[0] * 10000 + key[1] * 100 + key[2]
+    raise InvalidVersionException("Version '%s' requires the 'VERSIONS' setting." % '.'.join(str(part) for part in key))
+
+
+def is_date_version(version):
+    """
+    :returns: True when the transform version 'version' is a date in the YYYYMMDD form of 'get_version_number()'.
+    """
+    year, month_day = divmod(version, 10000)
+    return year >= 1000 and 1 <= month_day // 100 <= 12 and 1 <= month_day % 100 <= 31
+
+
+class VersionIndex(object):
+    """
+    The sorted index of the API versions listed in the 'VERSIONS' setting.
+
+    Transform versions are the 1-based positions of API versions in the index, so that with
+    'VERSIONS' set to ('1.0', '1.1', '2.0') the transform classes numbered 0002 and 0003 convert
+    to 1.1 and 2.0. A version between two listed versions resolves to the one below it, and a
+    version below the first one to 0.
+    """
+    def __init__(self, versions):
+        self.versions = tuple(versions)
+        try:
+            keys = [parse_version(version) for version in self.versions]
+        except InvalidVersionException as exc:
+            raise ImproperlyConfigured("The 'VERSIONS' setting holds an invalid version: %s" % exc.detail)
+        if len(set(keys)) != len(keys):
+            raise ImproperlyConfigured("The 'VERSIONS' setting holds the same version more than once.")
+        self.keys = tuple(sorted(keys))
+
+    def resolve(self, version):
+        """
+        :returns: The transform version for 'version'.
+        """
+        return bisect_right(self.keys, parse_version(version))
+
+
+_version_indexes = {}
+_version_indexes_lock = threading.Lock()
+
+
+def get_version_index():
+    """
+    :returns: The 'VersionIndex' for the 'VERSIONS' setting, or None when it is not set.
+    """
+    versions = get_setting('VERSIONS')
+    if versions is None:
+        return None
+    versions = tuple(versions)
+    index = _version_indexes.get(versions)
+    if index is None:
+        with _version_indexes_lock:
+            index = _version_indexes.get(versions)
+            if index is None:
+                index = _version_indexes[versions] = VersionIndex(versions)
+    return index
+
+
+def resolve_version(version):
+    """
+    :returns: The integer transform version for a requested 'version'.
+
+    Integers are transform versions already and are returned as they are. Strings are looked up in
+    the 'VERSIONS' setting when it is set, and are otherwise converted with 'get_version_number()'.
+    None, which DRF sets on requests to views without a versioning scheme, resolves to 'LATEST_VERSION'.
+
+    :raises InvalidVersionException: For versions that cannot be resolved.
+    """
+    if isinstance(version, numbers.Integral) and not isinstance(version, bool):
+        return version
+    if version is None:
+        return LATEST_VERSION
+    index = get_version_index()
+    if index is not None:
+        return index.resolve(version)
+    return get_version_number(parse_version(version))
+
+
+def get_request_version(request):
+    """
+    :returns: The resolved transform version of 'request.version'. The result is cached on the
+    request, so parsers and serializers of the same request only resolve it once.
+    """
+    version = request.version
+    cached = getattr(request, '_transform_version', None)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    resolved = resolve_version(version)
+    try:
+        request._transform_version = (version, resolved)
+    except AttributeError:
+        pass
+    return resolved
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from django.utils.module_loading import autodiscover_modules
+from rest_framework_transforms.parsers import BaseVersioningParser
+from rest_framework_transforms.serializers import BaseVersioningSerializer
+from rest_framework_transforms.settings import get_setting
+from rest_framework_transforms.utils import transform_registry
+
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for descendant in _iter_subclasses(subclass):
+            yield descendant
+
+
+def autodiscover():
+    """
+    Imports the 'WARMUP_MODULES' submodules of every installed app, so that the versioning parsers and
+    serializers defined in them are found by 'get_versioning_classes()'.
+    """
+    autodiscover_modules(*get_setting('WARMUP_MODULES'))
+
+
+def get_versioning_classes():
+    """
+    :returns: A dictionary of every imported versioning parser and serializer class with a 'transform_base',
+    keyed by that 'transform_base'.
+    """
+    classes = {}
+    for base_class in (BaseVersioningParser, BaseVersioningSerializer):
+        for versioning_class in _iter_subclasses(base_class):
+            transform_base = getattr(versioning_class, 'transform_base', None)
+            if transform_base and versioning_class not in classes.get(transform_base, ()):
+                classes.setdefault(transform_base, []).append(versioning_class)
+    return classes
+
+
+def warm_up(transform_bases=None):
+    """
+    Scans the given transform bases, or those of every imported versioning parser and serializer, and
+    builds their transform chains for every supported version.
+
+    Transform bases that cannot be loaded are logged and skipped; the system checks report them in detail.
+
+    :returns: The list of transform bases that were warmed up.
+    """
+    if transform_bases is None:
+        transform_bases = sorted(get_versioning_classes())
+
+    warmed_up = []
+    for transform_base in transform_bases:
+        try:
+            transform_registry.get_index(transform_base).warm_up()
+        except Exception:
+            transform_registry.invalidate(transform_base)
+            logger.warning("Could not warm up the transforms for '%s'.", transform_base, exc_info=True)
+        else:
+            warmed_up.append(transform_base)
+    return warmed_up
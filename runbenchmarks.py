@@ -0,0 +1,156 @@
+#! /usr/bin/env python
+"""
+Runs the benchmark matrix in 'benchmarks/cases.py' without pytest-benchmark.
+
+    ./runbenchmarks.py [--quick] [-k NAME] [--output results.json] [--compare baseline.json]
+
+Results are written as JSON in the same layout as 'py.test --benchmark-json', so results from
+either runner can be passed to '--compare'.
+"""
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import sys
+import timeit
+
+
+sys.path.append(os.path.dirname(__file__))
+
+
+def get_stats(timings):
+    timings = sorted(timings)
+    rounds = len(timings)
+    mean = sum(timings) / rounds
+    middle = rounds // 2
+    median = timings[middle] if rounds % 2 else (timings[middle - 1] + timings[middle]) / 2
+    stddev = math.sqrt(sum((timing - mean) ** 2 for timing in timings) / (rounds - 1)) if rounds > 1 else 0.0
+    return {
+        'min': timings[0],
+        'max': timings[-1],
+        'mean': mean,
+        'median': median,
+        'stddev': stddev,
+        'rounds': rounds,
+        'ops': 1 / mean if mean else None,
+    }
+
+
+def run_case(case, min_time, min_rounds, max_rounds):
+    function = case.setup()
+    function()  # warm up
+
+    timings = []
+    total = 0
+    while len(timings) < min_rounds or (total < min_time and len(timings) < max_rounds):
+        start = timeit.default_timer()
+        function()
+        timings.append(timeit.default_timer() - start)
+        total += timings[-1]
+    return get_stats(timings)
+
+
+def get_machine_info():
+    import django
+    import rest_framework
+    import rest_framework_transforms
+
+    return {
+        'python_implementation': platform.python_implementation(),
+        'python_version': platform.python_version(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'django_version': django.get_version(),
+        'rest_framework_version': rest_framework.VERSION,
+        'rest_framework_transforms_version': rest_framework_transforms.__version__,
+    }
+
+
+def get_benchmark_key(benchmark):
+    # pytest-benchmark stores the parametrize id in 'param'
+    return benchmark.get('param') or benchmark['name']
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints the change in mean time of every benchmark found in both runs.
+
+    :returns: The names of the benchmarks that got slower by more than 'threshold'.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = dict(
+            (get_benchmark_key(benchmark), benchmark['stats'])
+            for benchmark in json.load(baseline_file)['benchmarks']
+        )
+
+    regressions = []
+    print('\n%-60s %14s %14s %8s' % ('benchmark', 'baseline (us)', 'current (us)', 'ratio'))
+    for benchmark in results['benchmarks']:
+        key = get_benchmark_key(benchmark)
+        if key not in baseline:
+            continue
+        ratio = benchmark['stats']['mean'] / baseline[key]['mean']
+        flag = ''
+        if ratio > threshold:
+            regressions.append(key)
+            flag = ' slower'
+        print('%-60s %14.1f %14.1f %7.2fx%s' % (key, baseline[key]['mean'] * 1e6, benchmark['stats']['mean'] * 1e6, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the version transform pipeline.')
+    parser.add_argument('--quick', action='store_true', help='run a smaller matrix, without the largest chains, payloads and lists')
+    parser.add_argument('-k', dest='keyword', help='only run benchmarks whose name contains KEYWORD')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare the results against a previous JSON results file')
+    parser.add_argument('--threshold', type=float, default=1.25, help='the slowdown ratio reported as a regression (default: 1.25)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='the minimum time in seconds to spend on each benchmark (default: 0.2)')
+    parser.add_argument('--min-rounds', type=int, default=3)
+    parser.add_argument('--max-rounds', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from benchmarks.settings import configure
+    configure()
+    from benchmarks.cases import get_cases
+
+    cases = [
+        case
+        for case in get_cases(quick=args.quick)
+        if not args.keyword or args.keyword in case.name
+    ]
+
+    results = {
+        'machine_info': get_machine_info(),
+        'datetime': datetime.datetime.utcnow().isoformat(),
+        'benchmarks': [],
+    }
+    for case in cases:
+        stats = run_case(case, args.min_time, args.min_rounds, args.max_rounds)
+        results['benchmarks'].append({
+            'name': case.name,
+            'param': case.name,
+            'group': case.group,
+            'extra_info': case.params,
+            'stats': stats,
+        })
+        print('%-60s %14.1f us  (%d rounds)' % (case.name, stats['mean'] * 1e6, stats['rounds']))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print('\n%d benchmark(s) slower than %.2fx the baseline' % (len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
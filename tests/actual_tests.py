@@ -1,27 +1,95 @@
+from collections import OrderedDict
+import copy
 import io
+import itertools
 import json
+import os
+import random
+import sys
+import types
 from unittest import TestCase
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command, CommandError
+from django.db.models.query import QuerySet
+from django.test import override_settings
 import pytest
+from rest_framework.exceptions import ParseError
 from rest_framework.parsers import JSONParser
-from rest_framework_transforms.utils import get_transform_classes
+from rest_framework.renderers import JSONRenderer
+from rest_framework_transforms.transforms import (
+    BaseTransform, CompositeTransform, CopyOnWriteTransform, DeclarativeTransform, reads_argument,
+)
+from rest_framework_transforms.utils import (
+    build_transform_chain, get_transform_chain, get_transform_classes, is_latest_version, scan_transforms, transform_registry,
+    TransformIndex,
+)
+from rest_framework_transforms.warmup import get_versioning_classes, warm_up
 
 try:
     from unittest.mock import MagicMock, patch
 except ImportError:
     from mock import MagicMock, patch
 from rest_framework.test import APIRequestFactory
-from rest_framework_transforms.exceptions import TransformBaseNotDeclaredException
+from rest_framework_transforms.datastructures import CopyOnWriteDict, CopyOnWriteList, thaw
+from rest_framework_transforms.codegen import diff_serializers, generate_transform_module
+from rest_framework_transforms.context import TRANSFORM_CONTEXT_KEY, TransformContext
+from rest_framework_transforms.decoders import get_json_decoder
+from rest_framework_transforms.checks import check_transform_base, check_transform_bases
+from rest_framework_transforms.cache import DjangoRepresentationCache, LRURepresentationCache, PromotionCache, RepresentationCacheKey
+from rest_framework_transforms.executors import (
+    demote_chunk, get_demotion_executor, InlineDemotionExecutor, ProcessPoolDemotionExecutor,
+    shutdown_demotion_executors, ThreadPoolDemotionExecutor,
+)
+from rest_framework_transforms.exceptions import InvalidVersionException, TransformBaseNotDeclaredException
+from rest_framework_transforms.lazy import LazyRepresentation
+from rest_framework_transforms.instrumentation import (
+    instrumentation, TimingHistogram, TransformTiming, TransformTimingAggregator, timing_aggregator,
+)
+from rest_framework_transforms.operations import (
+    AddDefault, FieldMap, FieldScope, Flatten, generate_function, Nest, OperationPlan, Remove, Rename, UNKNOWN_SCOPE,
+)
+from rest_framework_transforms.responses import StreamingVersionedResponse
+from rest_framework_transforms.serializers import BaseVersioningListSerializer, BaseVersioningSerializer
+from rest_framework_transforms.versions import get_request_version, LATEST_VERSION, parse_version, resolve_version, VersionIndex
 from tests.models import TestModel, TestModelV3
-from tests.test_parsers import TestParser
+from tests.test_parsers import (
+    TestParser, DeclarativeTestParser, StreamingTestParser, CopyOnWriteTestParser, loaded_bodies,
+    CachedTestParser, CachedDeclarativeTestParser,
+)
 from tests.test_serializers import (
     TestSerializer, MatchingSerializer, TestSerializerV3,
-    TestModelSerializer, MatchingModelSerializer, TestModelSerializerV3)
-from tests.test_transforms import TestModelTransform0002, TestModelTransform0003
+    TestModelSerializer, MatchingModelSerializer, TestModelSerializerV3,
+    TestModelSerializerWithListSerializer, CustomListSerializer, DeclarativeTestSerializer,
+    CachedTestModelSerializerV3, DjangoCachedTestModelSerializerV3, PerUserCachedTestModelSerializerV3,
+    CopyOnWriteTestSerializerV3, ParallelTestSerializer,
+    LazyTestSerializer, OverridingTestSerializer, RenameTestSerializer, SharedTestSerializer, BriefAndFullTreeTestSerializer, SharedTreeTestSerializer, UnsharedTestSerializer, UnsharedTreeTestSerializer)
+from tests.test_transforms import (
+    TestModelTransform0002, TestModelTransform0003, BatchTestModelTransform0002,
+    DeclarativeTestModelTransform0002, DeclarativeTestModelTransform0003,
+    DeclarativeTestModelTransform0004, ScopedTestModelTransform0002, ScopedTestModelTransform0003,
+    JumpTestModelTransform0002, JumpTestModelTransform0003, JumpTestModelTransform0004, JumpTestModelTransform0001To0003,
+    BadJumpTestModelTransform0002, RenameTestModelTransform0002, RenameTestModelTransform0003,
+    PureTestModelTransform0002, RequestReadingTestModelTransform0002, RequestReadingDeclarativeTestModelTransform0002,
+    PerUserTestModelTransform0002)
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from rest_framework_transforms.asynchronous import AsyncCompositeTransform
+    from tests.test_async import (
+        AsyncTestModelTransform0002, AsyncTestParser, AsyncTestSerializer,
+        ConcurrentTestModelTransform0002, LimitedConcurrentTestModelTransform0002)
 
 
 @patch('rest_framework_transforms.utils.inspect.getmembers')
 @patch('rest_framework_transforms.utils.import_module')
 class GetTransformClassesUnitTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
     def test_calls_inspect_getmembers_with_module(self, import_module_mock, getmembers_mock):
         get_transform_classes(transform_base='some_package.some_module.SomeTransformBase')
         import_module_mock.assert_called_once_with('some_package.some_module')
@@ -77,6 +145,43 @@ class GetTransformClassesUnitTests(TestCase):
         self.assertEqual(TestModelTransform0003, returned_classes[0])
         self.assertEqual(1, len(returned_classes))
 
+    def test_adds_only_transforms_above_base_version_number_to_list_in_reverse_order(self, import_module_mock, getmembers_mock):
+        getmembers_mock.return_value = {
+            'TestModelTransform0002': TestModelTransform0002,
+            'TestModelTransform0003': TestModelTransform0003,
+        }.items()
+        returned_classes = get_transform_classes(
+            transform_base='some_package.some_module.TestModelTransform',
+            base_version=2,
+            reverse=True,
+        )
+        self.assertEqual([TestModelTransform0003], returned_classes)
+
+    def test_scans_transform_module_only_once(self, import_module_mock, getmembers_mock):
+        getmembers_mock.return_value = {
+            'TestModelTransform0002': TestModelTransform0002,
+            'TestModelTransform0003': TestModelTransform0003,
+        }.items()
+        get_transform_classes(transform_base='some_package.some_module.TestModelTransform')
+        get_transform_classes(transform_base='some_package.some_module.TestModelTransform', base_version=2)
+        get_transform_classes(transform_base='some_package.some_module.TestModelTransform', reverse=True)
+        import_module_mock.assert_called_once_with('some_package.some_module')
+        self.assertEqual(1, getmembers_mock.call_count)
+
+    def test_invalidate_causes_transform_module_rescan(self, import_module_mock, getmembers_mock):
+        getmembers_mock.return_value = {
+            'TestModelTransform0002': TestModelTransform0002,
+        }.items()
+        get_transform_classes(transform_base='some_package.some_module.TestModelTransform')
+        getmembers_mock.return_value = {
+            'TestModelTransform0002': TestModelTransform0002,
+            'TestModelTransform0003': TestModelTransform0003,
+        }.items()
+        transform_registry.invalidate('some_package.some_module.TestModelTransform')
+        returned_classes = get_transform_classes(transform_base='some_package.some_module.TestModelTransform')
+        self.assertEqual([TestModelTransform0002, TestModelTransform0003], returned_classes)
+        self.assertEqual(2, getmembers_mock.call_count)
+
 
 class VersioningParserUnitTests(TestCase):
     def setUp(self):
@@ -118,8 +223,8 @@ class VersioningParserUnitTests(TestCase):
         )
         self.assertEqual(data_dict, default_data_dict)
 
-    @patch('rest_framework_transforms.parsers.get_transform_classes')
-    def test_parse_gets_transform_classes_with_version_specified(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_parse_gets_transform_classes_with_version_specified(self, get_transform_chain_mock):
         self.parser.parse(
             stream=self.json_string_data,
             media_type='application/vnd.test.testtype+json',
@@ -127,15 +232,15 @@ class VersioningParserUnitTests(TestCase):
                 'request': self.request,
             },
         )
-        self.assertTrue(get_transform_classes_mock.called)
-        get_transform_classes_mock.assert_called_once_with(
+        self.assertTrue(get_transform_chain_mock.called)
+        get_transform_chain_mock.assert_called_once_with(
             'tests.test_transforms.TestModelTransform',
             base_version=self.request.version,
             reverse=False,
         )
 
-    @patch('rest_framework_transforms.parsers.get_transform_classes')
-    def test_parse_doesnt_get_transform_classes_with_no_version_specified(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_parse_doesnt_get_transform_classes_with_no_version_specified(self, get_transform_chain_mock):
         self.request = APIRequestFactory().get('')
         self.parser.parse(
             stream=self.json_string_data,
@@ -144,16 +249,13 @@ class VersioningParserUnitTests(TestCase):
                 'request': self.request,
             },
         )
-        self.assertFalse(get_transform_classes_mock.called)
+        self.assertFalse(get_transform_chain_mock.called)
 
-    @patch('rest_framework_transforms.parsers.get_transform_classes')
-    def test_parse_calls_forwards_on_transform_classes(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_parse_calls_forwards_on_transform_classes(self, get_transform_chain_mock):
         transform_one = MagicMock()
         transform_two = MagicMock()
-        get_transform_classes_mock.return_value = [
-            transform_one,
-            transform_two,
-        ]
+        get_transform_chain_mock.return_value = CompositeTransform([transform_one, transform_two])
 
         self.parser.parse(
             stream=self.json_string_data,
@@ -164,24 +266,148 @@ class VersioningParserUnitTests(TestCase):
         )
 
         self.json_string_data = io.BytesIO(str.encode(self.json_string))
-        self.assertTrue(transform_one.return_value.forwards.called)
-        transform_one.return_value.forwards.assert_called_once_with(
-            data=JSONParser().parse(
+        self.assertTrue(transform_one.forwards.called)
+        transform_one.forwards.assert_called_once_with(
+            JSONParser().parse(
                 stream=self.json_string_data,
                 media_type='application/vnd.test.testtype+json',
                 parser_context={
                     'request': self.request,
                 },
             ),
-            request=self.request,
+            self.request,
+        )
+
+        self.assertTrue(transform_two.forwards.called)
+        transform_two.forwards.assert_called_once_with(
+            transform_one.forwards.return_value,
+            self.request,
+        )
+
+
+class BatchTransformUnitTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+
+    def test_forwards_many_calls_forwards_for_each_item(self):
+        data = TestModelTransform0002().forwards_many(
+            [{'test_field_one': 'one'}, {'test_field_one': 'two'}],
+            self.request,
         )
+        self.assertEqual([{'new_test_field': 'one'}, {'new_test_field': 'two'}], data)
+
+    def test_backwards_many_calls_backwards_for_each_item(self):
+        instances = [TestModelV3(), TestModelV3()]
+        transform = TestModelTransform0002()
+        transform.backwards = MagicMock(side_effect=lambda data, request, instance: data)
+        transform.backwards_many([{'a': 1}, {'a': 2}], self.request, instances)
+        self.assertEqual(2, transform.backwards.call_count)
+        transform.backwards.assert_any_call({'a': 1}, self.request, instances[0])
+        transform.backwards.assert_any_call({'a': 2}, self.request, instances[1])
+
+
+class OperationPlanUnitTests(TestCase):
+    def apply_one_by_one(self, operations, data):
+        for operation in operations:
+            data = operation.apply(data)
+        return data
+
+    def test_rename_chain_is_fused_into_one_step(self):
+        plan = OperationPlan([Rename('a', 'b'), Rename('b', 'c'), Remove('d'), AddDefault('e', 5)])
+        self.assertEqual(1, len(plan.steps))
+        self.assertEqual({'c': 1, 'e': 5, 'f': 2}, plan({'a': 1, 'd': 3, 'f': 2}))
+
+    def test_structural_operations_split_steps(self):
+        plan = OperationPlan([Rename('a', 'b'), Nest(['b', 'c'], into='n'), Rename('x', 'y')])
+        self.assertEqual(3, len(plan.steps))
+        self.assertEqual({'n': {'b': 1, 'c': 2}, 'y': 3}, plan({'a': 1, 'c': 2, 'x': 3}))
+
+    def test_operations_without_effect_are_dropped(self):
+        self.assertTrue(OperationPlan([]).is_noop)
+        self.assertTrue(OperationPlan([Rename('a', 'a')]).is_noop)
+        self.assertEqual({'b': 2}, OperationPlan([AddDefault('a', 1), Remove('a')])({'a': 1, 'b': 2}))
+
+    def test_inverse_operations_restore_representation(self):
+        operations = [Rename('a', 'b'), Remove('c', default=3), Nest(['b'], into='n'), Flatten('n', ['b'])]
+        backwards = OperationPlan([operation.inverse() for operation in reversed(operations)])
+        self.assertEqual({'a': 1, 'c': 3}, backwards(OperationPlan(operations)({'a': 1, 'c': 3})))
+
+    def test_fused_plan_matches_operations_applied_one_by_one(self):
+        names = ['a', 'b', 'c', 'd']
+        rng = random.Random(1234)
+        for _ in range(500):
+            operations = []
+            for _ in range(rng.randint(1, 6)):
+                kind = rng.choice([Rename, Remove, AddDefault])
+                if kind is Rename:
+                    operations.append(Rename(rng.choice(names), rng.choice(names)))
+                else:
+                    operations.append(kind(rng.choice(names), rng.randint(10, 20)))
+            data = dict((name, index) for index, name in enumerate(names) if rng.random() < 0.6)
+            self.assertEqual(
+                self.apply_one_by_one(operations, dict(data)),
+                OperationPlan(operations)(dict(data)),
+                operations,
+            )
 
-        self.assertTrue(transform_two.return_value.forwards.called)
-        transform_two.return_value.forwards.assert_called_once_with(
-            data=transform_one.return_value.forwards.return_value,
-            request=self.request,
+
+class DeclarativeTransformUnitTests(TestCase):
+    def test_declarative_transform_forwards_and_backwards(self):
+        transform = DeclarativeTestModelTransform0002()
+        self.assertEqual({'new_test_field': 1}, transform.forwards({'test_field_one': 1}, None))
+        self.assertEqual({'test_field_one': 1}, transform.backwards({'new_test_field': 1}, None, None))
+
+    def test_build_transform_chain_fuses_consecutive_declarative_transforms(self):
+        chain = build_transform_chain([
+            DeclarativeTestModelTransform0002,
+            DeclarativeTestModelTransform0003,
+            TestModelTransform0003,
+            DeclarativeTestModelTransform0004,
+        ])
+        self.assertEqual(3, len(chain))
+        self.assertEqual(1, len(chain[0].get_plans()[0].steps))
+        self.assertIsInstance(chain[1], TestModelTransform0003)
+        self.assertIsInstance(chain[2], DeclarativeTestModelTransform0004)
+
+    def test_build_transform_chain_fuses_reversed_declarative_transforms(self):
+        chain = build_transform_chain([DeclarativeTestModelTransform0003, DeclarativeTestModelTransform0002], reverse=True)
+        self.assertEqual(1, len(chain))
+        self.assertEqual({'test_field_one': 1}, chain[0].backwards({'new_test_field': 1, 'new_related_object_id_list': []}, None, None))
+
+    def test_build_transform_chain_doesnt_fuse_overridden_methods(self):
+        class CustomTransform0002(DeclarativeTestModelTransform0002):
+            def forwards(self, data, request):
+                return data
+
+        chain = build_transform_chain([CustomTransform0002, DeclarativeTestModelTransform0003])
+        self.assertEqual(2, len(chain))
+
+
+class CompositeTransformUnitTests(TestCase):
+    def test_composite_skips_noop_transforms(self):
+        transform = TestModelTransform0002()
+        composite = CompositeTransform([DeclarativeTransform(), transform, DeclarativeTransform(operations=[])])
+        self.assertEqual((transform,), composite.steps)
+
+    def test_composite_runs_steps_in_order(self):
+        composite = CompositeTransform([TestModelTransform0002(), TestModelTransform0003()])
+        self.assertEqual(
+            {'new_test_field': 1, 'new_related_object_id_list': [1, 2, 3, 4, 5]},
+            composite.forwards({'test_field_one': 1}, None),
         )
 
+    def test_get_transform_chain_is_memoized_per_version_and_direction(self):
+        transform_base = 'tests.test_transforms.DeclarativeTestModelTransform'
+        chain = get_transform_chain(transform_base, base_version=1, reverse=True)
+        self.assertIs(chain, get_transform_chain(transform_base, base_version=1, reverse=True))
+        self.assertIsNot(chain, get_transform_chain(transform_base, base_version=1, reverse=False))
+        self.assertIsNot(chain, get_transform_chain(transform_base, base_version=2, reverse=True))
+        self.assertEqual(1, len(chain.steps))
+
+    def test_get_transform_chain_is_empty_at_latest_version(self):
+        chain = get_transform_chain('tests.test_transforms.TestModelTransform', base_version=3, reverse=True)
+        self.assertTrue(chain.is_noop)
+
 
 class VersioningParserIntegrationTests(TestCase):
     def setUp(self):
@@ -212,6 +438,115 @@ class VersioningParserIntegrationTests(TestCase):
         self.assertTrue('new_related_object_id_list' in data_dict)
         self.assertEqual(data_dict['new_related_object_id_list'], [1, 2, 3, 4, 5])
 
+    def test_parsing_does_forward_conversion_of_lists_v1_to_v3(self):
+        self.json_string_data = io.BytesIO(str.encode(json.dumps([
+            {'test_field_one': 'first'},
+            {'test_field_one': 'second'},
+        ])))
+        data_list = self.parser.parse(
+            stream=self.json_string_data,
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': self.request,
+            },
+        )
+        self.assertEqual(['first', 'second'], [item['new_test_field'] for item in data_list])
+        for item in data_list:
+            self.assertEqual(item['new_related_object_id_list'], [1, 2, 3, 4, 5])
+
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_parsing_lists_calls_forwards_many(self, get_transform_chain_mock):
+        get_transform_chain_mock.return_value = CompositeTransform([BatchTestModelTransform0002()])
+        self.json_string_data = io.BytesIO(str.encode(json.dumps([{'test_field_one': 'first'}])))
+        data_list = self.parser.parse(
+            stream=self.json_string_data,
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': self.request,
+            },
+        )
+        self.assertEqual([{'test_field_one': 'first', 'batched': True}], data_list)
+
+
+class StreamingVersioningParserTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.parser = StreamingTestParser()
+
+    def parse(self, body):
+        return self.parser.parse(
+            stream=io.BytesIO(body.encode('utf-8')),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': self.request,
+            },
+        )
+
+    def test_parse_raises_error_when_no_transform_base_specified(self):
+        self.parser.transform_base = None
+        with self.assertRaises(TransformBaseNotDeclaredException):
+            self.parser.parse(stream=None)
+
+    def test_large_elements_are_not_decoded_once_per_chunk(self):
+        body = json.dumps([{'test_field_one': 'a' * 10000}, {'test_field_one': 'b'}])
+        with patch.object(json.JSONDecoder, 'raw_decode', autospec=True, side_effect=json.JSONDecoder.raw_decode) as raw_decode:
+            items = list(self.parse(body))
+
+        self.assertEqual(['a' * 10000, 'b'], [item['new_test_field'] for item in items])
+        self.assertLess(raw_decode.call_count, 30)
+
+    def test_parse_yields_promoted_items_lazily(self):
+        stream = io.BytesIO(json.dumps([{'test_field_one': 'value_%d' % i} for i in range(50)]).encode('utf-8'))
+        items = self.parser.parse(
+            stream=stream,
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': self.request,
+            },
+        )
+        first = next(items)
+        self.assertEqual('value_0', first['new_test_field'])
+        self.assertEqual([1, 2, 3, 4, 5], first['new_related_object_id_list'])
+        self.assertLess(stream.tell(), len(stream.getvalue()))
+        self.assertEqual(['value_%d' % i for i in range(1, 50)], [item['new_test_field'] for item in items])
+
+    def test_parse_decodes_values_split_across_chunks(self):
+        body = u' [ 12345678901234 , "\u00e9t\u00e9 \u00e9t\u00e9" , {"a": [1, 2, {"b": null}]}, true ] '
+        self.request = APIRequestFactory().get('')
+        self.assertEqual(
+            [12345678901234, u'\u00e9t\u00e9 \u00e9t\u00e9', {'a': [1, 2, {'b': None}]}, True],
+            list(self.parse(body)),
+        )
+
+    def test_parse_decodes_numbers_split_at_any_offset(self):
+        body = b'[1.25, 1234.5e3, -1, 0, -0.5e-7, 10, {"a": 1.5}, true]'
+        self.request = APIRequestFactory().get('')
+        for offset in range(1, len(body)):
+            stream = MagicMock(read=MagicMock(side_effect=itertools.chain([body[:offset], body[offset:]], itertools.repeat(b''))))
+            self.parser.chunk_size = len(body)
+            items = self.parser.parse(stream, 'application/vnd.test.testtype+json', {'request': self.request})
+            self.assertEqual([1.25, 1234.5e3, -1, 0, -0.5e-7, 10, {'a': 1.5}, True], list(items), offset)
+
+    def test_parse_rejects_out_of_range_constants_like_drf(self):
+        self.request = APIRequestFactory().get('')
+        for body in ('[1, NaN]', '[-Infinity]', 'NaN'):
+            with self.assertRaises(ParseError):
+                data = self.parse(body)
+                list(data) if isinstance(data, types.GeneratorType) else data
+
+    def test_parse_empty_array(self):
+        self.assertEqual([], list(self.parse('[ ]')))
+
+    def test_parse_promotes_non_array_bodies(self):
+        data = self.parse(json.dumps({'test_field_one': 'value_one'}))
+        self.assertEqual('value_one', data['new_test_field'])
+
+    def test_parse_raises_parse_error_for_malformed_arrays(self):
+        for body in ('[{"a": 1} {"b": 2}]', '[{"a": 1},]', '[{"a": 1}', '{"a": '):
+            with self.assertRaises(ParseError):
+                list(self.parse(body))
+
 
 class VersioningSerializerUnitTests(TestCase):
     def setUp(self):
@@ -230,18 +565,18 @@ class VersioningSerializerUnitTests(TestCase):
         with self.assertRaises(TransformBaseNotDeclaredException):
             self.serializer.to_representation(instance=None)
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_to_representation_gets_transform_classes_with_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_to_representation_gets_transform_classes_with_instance(self, get_transform_chain_mock):
         self.serializer.to_representation(instance=TestModel())
-        self.assertTrue(get_transform_classes_mock.called)
-        get_transform_classes_mock.assert_called_once_with(
+        self.assertTrue(get_transform_chain_mock.called)
+        get_transform_chain_mock.assert_called_once_with(
             'tests.test_transforms.TestModelTransform',
             base_version=self.request.version,
             reverse=True,
         )
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_to_representation_calls_backwards_on_transform_classes_with_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_to_representation_calls_backwards_on_transform_classes_with_instance(self, get_transform_chain_mock):
         instance = TestModel(
             test_field_one='test_one',
             test_field_two='test_two',
@@ -251,22 +586,19 @@ class VersioningSerializerUnitTests(TestCase):
         )
         transform_one = MagicMock()
         transform_two = MagicMock()
-        get_transform_classes_mock.return_value = [
-            transform_one,
-            transform_two,
-        ]
+        get_transform_chain_mock.return_value = CompositeTransform([transform_one, transform_two])
 
         self.serializer.to_representation(instance=instance)
 
-        self.assertTrue(transform_one.return_value.backwards.called)
-        transform_one.return_value.backwards.assert_called_once_with(
+        self.assertTrue(transform_one.backwards.called)
+        transform_one.backwards.assert_called_once_with(
             MatchingSerializer().to_representation(instance),
             self.request,
             instance,
         )
-        self.assertTrue(transform_two.return_value.backwards.called)
-        transform_two.return_value.backwards.assert_called_once_with(
-            transform_one.return_value.backwards.return_value,
+        self.assertTrue(transform_two.backwards.called)
+        transform_two.backwards.assert_called_once_with(
+            transform_one.backwards.return_value,
             self.request,
             instance,
         )
@@ -300,30 +632,30 @@ class VersioningSerializerUnitTests(TestCase):
         data = self.serializer.to_representation(instance=None)
         self.assertEqual(data, MatchingSerializer().to_representation(None))
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_to_representation_doesnt_get_transform_classes_without_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_to_representation_doesnt_get_transform_classes_without_instance(self, get_transform_chain_mock):
         self.serializer.to_representation(instance=None)
-        self.assertFalse(get_transform_classes_mock.called)
+        self.assertFalse(get_transform_chain_mock.called)
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_to_representation_doesnt_get_transform_classes_without_version(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_to_representation_doesnt_get_transform_classes_without_version(self, get_transform_chain_mock):
         self.request = APIRequestFactory().get('')
         self.serializer = TestSerializer(context={'request': self.request})
         self.serializer.to_representation(instance=TestModel())
-        self.assertFalse(get_transform_classes_mock.called)
+        self.assertFalse(get_transform_chain_mock.called)
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_model_to_representation_gets_transform_classes_with_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_model_to_representation_gets_transform_classes_with_instance(self, get_transform_chain_mock):
         self.model_serializer.to_representation(instance=TestModel())
-        self.assertTrue(get_transform_classes_mock.called)
-        get_transform_classes_mock.assert_called_once_with(
+        self.assertTrue(get_transform_chain_mock.called)
+        get_transform_chain_mock.assert_called_once_with(
             'tests.test_transforms.TestModelTransform',
             base_version=self.request.version,
             reverse=True,
         )
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_model_to_representation_calls_backwards_on_transform_classes_with_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_model_to_representation_calls_backwards_on_transform_classes_with_instance(self, get_transform_chain_mock):
         instance = TestModel(
             test_field_one='test_one',
             test_field_two='test_two',
@@ -333,22 +665,19 @@ class VersioningSerializerUnitTests(TestCase):
         )
         transform_one = MagicMock()
         transform_two = MagicMock()
-        get_transform_classes_mock.return_value = [
-            transform_one,
-            transform_two,
-        ]
+        get_transform_chain_mock.return_value = CompositeTransform([transform_one, transform_two])
 
         self.model_serializer.to_representation(instance=instance)
 
-        self.assertTrue(transform_one.return_value.backwards.called)
-        transform_one.return_value.backwards.assert_called_once_with(
+        self.assertTrue(transform_one.backwards.called)
+        transform_one.backwards.assert_called_once_with(
             MatchingModelSerializer().to_representation(instance),
             self.request,
             instance,
         )
-        self.assertTrue(transform_two.return_value.backwards.called)
-        transform_two.return_value.backwards.assert_called_once_with(
-            transform_one.return_value.backwards.return_value,
+        self.assertTrue(transform_two.backwards.called)
+        transform_two.backwards.assert_called_once_with(
+            transform_one.backwards.return_value,
             self.request,
             instance,
         )
@@ -382,17 +711,17 @@ class VersioningSerializerUnitTests(TestCase):
         data = self.model_serializer.to_representation(instance=None)
         self.assertEqual(data, MatchingModelSerializer().to_representation(None))
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_model_to_representation_doesnt_get_transform_classes_without_instance(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_model_to_representation_doesnt_get_transform_classes_without_instance(self, get_transform_chain_mock):
         self.model_serializer.to_representation(instance=None)
-        self.assertFalse(get_transform_classes_mock.called)
+        self.assertFalse(get_transform_chain_mock.called)
 
-    @patch('rest_framework_transforms.serializers.get_transform_classes')
-    def test_model_to_representation_doesnt_get_transform_classes_without_version(self, get_transform_classes_mock):
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_model_to_representation_doesnt_get_transform_classes_without_version(self, get_transform_chain_mock):
         self.request = APIRequestFactory().get('')
         self.model_serializer = TestModelSerializer(context={'request': self.request})
         self.model_serializer.to_representation(instance=TestModel())
-        self.assertFalse(get_transform_classes_mock.called)
+        self.assertFalse(get_transform_chain_mock.called)
 
 
 class VersioningSerializerIntegrationTests(TestCase):
@@ -461,3 +790,1746 @@ class VersioningSerializerIntegrationTests(TestCase):
         self.assertFalse('test_field_one' in data)
         self.assertTrue('new_related_object_id_list' in data)
         self.assertEqual(data['new_related_object_id_list'], [1, 2, 3, 4])
+
+
+class VersioningListSerializerUnitTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.instances = [
+            TestModel(test_field_one='one_%d' % i, test_field_two='two', test_field_three='three',
+                      test_field_four='four', test_field_five='five')
+            for i in range(3)
+        ]
+
+    def test_many_uses_versioning_list_serializer(self):
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+        self.assertIsInstance(serializer, BaseVersioningListSerializer)
+
+    def test_many_respects_declared_list_serializer_class(self):
+        serializer = TestModelSerializerWithListSerializer(self.instances, many=True, context={'request': self.request})
+        self.assertIsInstance(serializer, CustomListSerializer)
+
+    def test_list_raises_error_when_no_transform_base_specified(self):
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+        serializer.child.transform_base = None
+        with self.assertRaises(TransformBaseNotDeclaredException):
+            serializer.data
+
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_list_gets_transform_chain_once(self, get_transform_chain_mock):
+        transform = MagicMock()
+        get_transform_chain_mock.return_value = CompositeTransform([transform])
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+        serializer.data
+        get_transform_chain_mock.assert_called_once_with(
+            'tests.test_transforms.TestModelTransform',
+            base_version=self.request.version,
+            reverse=True,
+        )
+        self.assertEqual(1, transform.backwards_many.call_count)
+
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_list_calls_backwards_many_with_whole_page(self, get_transform_chain_mock):
+        transform = MagicMock()
+        transform.backwards_many.side_effect = lambda items, request, instances: items
+        get_transform_chain_mock.return_value = CompositeTransform([transform])
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+        serializer.data
+        transform.backwards_many.assert_called_once_with(
+            MatchingSerializer(self.instances, many=True).data,
+            self.request,
+            self.instances,
+        )
+        self.assertFalse(transform.backwards.called)
+
+    def test_list_uses_overridden_child_to_representation(self):
+        instances = [TestModelV3(pk=1, new_test_field='one'), TestModelV3(pk=2, new_test_field='two')]
+        for version in (1, 3):
+            self.request.version = version
+            data = OverridingTestSerializer(instances, many=True, context={'request': self.request}).data
+
+            self.assertEqual([True, True], [item['overridden'] for item in data])
+        self.assertEqual('one', data[0]['new_test_field'])
+
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_list_doesnt_get_transform_classes_without_version(self, get_transform_chain_mock):
+        self.request = APIRequestFactory().get('')
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+        data = serializer.data
+        self.assertFalse(get_transform_chain_mock.called)
+        self.assertEqual(data, MatchingSerializer(self.instances, many=True).data)
+
+
+class VersioningListSerializerIntegrationTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        for value in ('first', 'second'):
+            TestModelV3.objects.create(
+                test_field_two='value_two',
+                test_field_three='value_three',
+                test_field_four='value_four',
+                test_field_five='value_five',
+                new_test_field=value,
+            )
+
+    @pytest.mark.django_db
+    def test_list_serialization_does_backwards_conversion_v3_to_v1(self):
+        data = TestSerializerV3(TestModelV3.objects.order_by('id'), many=True, context={'request': self.request}).data
+        self.assertEqual(['first', 'second'], [item['test_field_one'] for item in data])
+        for item in data:
+            self.assertFalse('new_test_field' in item)
+            self.assertFalse('new_related_object_id_list' in item)
+
+    @pytest.mark.django_db
+    def test_model_list_serialization_does_backwards_conversion_v3_to_v2(self):
+        self.request.version = 2
+        data = TestModelSerializerV3(TestModelV3.objects.order_by('id'), many=True, context={'request': self.request}).data
+        self.assertEqual(['first', 'second'], [item['new_test_field'] for item in data])
+        for item in data:
+            self.assertFalse('new_related_object_id_list' in item)
+
+
+class DeclarativeTransformIntegrationTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+
+    def test_parsing_does_forward_conversion_v1_to_v5(self):
+        data = DeclarativeTestParser().parse(
+            stream=io.BytesIO(str.encode(json.dumps({
+                'test_field_one': 'value_one',
+                'test_field_two': 'value_two',
+                'test_field_four': 'value_four',
+                'test_field_five': 'value_five',
+            }))),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': self.request,
+            },
+        )
+        self.assertEqual({
+            'newest_test_field': 'value_one',
+            'test_field_two': 'value_two',
+            'test_field_four': 'value_four',
+            'test_field_five': 'value_five',
+            'new_related_object_id_list': [1, 2, 3, 4, 5],
+        }, data)
+
+    def test_serialization_does_backwards_conversion_v5_to_v1(self):
+        instance = TestModelV3(
+            test_field_two='value_two',
+            test_field_four='value_four',
+            test_field_five='value_five',
+            new_test_field='value_one',
+        )
+        data = DeclarativeTestSerializer(instance, context={'request': self.request}).data
+        self.assertEqual({
+            'test_field_one': 'value_one',
+            'test_field_two': 'value_two',
+            'test_field_four': 'value_four',
+            'test_field_five': 'value_five',
+        }, dict(data))
+
+    def test_serialization_does_backwards_conversion_v5_to_v4(self):
+        self.request.version = 4
+        instance = TestModelV3(
+            test_field_two='value_two',
+            test_field_four='value_four',
+            test_field_five='value_five',
+            new_test_field='value_one',
+        )
+        data = DeclarativeTestSerializer(instance, context={'request': self.request}).data
+        self.assertEqual({'test_field_four': 'value_four', 'test_field_five': 'value_five'}, data['nested_fields'])
+        self.assertEqual('value_one', data['new_test_field'])
+
+
+class StreamingVersionedResponseTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        for index in range(5):
+            TestModelV3.objects.create(
+                test_field_two='value_two',
+                test_field_three='value_three',
+                test_field_four='value_four',
+                test_field_five='value_five',
+                new_test_field=u'value_%d_\u00e9' % index,
+            )
+        self.queryset = TestModelV3.objects.order_by('id')
+
+    @pytest.mark.django_db
+    def test_iter_representation_demotes_items_in_batches(self):
+        serializer = TestSerializerV3(self.queryset, many=True, context={'request': self.request})
+        serializer.stream_batch_size = 2
+        transform = MagicMock()
+        transform.backwards_many.side_effect = lambda items, request, instances: items
+        with patch.object(serializer.child, 'get_backwards_chain', return_value=CompositeTransform([transform])):
+            items = list(serializer.iter_representation(self.queryset))
+        self.assertEqual(5, len(items))
+        self.assertEqual([2, 2, 1], [len(call[0][0]) for call in transform.backwards_many.call_args_list])
+
+    @pytest.mark.django_db
+    def test_iter_representation_reads_querysets_in_batch_sized_chunks(self):
+        serializer = TestSerializerV3(self.queryset, many=True, context={'request': self.request})
+        serializer.stream_batch_size = 2
+        queryset = self.queryset.prefetch_related('new_related_object_id_list')
+        with patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            items = list(serializer.iter_representation(queryset))
+
+        self.assertEqual(5, len(items))
+        iterator.assert_called_once_with(queryset, chunk_size=2)
+
+    @pytest.mark.django_db
+    @patch('rest_framework_transforms.serializers.ITERATOR_CHUNK_SIZE', False)
+    def test_iter_representation_reads_querysets_without_chunk_size_on_old_django(self):
+        serializer = TestSerializerV3(self.queryset, many=True, context={'request': self.request})
+        with patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            items = list(serializer.iter_representation(self.queryset))
+
+        self.assertEqual(5, len(items))
+        iterator.assert_called_once_with(self.queryset)
+
+    @pytest.mark.django_db
+    def test_streaming_response_matches_serializer_data(self):
+        serializer = TestSerializerV3(self.queryset, many=True, context={'request': self.request})
+        response = StreamingVersionedResponse(serializer)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(
+            json.loads(content.decode('utf-8')),
+            json.loads(json.dumps(TestSerializerV3(self.queryset, many=True, context={'request': self.request}).data)),
+        )
+        self.assertEqual('application/json', response['Content-Type'])
+
+    @pytest.mark.django_db
+    def test_streaming_response_yields_multiple_chunks(self):
+        serializer = TestSerializerV3(self.queryset, many=True, context={'request': self.request})
+        response = StreamingVersionedResponse(serializer)
+        response.buffer_size = 1
+        chunks = list(response.render(serializer.iter_representation(self.queryset)))
+        self.assertEqual(6, len(chunks))
+        self.assertEqual(5, len(json.loads(b''.join(chunks).decode('utf-8'))))
+
+    @pytest.mark.django_db
+    def test_streaming_response_renders_empty_list(self):
+        serializer = TestSerializerV3(TestModelV3.objects.none(), many=True, context={'request': self.request})
+        self.assertEqual(b'[]', b''.join(StreamingVersionedResponse(serializer).streaming_content))
+
+
+class LRURepresentationCacheUnitTests(TestCase):
+    def make_key(self, pk, version=1):
+        return RepresentationCacheKey('tests.testmodelv3', pk, None, version, 'base', 'serializer')
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = LRURepresentationCache(max_size=2)
+        cache.set(self.make_key(1), {'a': 1})
+        cache.set(self.make_key(2), {'a': 2})
+        cache.get(self.make_key(1))
+        cache.set(self.make_key(3), {'a': 3})
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(self.make_key(2)))
+        self.assertEqual({'a': 1}, cache.get(self.make_key(1)))
+
+    def test_invalidate_discards_every_version_of_an_instance(self):
+        cache = LRURepresentationCache()
+        cache.set(self.make_key(1, version=1), {'a': 1})
+        cache.set(self.make_key(1, version=2), {'a': 1})
+        cache.set(self.make_key(2), {'a': 2})
+        cache.invalidate(TestModelV3, 1)
+        self.assertEqual({self.make_key(2): {'a': 2}}, cache.get_many([self.make_key(1, 1), self.make_key(1, 2), self.make_key(2)]))
+
+    def test_returns_copies(self):
+        cache = LRURepresentationCache()
+        data = {'a': 1}
+        cache.set(self.make_key(1), data)
+        data['a'] = 2
+        cache.get(self.make_key(1))['a'] = 3
+        self.assertEqual({'a': 1}, cache.get(self.make_key(1)))
+
+
+class RepresentationCacheIntegrationTests(TestCase):
+    def setUp(self):
+        CachedTestModelSerializerV3.representation_cache.clear()
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.instances = [
+            TestModelV3.objects.create(
+                test_field_two='value_two',
+                test_field_three='value_three',
+                test_field_four='value_four',
+                test_field_five='value_five',
+                new_test_field='value_%d' % index,
+            )
+            for index in range(3)
+        ]
+
+    def serialize(self, serializer_class, instance, **kwargs):
+        return serializer_class(instance, context={'request': self.request}, **kwargs).data
+
+    @pytest.mark.django_db
+    def test_serializer_classes_watch_their_model_when_created(self):
+        cache = LRURepresentationCache()
+
+        type('WatchingTestModelSerializerV3', (TestModelSerializerV3,), {'representation_cache': cache})
+
+        self.assertIn(TestModelV3, cache._watched)
+
+    @pytest.mark.django_db
+    def test_serializer_classes_watch_their_model_when_first_used_without_init_subclass(self):
+        cache = LRURepresentationCache()
+        with patch.object(BaseVersioningSerializer, '__init_subclass__', classmethod(lambda cls, **kwargs: None)):
+            serializer_class = type('LateWatchingTestModelSerializerV3', (TestModelSerializerV3,), {'representation_cache': cache})
+        self.assertNotIn(TestModelV3, cache._watched)
+
+        serializer_class(self.instances[0], context={'request': self.request})
+
+        self.assertIn(TestModelV3, cache._watched)
+
+    @pytest.mark.django_db
+    def test_saves_invalidate_before_anything_is_cached_in_the_process(self):
+        cache = DjangoRepresentationCache()
+        type('WatchingTestModelSerializerV3', (TestModelSerializerV3,), {'representation_cache': cache})
+
+        with patch.object(cache, 'invalidate') as invalidate:
+            self.instances[0].save()
+
+        invalidate.assert_called_once_with(TestModelV3, self.instances[0].pk)
+
+    @pytest.mark.django_db
+    def test_django_cache_entries_expire_by_default(self):
+        self.assertEqual(300, DjangoRepresentationCache().timeout)
+
+    @pytest.mark.django_db
+    def test_cached_representation_skips_transform_chain(self):
+        data = self.serialize(CachedTestModelSerializerV3, self.instances[0])
+        with patch.object(CachedTestModelSerializerV3, 'get_backwards_chain') as get_backwards_chain:
+            get_backwards_chain.return_value.reads_request.return_value = False
+            self.assertEqual(data, self.serialize(CachedTestModelSerializerV3, self.instances[0]))
+        self.assertFalse(get_backwards_chain.return_value.backwards.called)
+        self.assertEqual('value_0', data['test_field_one'])
+
+    @pytest.mark.django_db
+    def test_cache_is_keyed_by_version(self):
+        self.serialize(CachedTestModelSerializerV3, self.instances[0])
+        self.request.version = 3
+        data = self.serialize(CachedTestModelSerializerV3, self.instances[0])
+        self.assertEqual('value_0', data['new_test_field'])
+
+    @pytest.mark.django_db
+    def test_saving_instance_invalidates_cached_representation(self):
+        self.serialize(CachedTestModelSerializerV3, self.instances[0])
+        self.instances[0].new_test_field = 'changed'
+        self.instances[0].save()
+        self.assertEqual('changed', self.serialize(CachedTestModelSerializerV3, self.instances[0])['test_field_one'])
+
+    @pytest.mark.django_db
+    def test_list_only_demotes_missing_representations(self):
+        self.serialize(CachedTestModelSerializerV3, self.instances[1])
+        transform = MagicMock()
+        transform.backwards_many.side_effect = lambda items, request, instances: items
+        transform.reads_request.return_value = False
+        with patch.object(CachedTestModelSerializerV3, 'get_backwards_chain', return_value=CompositeTransform([transform])):
+            data = self.serialize(CachedTestModelSerializerV3, self.instances, many=True)
+        self.assertEqual([self.instances[0], self.instances[2]], transform.backwards_many.call_args[0][2])
+        self.assertEqual('value_1', data[1]['test_field_one'])
+        self.assertEqual('value_2', data[2]['new_test_field'])
+
+    @pytest.mark.django_db
+    def test_representations_demoted_by_request_reading_transforms_are_not_cached(self):
+        self.request.user = 'alice'
+        self.assertEqual('alice', self.serialize(PerUserCachedTestModelSerializerV3, self.instances[0])['user'])
+        self.request.user = 'bob'
+        self.assertEqual('bob', self.serialize(PerUserCachedTestModelSerializerV3, self.instances[0])['user'])
+        self.assertEqual(['bob', 'bob'], [item['user'] for item in self.serialize(PerUserCachedTestModelSerializerV3, self.instances[:2], many=True)])
+        self.assertEqual(0, len(PerUserCachedTestModelSerializerV3.representation_cache))
+
+    @pytest.mark.django_db
+    def test_django_cache_backend_invalidates_on_save(self):
+        self.assertEqual('value_0', self.serialize(DjangoCachedTestModelSerializerV3, self.instances[0])['test_field_one'])
+        with patch.object(DjangoCachedTestModelSerializerV3, 'get_backwards_chain') as get_backwards_chain:
+            get_backwards_chain.return_value.reads_request.return_value = False
+            self.serialize(DjangoCachedTestModelSerializerV3, self.instances[0])
+        self.assertFalse(get_backwards_chain.return_value.backwards.called)
+        self.instances[0].new_test_field = 'changed'
+        self.instances[0].save()
+        self.assertEqual('changed', self.serialize(DjangoCachedTestModelSerializerV3, self.instances[0])['test_field_one'])
+
+
+class CopyOnWriteUnitTests(TestCase):
+    def setUp(self):
+        self.base = {
+            'changed': {'nested': [1, {'deep': 2}]},
+            'untouched': {'big': list(range(10))},
+            'items': [{'a': 1}, {'b': 2}],
+        }
+        self.original = copy.deepcopy(self.base)
+
+    def test_unchanged_view_thaws_to_base(self):
+        data = CopyOnWriteDict(self.base)
+        data['changed']['nested'][1]['deep']
+        self.assertIs(self.base, thaw(data))
+
+    def test_changes_copy_only_touched_subtrees(self):
+        data = CopyOnWriteDict(self.base)
+        data['changed']['nested'][1]['deep'] = 3
+        data['items'][0]['a'] = 5
+        data['items'].append({'c': 3})
+        result = thaw(data)
+        self.assertEqual(self.original, self.base)
+        self.assertEqual(3, result['changed']['nested'][1]['deep'])
+        self.assertEqual([{'a': 5}, {'b': 2}, {'c': 3}], result['items'])
+        self.assertIs(self.base['untouched'], result['untouched'])
+        self.assertIs(self.base['items'][1], result['items'][1])
+
+    def test_wrapped_values_moved_into_new_containers_are_thawed(self):
+        data = CopyOnWriteDict(self.base)
+        data['moved'] = {'value': data.pop('untouched')}
+        data['moved']['value']['big'].append(10)
+        result = thaw(data)
+        self.assertEqual(self.original, self.base)
+        self.assertEqual(list(range(11)), result['moved']['value']['big'])
+        self.assertNotIn('untouched', result)
+
+    def test_list_views_support_sequence_operations(self):
+        data = CopyOnWriteList([1, [2, 3], 4])
+        data[1].insert(0, 'x')
+        del data[0]
+        self.assertEqual([['x', 2, 3], 4], thaw(data))
+        self.assertEqual([2, 3], data[0][1:])
+
+    def test_copy_on_write_transform_leaves_input_untouched(self):
+        data = {'new_test_field': 'value', 'other': {'nested': True}}
+        result = CopyOnWriteTransform(TestModelTransform0002()).backwards(data, None, None)
+        self.assertEqual({'new_test_field': 'value', 'other': {'nested': True}}, data)
+        self.assertEqual({'test_field_one': 'value', 'other': {'nested': True}}, result)
+        self.assertIs(data['other'], result['other'])
+
+    def test_copy_on_write_parser_promotes_data(self):
+        request = APIRequestFactory().get('')
+        request.version = 1
+        data = CopyOnWriteTestParser().parse(
+            stream=io.BytesIO(str.encode(json.dumps({'test_field_one': 'value_one'}))),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={
+                'request': request,
+            },
+        )
+        self.assertEqual({'new_test_field': 'value_one', 'new_related_object_id_list': [1, 2, 3, 4, 5]}, data)
+        self.assertIsInstance(data, dict)
+
+    def test_copy_on_write_serializer_matches_regular_serializer(self):
+        request = APIRequestFactory().get('')
+        request.version = 1
+        instance = TestModelV3(
+            test_field_two='value_two',
+            test_field_three='value_three',
+            test_field_four='value_four',
+            test_field_five='value_five',
+            new_test_field='value_one',
+        )
+        with patch.object(TestSerializerV3, 'to_latest_representation', side_effect=lambda instance: {
+            'new_test_field': 'value_one', 'new_related_object_id_list': [],
+        }):
+            self.assertEqual(
+                TestSerializerV3(instance, context={'request': request}).to_representation(instance),
+                CopyOnWriteTestSerializerV3(instance, context={'request': request}).to_representation(instance),
+            )
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.timings = []
+        instrumentation.connect(self.timings.append)
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+
+    def tearDown(self):
+        instrumentation.disconnect(self.timings.append)
+        transform_registry.invalidate()
+
+    def test_every_step_is_reported(self):
+        chain = get_transform_chain('tests.test_transforms.TestModelTransform', base_version=1, reverse=True)
+        chain.backwards({'new_test_field': 'value', 'new_related_object_id_list': []}, self.request, None)
+
+        self.assertEqual(
+            [
+                ('tests.test_transforms.TestModelTransform0003', 'backwards', 3, 1, 1),
+                ('tests.test_transforms.TestModelTransform0002', 'backwards', 2, 1, 1),
+            ],
+            [timing[:5] for timing in self.timings],
+        )
+        self.assertTrue(all(timing.elapsed >= 0 for timing in self.timings))
+
+    def test_batches_report_their_size(self):
+        chain = get_transform_chain('tests.test_transforms.TestModelTransform', base_version=2)
+        chain.forwards_many([{}, {}, {}], self.request)
+
+        self.assertEqual([('forwards_many', 3)], [(timing.direction, timing.items) for timing in self.timings])
+
+    def test_fused_steps_are_named_after_each_transform(self):
+        chain = get_transform_chain('tests.test_transforms.DeclarativeTestModelTransform', base_version=1)
+        chain.forwards({'test_field_one': 'value'}, self.request)
+
+        self.assertEqual(
+            [
+                (
+                    'tests.test_transforms.DeclarativeTestModelTransform0002+DeclarativeTestModelTransform0003'
+                    '+DeclarativeTestModelTransform0004+DeclarativeTestModelTransform0005',
+                    5,
+                ),
+            ],
+            [(timing.name, timing.version) for timing in self.timings],
+        )
+
+    def test_disconnected_hooks_are_not_called(self):
+        instrumentation.disconnect(self.timings.append)
+        chain = get_transform_chain('tests.test_transforms.TestModelTransform', base_version=1)
+        chain.forwards({'test_field_one': 'value'}, self.request)
+
+        self.assertEqual([], self.timings)
+
+
+class TimingAggregatorTests(TestCase):
+    def test_histogram_percentiles(self):
+        histogram = TimingHistogram()
+        for _ in range(98):
+            histogram.record(0.0000015)
+        histogram.record(0.3)
+        histogram.record(0.45)
+
+        self.assertEqual(100, histogram.count)
+        self.assertEqual(0.000002, histogram.percentile(50))
+        self.assertEqual(0.45, histogram.percentile(99))
+        self.assertEqual(0.45, histogram.max)
+
+    def test_slow_timings_are_counted_in_the_last_bucket(self):
+        histogram = TimingHistogram()
+        histogram.record(60)
+
+        self.assertEqual(1, histogram.counts[-1])
+        self.assertEqual(60, histogram.percentile(99))
+
+    def test_aggregates_per_transform_and_direction(self):
+        aggregator = TransformTimingAggregator()
+        aggregator(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        aggregator(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.003))
+        aggregator(TransformTiming('a.Transform0002', 'backwards', 2, 1, 1, 0.002))
+
+        snapshot = aggregator.snapshot()
+        self.assertEqual(2, snapshot[('a.Transform0002', 'forwards')].count)
+        self.assertAlmostEqual(0.002, snapshot[('a.Transform0002', 'forwards')].mean)
+        self.assertEqual(1, snapshot[('a.Transform0002', 'backwards')].count)
+
+    def test_collect_merges_published_histograms(self):
+        first = TransformTimingAggregator(cache_alias='default', key_prefix='test-timings')
+        second = TransformTimingAggregator(cache_alias='default', key_prefix='test-timings')
+        first(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        second(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        first.publish()
+        with patch.object(TransformTimingAggregator, 'process_key', 'test-timings:other-process'):
+            second.publish()
+
+        try:
+            self.assertEqual(2, first.collect()[('a.Transform0002', 'forwards')].count)
+        finally:
+            first.clear()
+        self.assertEqual({}, first.collect())
+
+    def test_expired_histograms_are_dropped_from_the_index(self):
+        first = TransformTimingAggregator(cache_alias='default', key_prefix='test-timings')
+        second = TransformTimingAggregator(cache_alias='default', key_prefix='test-timings')
+        first(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        second(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        first.publish()
+        with patch.object(TransformTimingAggregator, 'process_key', 'test-timings:exited-process'):
+            second.publish()
+
+        try:
+            first.cache.delete('test-timings:exited-process')
+            self.assertEqual(1, first.collect()[('a.Transform0002', 'forwards')].count)
+            self.assertEqual([first.process_key], first.cache.get(first.index_key))
+        finally:
+            first.clear()
+
+    def test_management_command_dumps_histograms(self):
+        timing_aggregator(TransformTiming('a.Transform0002', 'forwards', 2, 1, 1, 0.001))
+        timing_aggregator(TransformTiming('a.Transform0003', 'forwards', 3, 1, 1, 0.5))
+        stdout = io.StringIO()
+
+        try:
+            call_command('transform_timings', '--json', stdout=stdout)
+        finally:
+            timing_aggregator.clear()
+
+        dumped = json.loads(stdout.getvalue())
+        self.assertEqual(['a.Transform0003', 'a.Transform0002'], [entry['name'] for entry in dumped])
+        self.assertEqual(1, dumped[0]['count'])
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def test_finds_versioning_classes_by_transform_base(self):
+        classes = get_versioning_classes()
+
+        self.assertIn(TestParser, classes['tests.test_transforms.TestModelTransform'])
+        self.assertIn(TestSerializerV3, classes['tests.test_transforms.TestModelTransform'])
+        self.assertIn(DeclarativeTestParser, classes['tests.test_transforms.DeclarativeTestModelTransform'])
+
+    def test_warm_up_builds_every_chain(self):
+        self.assertEqual(['tests.test_transforms.TestModelTransform'], warm_up(['tests.test_transforms.TestModelTransform']))
+
+        index = transform_registry.get_index('tests.test_transforms.TestModelTransform')
+        self.assertEqual(
+            set((start, reverse, CompositeTransform) for start in range(3) for reverse in (False, True)),
+            set(index._chains),
+        )
+
+    @patch('rest_framework_transforms.warmup.logger')
+    def test_warm_up_skips_broken_transform_bases(self, logger):
+        self.assertEqual(
+            ['tests.test_transforms.TestModelTransform'],
+            warm_up(['tests.no_such_module.TestModelTransform', 'tests.test_transforms.TestModelTransform']),
+        )
+        self.assertTrue(logger.warning.called)
+
+    @patch('rest_framework_transforms.warmup.warm_up')
+    def test_app_only_warms_up_when_enabled(self, warm_up):
+        app_config = apps.get_app_config('rest_framework_transforms')
+
+        app_config.ready()
+        self.assertFalse(warm_up.called)
+
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'WARMUP': True, 'WARMUP_MODULES': ()}):
+            app_config.ready()
+        warm_up.assert_called_once_with()
+
+
+class TransformBaseCheckTests(TestCase):
+    def get_ids(self, transform_base):
+        return [message.id for message in check_transform_base(transform_base)]
+
+    def test_valid_transform_base(self):
+        self.assertEqual([], self.get_ids('tests.test_transforms.TestModelTransform'))
+        self.assertEqual([], self.get_ids('tests.test_transforms.DeclarativeTestModelTransform'))
+
+    def test_transform_base_without_module(self):
+        self.assertEqual(['rest_framework_transforms.E001'], self.get_ids('TestModelTransform'))
+
+    def test_missing_module(self):
+        self.assertEqual(['rest_framework_transforms.E002'], self.get_ids('tests.no_such_module.TestModelTransform'))
+
+    def test_no_transform_classes(self):
+        self.assertEqual(['rest_framework_transforms.E003'], self.get_ids('tests.test_transforms.NoSuchTransform'))
+
+    def test_gaps_in_versions(self):
+        messages = check_transform_base('tests.test_transforms.GappedTestModelTransform')
+
+        self.assertEqual(['rest_framework_transforms.W001'], [message.id for message in messages])
+        self.assertIn('3, 4', messages[0].msg)
+
+    def test_long_gaps_are_reported_as_ranges(self):
+        messages = check_transform_base('tests.test_transforms.WideGapTestModelTransform')
+
+        self.assertEqual(['rest_framework_transforms.W001'], [message.id for message in messages])
+        self.assertIn('skip version(s) 3, 5-99.', messages[0].msg)
+
+    def test_gaps_between_dated_transforms_are_not_reported(self):
+        self.assertEqual([], self.get_ids('tests.test_transforms.DatedTestModelTransform'))
+
+    def test_chains_that_cannot_be_built(self):
+        self.assertEqual(['rest_framework_transforms.E004'], self.get_ids('tests.test_transforms.BrokenTestModelTransform'))
+
+    def test_check_reports_the_versioning_class(self):
+        with patch('rest_framework_transforms.checks.get_versioning_classes', return_value={
+            'tests.no_such_module.TestModelTransform': [TestParser],
+        }):
+            messages = check_transform_bases()
+
+        self.assertEqual(['rest_framework_transforms.E002'], [message.id for message in messages])
+        self.assertIs(TestParser, messages[0].obj)
+
+    @patch('rest_framework_transforms.checks.get_versioning_classes', return_value={})
+    @patch('rest_framework_transforms.warmup.autodiscover_modules')
+    def test_check_imports_app_modules_first(self, autodiscover_modules, get_versioning_classes):
+        autodiscover_modules.side_effect = lambda *names: self.assertFalse(get_versioning_classes.called)
+
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'WARMUP': False}):
+            check_transform_bases()
+
+        autodiscover_modules.assert_called_once_with('serializers', 'parsers')
+        self.assertTrue(get_versioning_classes.called)
+
+    def test_check_is_registered(self):
+        from django.core import checks
+
+        self.assertIn(check_transform_bases, checks.registry.registry.get_checks())
+
+
+class FieldScopeTests(TestCase):
+    def test_operation_scopes(self):
+        self.assertEqual(FieldScope(frozenset(['a', 'b']), True), Rename('a', 'b').get_field_scope())
+        self.assertEqual(FieldScope(frozenset(['a']), True), Remove('a').get_field_scope())
+        self.assertEqual(FieldScope(frozenset(['a']), False), AddDefault('a').get_field_scope())
+        self.assertEqual(FieldScope(frozenset(['a', 'b', 'c']), False), Nest(['a', 'b'], 'c').get_field_scope())
+        self.assertEqual(FieldScope(frozenset(['a', 'b', 'c']), True), Flatten('c', ['a', 'b']).get_field_scope())
+
+    def test_combine(self):
+        self.assertEqual(
+            FieldScope(frozenset(['a', 'b', 'c']), False),
+            FieldScope.combine([Rename('a', 'b').get_field_scope(), AddDefault('c').get_field_scope()]),
+        )
+        self.assertEqual(
+            UNKNOWN_SCOPE,
+            FieldScope.combine([Rename('a', 'b').get_field_scope(), UNKNOWN_SCOPE]),
+        )
+
+    def test_declarative_scope_depends_on_direction(self):
+        transform = DeclarativeTransform(operations=[Remove('a')])
+
+        self.assertEqual(FieldScope(frozenset(['a']), True), transform.get_field_scope('forwards'))
+        self.assertEqual(FieldScope(frozenset(['a']), False), transform.get_field_scope('backwards'))
+
+    def test_transforms_without_fields_have_unknown_scope(self):
+        self.assertEqual(UNKNOWN_SCOPE, TestModelTransform0002().get_field_scope('forwards'))
+
+    def test_declared_fields(self):
+        self.assertEqual(
+            FieldScope(frozenset(['test_field_one', 'new_test_field']), True),
+            ScopedTestModelTransform0002().get_field_scope('backwards'),
+        )
+
+
+class ChainPruningTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.forwards_chain = get_transform_chain('tests.test_transforms.ScopedTestModelTransform', base_version=1)
+        self.backwards_chain = get_transform_chain('tests.test_transforms.ScopedTestModelTransform', base_version=1, reverse=True)
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def test_unaffected_steps_are_skipped(self):
+        self.assertEqual((), self.forwards_chain.select_steps('forwards', ['unrelated']))
+        self.assertEqual((2,), self.forwards_chain.select_steps('forwards', ['legacy_flag']))
+
+    def test_fields_written_by_earlier_steps_are_followed(self):
+        self.assertEqual((0, 1), self.forwards_chain.select_steps('forwards', ['test_field_one']))
+        self.assertEqual((1, 2), self.backwards_chain.select_steps('backwards', ['newest_test_field']))
+
+    def test_unknown_scopes_are_never_skipped(self):
+        chain = CompositeTransform([ScopedTestModelTransform0002(), TestModelTransform0003(), ScopedTestModelTransform0003()])
+
+        self.assertEqual((1, 2), chain.select_steps('forwards', ['unrelated']))
+
+    def test_pruned_chain_converts_partial_representations(self):
+        self.assertEqual({'newest_test_field': 1}, self.forwards_chain.forwards({'test_field_one': 1}, None))
+        self.assertEqual({'flag': True, 'other': 2}, self.forwards_chain.forwards({'legacy_flag': True, 'other': 2}, None))
+        self.assertEqual({'test_field_one': 1}, self.backwards_chain.backwards({'newest_test_field': 1}, None, None))
+
+    def test_pruned_chains_are_memoized(self):
+        self.forwards_chain.forwards({'legacy_flag': True}, None)
+        self.forwards_chain.forwards({'legacy_flag': False}, None)
+
+        self.assertEqual([('forwards', frozenset(['legacy_flag']))], list(self.forwards_chain._plans))
+
+    def test_memoized_plans_are_bounded(self):
+        self.forwards_chain.max_plans = 1
+        self.forwards_chain.forwards({'a': 1}, None)
+
+        self.assertEqual({'b': 1, 'flag': True}, self.forwards_chain.forwards({'b': 1, 'legacy_flag': True}, None))
+        self.assertEqual([('forwards', frozenset(['a']))], list(self.forwards_chain._plans))
+
+    def test_lists_are_pruned_by_the_fields_of_all_items(self):
+        self.assertEqual(
+            [{'newest_test_field': 1}, {'flag': True}],
+            self.forwards_chain.forwards_many([{'test_field_one': 1}, {'legacy_flag': True}], None),
+        )
+        self.assertEqual([('forwards_many', frozenset(['test_field_one', 'legacy_flag']))], list(self.forwards_chain._plans))
+
+
+class JumpTransformTests(TestCase):
+    transform_base = 'tests.test_transforms.JumpTestModelTransform'
+
+    def setUp(self):
+        transform_registry.invalidate()
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def make_transform(self, name, cost=1):
+        return type(name, (BaseTransform,), {'cost': cost})
+
+    def test_scan_finds_jump_transforms(self):
+        versioned, jumps = scan_transforms(self.transform_base)
+
+        self.assertEqual(
+            [(2, JumpTestModelTransform0002), (3, JumpTestModelTransform0003), (4, JumpTestModelTransform0004)],
+            versioned,
+        )
+        self.assertEqual([(1, 3, JumpTestModelTransform0001To0003)], jumps)
+
+    def test_cheaper_jump_is_taken(self):
+        self.assertEqual(
+            [JumpTestModelTransform0001To0003, JumpTestModelTransform0004],
+            get_transform_classes(self.transform_base, base_version=1),
+        )
+        self.assertEqual(
+            [JumpTestModelTransform0004, JumpTestModelTransform0001To0003],
+            get_transform_classes(self.transform_base, base_version=1, reverse=True),
+        )
+
+    def test_jump_is_not_taken_from_later_versions(self):
+        self.assertEqual(
+            [JumpTestModelTransform0003, JumpTestModelTransform0004],
+            get_transform_classes(self.transform_base, base_version=2),
+        )
+
+    def test_chain_through_jump_converts_representations(self):
+        request = APIRequestFactory().get('')
+        request.version = 1
+
+        self.assertEqual(
+            {'newest_test_field': 1, 'flag': True},
+            get_transform_chain(self.transform_base, base_version=1).forwards({'test_field_one': 1, 'legacy_flag': True}, request),
+        )
+        self.assertEqual(
+            {'test_field_one': 1, 'legacy_flag': True},
+            get_transform_chain(self.transform_base, base_version=1, reverse=True).backwards({'newest_test_field': 1, 'flag': True}, request, None),
+        )
+
+    def test_cost_hints(self):
+        first, second, third = self.make_transform('T0002'), self.make_transform('T0003'), self.make_transform('T0004')
+        expensive_jump = self.make_transform('T0001To0004', cost=5)
+        cheap_jump = self.make_transform('T0002To0004', cost=1.5)
+        index = TransformIndex([(2, first), (3, second), (4, third)], [(1, 4, expensive_jump), (2, 4, cheap_jump)])
+
+        self.assertEqual([first, cheap_jump], index.get_transform_classes(base_version=1))
+        self.assertEqual([cheap_jump], index.get_transform_classes(base_version=2))
+        self.assertEqual([third], index.get_transform_classes(base_version=3))
+        self.assertEqual([], index.get_transform_classes(base_version=4))
+
+    def test_jumps_to_versions_between_transforms(self):
+        first, second = self.make_transform('T0002'), self.make_transform('T0005')
+        jump = self.make_transform('T0001To0003', cost=0.5)
+        index = TransformIndex([(2, first), (5, second)], [(1, 3, jump)])
+
+        self.assertEqual([jump, second], index.get_transform_classes(base_version=1))
+
+    def test_ties_prefer_step_by_step_transforms(self):
+        first, second = self.make_transform('T0002'), self.make_transform('T0003')
+        jump = self.make_transform('T0001To0003', cost=2)
+        index = TransformIndex([(2, first), (3, second)], [(1, 3, jump)])
+
+        self.assertEqual([first, second], index.get_transform_classes(base_version=1))
+
+    def test_backwards_jumps_are_ignored_and_reported(self):
+        self.assertEqual(
+            [BadJumpTestModelTransform0002],
+            get_transform_classes('tests.test_transforms.BadJumpTestModelTransform', base_version=1),
+        )
+        self.assertEqual(
+            ['rest_framework_transforms.E005'],
+            [message.id for message in check_transform_base('tests.test_transforms.BadJumpTestModelTransform')],
+        )
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason='async transforms require Python 3.5')
+class AsyncTransformTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        ConcurrentTestModelTransform0002.most_in_flight = 0
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_async_chain_awaits_async_steps_and_calls_sync_steps(self):
+        chain = get_transform_chain('tests.test_async.AsyncTestModelTransform', base_version=1, chain_class=AsyncCompositeTransform)
+
+        self.assertEqual(
+            {'new_test_field': 'a', 'new_related_object_id_list': [1, 2, 3, 4, 5]},
+            self.run_async(chain.aforwards({'test_field_one': 'a'}, self.request)),
+        )
+        self.assertEqual(
+            {'test_field_one': 'a'},
+            self.run_async(chain.abackwards({'new_test_field': 'a', 'new_related_object_id_list': []}, self.request, None)),
+        )
+
+    def test_async_and_sync_chains_are_cached_separately(self):
+        sync_chain = get_transform_chain('tests.test_async.AsyncTestModelTransform', base_version=1)
+        async_chain = get_transform_chain('tests.test_async.AsyncTestModelTransform', base_version=1, chain_class=AsyncCompositeTransform)
+
+        self.assertIsInstance(async_chain, AsyncCompositeTransform)
+        self.assertNotIsInstance(sync_chain, AsyncCompositeTransform)
+        self.assertIs(async_chain, get_transform_chain('tests.test_async.AsyncTestModelTransform', base_version=1, chain_class=AsyncCompositeTransform))
+
+    def test_sync_chains_run_async_steps(self):
+        chain = get_transform_chain('tests.test_async.AsyncTestModelTransform', base_version=2)
+
+        self.assertEqual({'test_field_one': 'a'}, chain.backwards({'test_field_one': 'a', 'new_related_object_id_list': []}, None, None))
+        self.assertEqual({'new_test_field': 'a'}, AsyncTestModelTransform0002().forwards({'test_field_one': 'a'}, None))
+
+    def test_lists_are_converted_concurrently(self):
+        chain = AsyncCompositeTransform([ConcurrentTestModelTransform0002()])
+
+        items = self.run_async(chain.abackwards_many([{'id': i} for i in range(5)], None, list(range(5))))
+
+        self.assertEqual([{'id': i, 'instance': i} for i in range(5)], items)
+        self.assertEqual(5, ConcurrentTestModelTransform0002.most_in_flight)
+
+    def test_concurrency_is_limited(self):
+        chain = AsyncCompositeTransform([LimitedConcurrentTestModelTransform0002()])
+
+        self.run_async(chain.abackwards_many([{'id': i} for i in range(5)], None, list(range(5))))
+
+        self.assertEqual(2, ConcurrentTestModelTransform0002.most_in_flight)
+
+    def test_async_steps_are_timed(self):
+        timings = []
+        instrumentation.connect(timings.append)
+        self.addCleanup(instrumentation.disconnect, timings.append)
+        chain = AsyncCompositeTransform([AsyncTestModelTransform0002()])
+
+        self.run_async(chain.aforwards({'test_field_one': 'a'}, self.request))
+
+        self.assertEqual([('tests.test_async.AsyncTestModelTransform0002', 'forwards', 2, 1)], [timing[:4] for timing in timings])
+
+    def test_parser_aparse_promotes_request_data(self):
+        data = self.run_async(AsyncTestParser().aparse(
+            io.BytesIO(json.dumps({'test_field_one': 'a'}).encode('utf-8')),
+            parser_context={'request': self.request},
+        ))
+
+        self.assertEqual({'new_test_field': 'a', 'new_related_object_id_list': [1, 2, 3, 4, 5]}, data)
+
+    def test_parser_aparse_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            self.run_async(AsyncTestParser().aparse(io.BytesIO(b'{'), parser_context={'request': self.request}))
+
+    def test_serializer_ato_representation_demotes_instance(self):
+        instance = MagicMock(new_test_field='a', new_related_object_id_list=[1])
+        serializer = AsyncTestSerializer(instance, context={'request': self.request})
+
+        self.assertEqual({'test_field_one': 'a'}, self.run_async(serializer.ato_representation(instance)))
+
+    def test_list_serializer_ato_representation_requires_transform_base(self):
+        serializer = AsyncTestSerializer([], many=True, context={'request': self.request})
+        serializer.child.transform_base = None
+
+        with self.assertRaises(TransformBaseNotDeclaredException):
+            self.run_async(serializer.ato_representation([]))
+
+    def test_list_serializer_ato_representation_demotes_items(self):
+        instances = [MagicMock(new_test_field=name, new_related_object_id_list=[1]) for name in 'ab']
+        serializer = AsyncTestSerializer(instances, many=True, context={'request': self.request})
+
+        self.assertEqual(
+            [{'test_field_one': 'a'}, {'test_field_one': 'b'}],
+            self.run_async(serializer.ato_representation(instances)),
+        )
+
+
+class DemotionExecutorTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.chain = MagicMock(backwards_many=MagicMock(side_effect=lambda items, request, instances: [
+            dict(item, instance=instance) for item, instance in zip(items, instances)
+        ]))
+
+    def tearDown(self):
+        transform_registry.invalidate()
+        shutdown_demotion_executors()
+
+    def make_items(self, count):
+        return [{'new_test_field': str(index), 'new_related_object_id_list': []} for index in range(count)]
+
+    def test_small_lists_are_demoted_inline(self):
+        executor = ThreadPoolDemotionExecutor(chunk_size=2, threshold=5)
+        self.addCleanup(executor.shutdown)
+
+        executor.backwards_many(None, self.chain, self.make_items(4), self.request, list(range(4)))
+
+        self.assertEqual(1, self.chain.backwards_many.call_count)
+        self.assertIsNone(executor._pool)
+
+    def test_large_lists_are_demoted_in_ordered_chunks(self):
+        executor = ThreadPoolDemotionExecutor(max_workers=3, chunk_size=2, threshold=5)
+        self.addCleanup(executor.shutdown)
+
+        items = executor.backwards_many(None, self.chain, self.make_items(5), self.request, list(range(5)))
+
+        self.assertEqual(3, self.chain.backwards_many.call_count)
+        self.assertEqual(list(range(5)), [item['instance'] for item in items])
+        self.assertEqual([str(index) for index in range(5)], [item['new_test_field'] for item in items])
+
+    def test_serializer_demotes_lists_with_its_executor(self):
+        instances = [MagicMock(new_test_field=str(index), new_related_object_id_list=[index]) for index in range(7)]
+        serializer = ParallelTestSerializer(instances, many=True, context={'request': self.request})
+
+        self.assertEqual([{'test_field_one': str(index)} for index in range(7)], serializer.data)
+
+    def test_process_pool_rebuilds_chains_in_workers(self):
+        executor = ProcessPoolDemotionExecutor(max_workers=2, chunk_size=2, threshold=3)
+        self.addCleanup(executor.shutdown)
+        serializer = ParallelTestSerializer()
+
+        items = executor.backwards_many(serializer, None, self.make_items(5), self.request, [None] * 5)
+
+        self.assertEqual([{'test_field_one': str(index)} for index in range(5)], items)
+
+    @patch('rest_framework_transforms.executors._inherited_connections', [])
+    @patch('rest_framework_transforms.executors.connections')
+    def test_workers_drop_inherited_connections_without_closing_them(self, connections):
+        connection = MagicMock()
+        connections.__iter__.return_value = iter(['default'])
+        connections.__getitem__.return_value = connection
+
+        demote_chunk(os.getpid(), 'tests.test_transforms.TestModelTransform', 1, 1, False, self.make_items(2), [None] * 2)
+        self.assertFalse(connections.__delitem__.called)
+
+        for _ in range(2):
+            demote_chunk(-1, 'tests.test_transforms.TestModelTransform', 1, 1, False, self.make_items(2), [None] * 2)
+        connections.__delitem__.assert_called_once_with('default')
+        self.assertFalse(connection.close.called)
+
+    def test_executor_is_configured_by_settings(self):
+        self.assertIsInstance(get_demotion_executor(), InlineDemotionExecutor)
+
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'DEMOTION_EXECUTOR': 'thread', 'DEMOTION_WORKERS': 4, 'DEMOTION_CHUNK_SIZE': 50}):
+            executor = get_demotion_executor()
+            self.assertIsInstance(executor, ThreadPoolDemotionExecutor)
+            self.assertEqual((4, 50, 1000), (executor.max_workers, executor.chunk_size, executor.threshold))
+            self.assertIs(executor, get_demotion_executor())
+
+    def test_unknown_executor_setting_is_rejected(self):
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'DEMOTION_EXECUTOR': 'gpu'}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_demotion_executor()
+
+
+class VersionResolutionTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.request = APIRequestFactory().get('')
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def test_unversioned_requests_are_served_at_the_latest_version(self):
+        self.request.version = None
+        body = io.BytesIO(b'{"new_test_field": "value"}')
+
+        data = TestParser().parse(body, 'application/vnd.test.testtype+json', {'request': self.request})
+        representation = SharedTestSerializer(TestModelV3(pk=1, new_test_field='one'), context={'request': self.request}).data
+
+        self.assertEqual(LATEST_VERSION, resolve_version(None))
+        self.assertEqual({'new_test_field': 'value'}, data)
+        self.assertEqual({'new_test_field': 'one', 'new_related_object_id_list': []}, representation)
+
+    def test_versions_are_parsed_into_sortable_tuples(self):
+        self.assertEqual((3,), parse_version(3))
+        self.assertEqual((3,), parse_version('v3'))
+        self.assertEqual((3,), parse_version(' 3 '))
+        self.assertEqual((2024, 1, 1), parse_version('2024-01-01'))
+        self.assertEqual((1, 10, 0), parse_version('1.10.0'))
+        self.assertLess(parse_version('1.9'), parse_version('1.10'))
+
+    def test_invalid_versions_are_rejected(self):
+        for version in ('latest', '', None, True, '1..2'):
+            with self.assertRaises(InvalidVersionException):
+                parse_version(version)
+
+    def test_numbers_and_dates_resolve_without_settings(self):
+        self.assertEqual(2, resolve_version(2))
+        self.assertEqual(2, resolve_version('v2'))
+        self.assertEqual(20240101, resolve_version('2024-01-01'))
+        with self.assertRaises(InvalidVersionException):
+            resolve_version('1.2.0')
+
+    def test_listed_versions_resolve_to_their_position(self):
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'VERSIONS': ('1.0', '2.0', '1.1')}):
+            self.assertEqual(
+                [0, 1, 2, 2, 3, 3],
+                [resolve_version(version) for version in ('0.9', '1.0', '1.1', '1.5', '2.0', '2.1')],
+            )
+            self.assertEqual(2, resolve_version(2))
+
+    def test_duplicate_listed_versions_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            VersionIndex(['1.0', 'v1.0'])
+
+    def test_request_version_is_resolved_once(self):
+        self.request.version = 'v2'
+
+        with patch('rest_framework_transforms.versions.resolve_version', return_value=2) as resolve:
+            self.assertEqual(2, get_request_version(self.request))
+            self.assertEqual(2, get_request_version(self.request))
+            self.assertEqual(1, resolve.call_count)
+
+        self.request.version = 'v1'
+        self.assertEqual(1, get_request_version(self.request))
+
+    def test_string_versions_select_transforms(self):
+        self.assertEqual(
+            [TestModelTransform0003],
+            get_transform_classes('tests.test_transforms.TestModelTransform', base_version='v2'),
+        )
+        self.assertIs(
+            get_transform_chain('tests.test_transforms.TestModelTransform', base_version=2),
+            get_transform_chain('tests.test_transforms.TestModelTransform', base_version='v2'),
+        )
+
+    def test_serializer_demotes_to_string_version(self):
+        self.request.version = 'v1'
+        instance = MagicMock(new_test_field='a', new_related_object_id_list=[1])
+
+        self.assertEqual({'test_field_one': 'a'}, ParallelTestSerializer(instance, context={'request': self.request}).data)
+
+
+class LazyDemotionTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.chain = get_transform_chain('tests.test_transforms.ScopedTestModelTransform', base_version=1, reverse=True)
+        self.latest = {'newest_test_field': 'a', 'flag': True, 'nested': {'list': [1]}}
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def test_output_fields_depend_on_the_steps_that_touch_them(self):
+        self.assertEqual(
+            ((1, 2), frozenset(['test_field_one', 'new_test_field', 'newest_test_field'])),
+            self.chain.select_output_steps('backwards', ['test_field_one']),
+        )
+        self.assertEqual(((0,), frozenset(['legacy_flag', 'flag'])), self.chain.select_output_steps('backwards', ['legacy_flag']))
+        self.assertEqual(((), frozenset(['nested'])), self.chain.select_output_steps('backwards', ['nested']))
+
+    def test_unknown_scopes_depend_on_everything(self):
+        chain = CompositeTransform([ScopedTestModelTransform0003(), TestModelTransform0003()])
+
+        self.assertIsNone(chain.select_output_steps('backwards', ['nested']))
+
+    def test_fields_are_demoted_on_access(self):
+        lazy = LazyRepresentation(self.latest, self.chain, self.request, None)
+
+        self.assertEqual('a', lazy['test_field_one'])
+        self.assertTrue(lazy['legacy_flag'])
+        self.assertEqual({'list': [1]}, lazy['nested'])
+        self.assertNotIn('newest_test_field', lazy)
+        self.assertFalse(lazy.is_evaluated)
+
+    def test_unread_fields_are_never_demoted(self):
+        original = ScopedTestModelTransform0002.backwards
+        with patch.object(ScopedTestModelTransform0002, 'backwards', autospec=True, side_effect=original) as backwards:
+            transform_registry.invalidate()
+            chain = get_transform_chain('tests.test_transforms.ScopedTestModelTransform', base_version=1, reverse=True)
+            lazy = LazyRepresentation(self.latest, chain, self.request, None)
+
+            self.assertEqual({'legacy_flag': True}, lazy.only(['legacy_flag', 'flag']))
+            self.assertEqual(0, backwards.call_count)
+            lazy['test_field_one']
+            lazy['test_field_one']
+            self.assertEqual(1, backwards.call_count)
+
+    def test_evaluation_matches_eager_demotion_and_keeps_the_data(self):
+        latest = copy.deepcopy(self.latest)
+        lazy = LazyRepresentation(latest, self.chain, self.request, None)
+        lazy['legacy_flag']
+
+        self.assertEqual(self.chain.backwards(copy.deepcopy(self.latest), self.request, None), dict(lazy))
+        self.assertTrue(lazy.is_evaluated)
+        self.assertEqual(self.latest, latest)
+
+    def test_unknown_scopes_evaluate_everything(self):
+        chain = CompositeTransform([TestModelTransform0002()])
+        lazy = LazyRepresentation({'new_test_field': 'a'}, chain, self.request, None)
+
+        self.assertEqual('a', lazy['test_field_one'])
+        self.assertTrue(lazy.is_evaluated)
+        with self.assertRaises(KeyError):
+            lazy['new_test_field']
+
+    def test_serializer_returns_lazy_representations(self):
+        instances = [MagicMock(newest_test_field=name, flag=True) for name in 'ab']
+        serializer = LazyTestSerializer(instances, many=True, context={'request': self.request})
+
+        data = serializer.data
+
+        self.assertTrue(all(isinstance(item, LazyRepresentation) for item in data))
+        self.assertEqual({'test_field_one': 'a'}, data[0].only(['test_field_one']))
+        self.assertEqual(
+            [{'test_field_one': 'a', 'legacy_flag': True}, {'test_field_one': 'b', 'legacy_flag': True}],
+            json.loads(JSONRenderer().render(data).decode('utf-8')),
+        )
+        self.assertIsInstance(LazyTestSerializer(context={'request': self.request}).to_representation(instances[0]), LazyRepresentation)
+
+
+class CodeGenerationTests(TestCase):
+    operations = [
+        Rename('a', 'b'),
+        Remove('c'),
+        AddDefault('d', list),
+        Rename('b', 'e'),
+        AddDefault('e', 0),
+    ]
+
+    def setUp(self):
+        transform_registry.invalidate()
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def run_generate_transform(self, *args, **kwargs):
+        out = io.StringIO()
+        call_command(
+            'generate_transform', 'tests.test_serializers.TestSerializer', 'tests.test_serializers.TestSerializerV3',
+            stdout=out, *args, **kwargs
+        )
+        return out.getvalue()
+
+    def load_transform(self, source, name):
+        namespace = {}
+        exec(compile(source, '<generated module>', 'exec'), namespace)
+        return namespace[name]
+
+    def test_generated_functions_match_field_maps(self):
+        field_map = FieldMap()
+        for operation in self.operations:
+            operation.fold(field_map)
+        field_map.compile()
+        function = generate_function(self.operations)
+
+        for data in ({}, {'a': 1, 'c': 2}, {'a': 1, 'e': 2, 'd': [3]}, {'b': 1, 'c': 2, 'x': 3}):
+            self.assertEqual(field_map(dict(data)), function(dict(data)))
+        self.assertNotIn('for ', function.source)
+
+    def test_declarative_transforms_can_generate_code(self):
+        generated = DeclarativeTransform(operations=self.operations, generate_code=True)
+        folded = DeclarativeTransform(operations=self.operations)
+
+        self.assertTrue(hasattr(generated.get_plans()[0].steps[0], 'source'))
+        self.assertEqual(folded.forwards({'a': 1, 'c': 2}, None), generated.forwards({'a': 1, 'c': 2}, None))
+        self.assertEqual(folded.backwards({'e': 1, 'd': []}, None, None), generated.backwards({'e': 1, 'd': []}, None, None))
+
+    def test_serializers_are_diffed(self):
+        diff = diff_serializers(TestSerializer, TestSerializerV3, [('test_field_one', 'new_test_field')])
+
+        self.assertEqual(
+            ["Rename('test_field_one', 'new_test_field')", "AddDefault('new_related_object_id_list', None)"],
+            [repr(operation) for operation in diff.operations],
+        )
+        self.assertEqual([], diff.changed_fields)
+        self.assertEqual(
+            ["Remove('test_field_one')", "AddDefault('new_test_field', None)", "AddDefault('new_related_object_id_list', None)"],
+            [repr(operation) for operation in diff_serializers(TestSerializer, TestSerializerV3).operations],
+        )
+
+    def test_unknown_renamed_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            diff_serializers(TestSerializer, TestSerializerV3, [('missing', 'new_test_field')])
+        with self.assertRaises(CommandError):
+            self.run_generate_transform(rename=['missing:new_test_field'])
+
+    def test_command_generates_straight_line_transforms(self):
+        source = self.run_generate_transform(rename=['test_field_one:new_test_field'])
+        transform = self.load_transform(source, 'TestModelTransform0004')()
+
+        self.assertEqual(
+            {'new_test_field': 'a', 'new_related_object_id_list': None},
+            transform.forwards({'test_field_one': 'a'}, None),
+        )
+        self.assertEqual({'test_field_one': 'a'}, transform.backwards({'new_test_field': 'a', 'new_related_object_id_list': []}, None, None))
+        self.assertEqual(
+            FieldScope(frozenset(['test_field_one', 'new_test_field', 'new_related_object_id_list']), False),
+            transform.get_field_scope('forwards'),
+        )
+        self.assertTrue(transform.get_field_scope('backwards').conditional)
+
+    def test_command_generates_declarative_transforms(self):
+        source = self.run_generate_transform(name='MyTransform0002', declarative=True, rename=['test_field_one:new_test_field'])
+        transform_class = self.load_transform(source, 'MyTransform0002')
+
+        self.assertTrue(issubclass(transform_class, DeclarativeTransform))
+        self.assertTrue(transform_class.generate_code)
+        self.assertEqual(
+            {'new_test_field': 'a', 'new_related_object_id_list': None},
+            transform_class().forwards({'test_field_one': 'a'}, None),
+        )
+
+    def test_non_literal_defaults_are_flagged(self):
+        source = generate_transform_module('T0002', [AddDefault('tags', list), AddDefault('owner', object())])
+
+        self.assertEqual(1, source.count('# TODO: replace the None default'))
+        self.assertEqual({'tags': [], 'owner': None}, self.load_transform(source, 'T0002')().forwards({}, None))
+
+
+class SharedTransformInstanceTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def test_transform_instances_are_shared_between_chains(self):
+        chains = [
+            get_transform_chain('tests.test_transforms.TestModelTransform', base_version=base_version, reverse=reverse)
+            for base_version in (1, 2)
+            for reverse in (False, True)
+        ]
+
+        shared = [
+            step for chain in chains for step in chain.steps if isinstance(step, TestModelTransform0003)
+        ]
+        self.assertEqual(4, len(shared))
+        self.assertEqual(1, len(set(id(step) for step in shared)))
+
+    def test_fused_transforms_are_shared_between_directions(self):
+        instances = {}
+        classes = [DeclarativeTestModelTransform0002, DeclarativeTestModelTransform0003]
+
+        forwards = build_transform_chain(classes, instances=instances)
+        self.assertIs(forwards[0], build_transform_chain(list(reversed(classes)), reverse=True, instances=instances)[0])
+        self.assertIsNot(forwards[0], build_transform_chain(classes[1:], instances=instances)[0])
+
+    def test_slotted_transforms_have_no_instance_dictionary(self):
+        class SlottedTransform0002(BaseTransform):
+            __slots__ = ()
+
+        self.assertFalse(hasattr(SlottedTransform0002(), '__dict__'))
+        self.assertFalse(hasattr(CopyOnWriteTransform(CompositeTransform([])), '__dict__'))
+
+    def test_request_state_is_kept_on_the_request(self):
+        first, second = APIRequestFactory().get(''), APIRequestFactory().get('')
+
+        state = TestModelTransform0002().get_request_state(first)
+        state['prefetched'] = True
+
+        self.assertIs(state, TestModelTransform0002().get_request_state(first))
+        self.assertEqual({}, TestModelTransform0002().get_request_state(second))
+        self.assertEqual({}, TestModelTransform0003().get_request_state(first))
+        self.assertIsNot(TestModelTransform0002().get_request_state(None), TestModelTransform0002().get_request_state(None))
+
+
+class TransformContextTests(TestCase):
+    def setUp(self):
+        transform_registry.invalidate()
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.one = TestModelV3(pk=1, new_test_field='one')
+        self.two = TestModelV3(pk=2, new_test_field='two')
+        self.tree = MagicMock(first=self.one, second=self.one, items=[self.one, self.two, self.two])
+
+    def tearDown(self):
+        transform_registry.invalidate()
+
+    def count_serializations(self, serializer_class, tree_serializer_class):
+        original = serializer_class.to_latest_representation
+        with patch.object(serializer_class, 'to_latest_representation', autospec=True, side_effect=original) as serialize:
+            data = tree_serializer_class(self.tree, context={'request': self.request}).data
+        return data, serialize.call_count
+
+    def test_each_instance_in_the_tree_is_demoted_once(self):
+        data, serializations = self.count_serializations(SharedTestSerializer, SharedTreeTestSerializer)
+
+        self.assertEqual(2, serializations)
+        self.assertEqual({'test_field_one': 'one'}, data['first'])
+        self.assertEqual({'test_field_one': 'one'}, data['second'])
+        self.assertEqual([{'test_field_one': 'one'}, {'test_field_one': 'two'}, {'test_field_one': 'two'}], data['items'])
+
+    def test_serializers_with_different_fields_do_not_share(self):
+        self.request.version = 2
+        data = BriefAndFullTreeTestSerializer(self.tree, context={'request': self.request}).data
+
+        self.assertEqual({}, data['brief'])
+        self.assertEqual({'new_test_field': 'one'}, data['full'])
+
+    def test_sharing_is_off_by_default(self):
+        self.assertFalse(BaseVersioningSerializer.share_representations)
+
+    def test_shared_representations_are_copies(self):
+        data = SharedTreeTestSerializer(self.tree, context={'request': self.request}).data
+
+        self.assertIsNot(data['first'], data['second'])
+        self.assertIsNot(data['items'][1], data['items'][2])
+
+    def test_sharing_can_be_disabled(self):
+        data, serializations = self.count_serializations(UnsharedTestSerializer, UnsharedTreeTestSerializer)
+
+        self.assertEqual(5, serializations)
+        self.assertEqual({'test_field_one': 'one'}, data['first'])
+
+    def test_unsaved_instances_are_not_shared(self):
+        self.assertIsNone(SharedTestSerializer().get_shared_representation_key(TestModelV3(new_test_field='x')))
+        self.assertIsNone(SharedTestSerializer().get_shared_representation_key(MagicMock(pk=1)))
+
+    def test_chains_are_resolved_once_per_tree(self):
+        with patch.object(SharedTestSerializer, 'get_backwards_chain', autospec=True, side_effect=SharedTestSerializer.get_backwards_chain) as get_chain:
+            self.tree.second = self.two
+            self.tree.items = [TestModelV3(pk=3, new_test_field='three')]
+            SharedTreeTestSerializer(self.tree, context={'request': self.request}).data
+
+        self.assertEqual(1, get_chain.call_count)
+
+    def test_context_is_replaced_for_another_request(self):
+        context = {'request': self.request}
+        first = SharedTestSerializer(context=context).get_transform_context(self.request)
+
+        self.assertIs(first, context[TRANSFORM_CONTEXT_KEY])
+        self.assertIsInstance(first, TransformContext)
+        self.assertIsNot(first, SharedTestSerializer(context=context).get_transform_context(APIRequestFactory().get('')))
+
+
+class JSONDecoderTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.body = json.dumps({'test_field_one': u'caf\xe9', 'test_field_two': 2})
+
+    def parse(self, body, parser=None, encoding='utf-8'):
+        return (parser or TestParser()).parse(
+            stream=io.BytesIO(body),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={'request': self.request, 'encoding': encoding},
+        )
+
+    def test_json_is_the_default(self):
+        self.assertEqual(('json', json.loads), get_json_decoder())
+
+    def test_first_importable_decoder_is_used(self):
+        self.assertEqual(('json.loads', json.loads), get_json_decoder(('tests.missing_decoder.loads', 'json.loads')))
+
+    def test_falls_back_to_json_when_no_decoder_is_importable(self):
+        with patch('rest_framework_transforms.decoders.logger') as logger:
+            self.assertEqual(('json', json.loads), get_json_decoder(('tests.other_missing_decoder.loads',)))
+
+        self.assertEqual(1, logger.warning.call_count)
+
+    @pytest.mark.skipif(sys.version_info < (3, 6), reason='orjson requires Python 3.6')
+    def test_orjson_is_used_when_installed(self):
+        orjson = pytest.importorskip('orjson')
+
+        self.assertEqual(('orjson', orjson.loads), get_json_decoder(('orjson', 'json')))
+
+    def test_setting_selects_the_decoder(self):
+        del loaded_bodies[:]
+        with override_settings(REST_FRAMEWORK_TRANSFORMS={'JSON_DECODER': 'tests.test_parsers.recording_loads'}):
+            data = self.parse(self.body.encode('utf-8'))
+
+        self.assertEqual([self.body.encode('utf-8')], loaded_bodies)
+        self.assertEqual(u'caf\xe9', data['new_test_field'])
+
+    def test_parser_attribute_overrides_the_setting(self):
+        parser = TestParser()
+        parser.json_decoder = 'json.loads'
+
+        self.assertEqual(self.parse(self.body.encode('utf-8')), self.parse(self.body.encode('utf-8'), parser))
+
+    def test_other_charsets_are_decoded_before_parsing(self):
+        parser = TestParser()
+        parser.json_decoder = 'json.loads'
+        body = json.dumps({'test_field_one': u'caf\xe9'}, ensure_ascii=False).encode('latin-1')
+
+        self.assertEqual(u'caf\xe9', self.parse(body, parser, encoding='latin-1')['new_test_field'])
+
+    def test_decoding_errors_raise_parse_error(self):
+        parser = TestParser()
+        parser.json_decoder = 'json.loads'
+
+        with self.assertRaises(ParseError):
+            self.parse(b'{"test_field_one": ', parser)
+
+
+class LatestVersionFastPathTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 3
+        self.instances = [
+            TestModel(test_field_one='one_%d' % i, test_field_two='two', test_field_three='three',
+                      test_field_four='four', test_field_five='five')
+            for i in range(3)
+        ]
+
+    def test_latest_version_is_precomputed(self):
+        index = TransformIndex([(2, TestModelTransform0002), (3, TestModelTransform0003)])
+
+        self.assertEqual(3, index.latest_version)
+        self.assertTrue(index.is_latest(3))
+        self.assertTrue(index.is_latest(4))
+        self.assertFalse(index.is_latest(2))
+        self.assertTrue(TransformIndex([]).is_latest(1))
+
+    def test_is_latest_version_resolves_version_strings(self):
+        self.assertTrue(is_latest_version('tests.test_transforms.TestModelTransform', 'v3'))
+        self.assertFalse(is_latest_version('tests.test_transforms.TestModelTransform', 'v1'))
+
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_parser_returns_decoded_data_at_latest_version(self, get_transform_chain_mock):
+        data = TestParser().parse(
+            stream=io.BytesIO(b'{"new_test_field": "value"}'),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={'request': self.request},
+        )
+
+        self.assertFalse(get_transform_chain_mock.called)
+        self.assertEqual({'new_test_field': 'value'}, data)
+
+    @patch('rest_framework_transforms.parsers.get_transform_chain')
+    def test_streaming_parser_passes_items_through_at_latest_version(self, get_transform_chain_mock):
+        data = StreamingTestParser().parse(
+            stream=io.BytesIO(b'[{"a": 1}, {"a": 2}]'),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={'request': self.request},
+        )
+
+        self.assertEqual([{'a': 1}, {'a': 2}], list(data))
+        self.assertFalse(get_transform_chain_mock.called)
+
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_serializer_skips_transforms_at_latest_version(self, get_transform_chain_mock):
+        serializer = TestSerializer(self.instances[0], context={'request': self.request})
+
+        self.assertEqual(MatchingSerializer(self.instances[0]).data, serializer.data)
+        self.assertFalse(get_transform_chain_mock.called)
+        self.assertNotIn(TRANSFORM_CONTEXT_KEY, serializer.context)
+
+    @patch('rest_framework_transforms.serializers.get_transform_chain')
+    def test_list_serializer_skips_child_to_representation_at_latest_version(self, get_transform_chain_mock):
+        serializer = TestSerializer(self.instances, many=True, context={'request': self.request})
+
+        with patch.object(BaseVersioningSerializer, 'to_representation') as to_representation:
+            data = serializer.data
+
+        self.assertFalse(to_representation.called)
+        self.assertFalse(get_transform_chain_mock.called)
+        self.assertEqual(MatchingSerializer(self.instances, many=True).data, data)
+
+    def test_older_versions_still_run_transforms(self):
+        self.request.version = 2
+        instances = [TestModelV3(pk=1, new_test_field='one')]
+        data = SharedTestSerializer(instances, many=True, context={'request': self.request}).data
+
+        self.assertEqual([{'new_test_field': 'one'}], data)
+
+
+class RenameOnlyChainTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.data = {'id': 1, 'test_field_one': 'one', 'test_field_two': 'two', 'test_field_three': 'three'}
+
+    def run_steps(self, chain, direction, data):
+        for step in chain.steps:
+            data = getattr(step, direction)(*((data, self.request) if direction == 'forwards' else (data, self.request, None)))
+        return data
+
+    def test_rename_only_chains_are_detected(self):
+        chain = get_transform_chain('tests.test_transforms.RenameTestModelTransform', base_version=1)
+
+        self.assertEqual(
+            (('test_field_one', 'new_test_field'), ('new_test_field', 'newest_test_field'), ('test_field_two', 'renamed_field_two')),
+            chain.renames['forwards'],
+        )
+        self.assertIsNone(get_transform_chain('tests.test_transforms.DeclarativeTestModelTransform', base_version=1).renames['forwards'])
+        self.assertIsNone(CompositeTransform([TestModelTransform0002()]).renames['backwards'])
+        self.assertIsNone(CompositeTransform([]).renames['backwards'])
+
+    def test_overridden_methods_are_not_rename_only(self):
+        class OverriddenTransform(RenameTestModelTransform0002):
+            def backwards(self, data, request, instance):
+                return data
+
+        self.assertIsNone(OverriddenTransform().get_renames('backwards'))
+        self.assertEqual((('new_test_field', 'test_field_one'),), RenameTestModelTransform0002().get_renames('backwards'))
+
+    def test_forwards_matches_running_each_step(self):
+        chain = CompositeTransform([RenameTestModelTransform0002(), RenameTestModelTransform0003()])
+
+        data = chain.forwards(dict(self.data), self.request)
+
+        self.assertEqual(self.run_steps(chain, 'forwards', dict(self.data)), data)
+        self.assertEqual(['id', 'newest_test_field', 'renamed_field_two', 'test_field_three'], list(data))
+
+    def test_backwards_matches_running_each_step(self):
+        chain = get_transform_chain('tests.test_transforms.RenameTestModelTransform', base_version=1, reverse=True)
+        data = {'id': 1, 'newest_test_field': 'one', 'renamed_field_two': 'two', 'test_field_three': 'three'}
+
+        self.assertEqual(self.data, chain.backwards(dict(data), self.request, None))
+        self.assertEqual(self.data, self.run_steps(chain, 'backwards', dict(data)))
+
+    def test_renamed_fields_replace_existing_fields(self):
+        chain = CompositeTransform([RenameTestModelTransform0002(), RenameTestModelTransform0003()])
+        data = {'test_field_one': 'one', 'new_test_field': 'stale', 'newest_test_field': 'stale'}
+
+        self.assertEqual({'newest_test_field': 'one'}, chain.forwards(dict(data), self.request))
+        self.assertEqual(self.run_steps(chain, 'forwards', dict(data)), chain.forwards(dict(data), self.request))
+
+    def test_rename_tables_are_built_once_per_set_of_fields(self):
+        chain = CompositeTransform([RenameTestModelTransform0002(), RenameTestModelTransform0003()])
+        keys = frozenset(self.data)
+
+        self.assertIs(chain.get_rename_table('forwards', keys), chain.get_rename_table('forwards', keys))
+
+    def test_lists_are_renamed(self):
+        chain = get_transform_chain('tests.test_transforms.RenameTestModelTransform', base_version=2, reverse=True)
+        items = [{'newest_test_field': i} for i in range(3)]
+
+        self.assertEqual([{'new_test_field': i} for i in range(3)], chain.backwards_many(items, self.request, [None] * 3))
+
+    def test_serializer_output_is_renamed_in_one_step(self):
+        instances = [MagicMock(id=i, newest_test_field='one', renamed_field_two='two') for i in range(2)]
+        with patch.object(CompositeTransform, 'rename', autospec=True, side_effect=CompositeTransform.rename) as rename:
+            data = RenameTestSerializer(instances[0], context={'request': self.request}).data
+            items = RenameTestSerializer(instances, many=True, context={'request': self.request}).data
+
+        self.assertEqual(3, rename.call_count)
+        self.assertEqual(['id', 'test_field_one', 'test_field_two'], list(data))
+        self.assertEqual({'id': 1, 'test_field_one': 'one', 'test_field_two': 'two'}, dict(items[1]))
+        self.assertIsInstance(items[1], OrderedDict)
+
+    def test_other_mappings_run_every_step(self):
+        chain = CompositeTransform([RenameTestModelTransform0002()])
+
+        data = chain.forwards(CopyOnWriteDict({'test_field_one': 'one'}), self.request)
+
+        self.assertEqual({'new_test_field': 'one'}, thaw(data))
+
+    def test_steps_are_timed_while_hooks_are_connected(self):
+        timings = []
+        instrumentation.connect(timings.append)
+        self.addCleanup(instrumentation.disconnect, timings.append)
+        chain = CompositeTransform([RenameTestModelTransform0002(), RenameTestModelTransform0003()])
+
+        self.assertEqual({'newest_test_field': 'one'}, chain.forwards({'test_field_one': 'one'}, self.request))
+        self.assertEqual(2, len(timings))
+
+
+class PromotionCacheTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('')
+        self.request.version = 1
+        self.body = json.dumps({'test_field_one': 'one', 'test_field_four': 'four', 'test_field_five': 'five'}).encode('utf-8')
+        CachedTestParser.promotion_cache.clear()
+        CachedDeclarativeTestParser.promotion_cache.clear()
+
+    def parse(self, parser, body=None):
+        return parser.parse(
+            stream=io.BytesIO(self.body if body is None else body),
+            media_type='application/vnd.test.testtype+json',
+            parser_context={'request': self.request},
+        )
+
+    def test_reads_argument(self):
+        def reads(self, data, request):
+            return request.user
+
+        def ignores(self, data, request):
+            return data
+
+        def closes_over(self, data, request):
+            return lambda: request
+
+        def takes_args(self, *args):
+            return args
+
+        self.assertTrue(reads_argument(reads, 2))
+        self.assertFalse(reads_argument(ignores, 2))
+        self.assertTrue(reads_argument(closes_over, 2))
+        self.assertTrue(reads_argument(takes_args, 2))
+        self.assertTrue(reads_argument(len, 1))
+
+    def test_cacheable_transforms(self):
+        self.assertTrue(DeclarativeTestModelTransform0002().is_cacheable())
+        self.assertTrue(PureTestModelTransform0002().is_cacheable())
+        self.assertFalse(TestModelTransform0002().is_cacheable())
+        self.assertFalse(RequestReadingTestModelTransform0002().is_cacheable())
+        self.assertFalse(RequestReadingDeclarativeTestModelTransform0002().is_cacheable())
+
+    def test_chains_are_cacheable_when_every_step_is(self):
+        self.assertTrue(CompositeTransform([DeclarativeTestModelTransform0002(), PureTestModelTransform0002()]).is_cacheable())
+        self.assertFalse(CompositeTransform([DeclarativeTestModelTransform0002(), TestModelTransform0002()]).is_cacheable())
+        self.assertFalse(CompositeTransform([MagicMock()]).is_cacheable())
+        self.assertTrue(CopyOnWriteTransform(CompositeTransform([DeclarativeTestModelTransform0002()])).is_cacheable())
+
+    def test_transforms_reading_the_request_when_demoting(self):
+        self.assertFalse(TestModelTransform0002().reads_request('backwards'))
+        self.assertTrue(PerUserTestModelTransform0002().reads_request('backwards'))
+        self.assertFalse(RequestReadingTestModelTransform0002().reads_request('backwards'))
+        self.assertTrue(CompositeTransform([TestModelTransform0002(), PerUserTestModelTransform0002()]).reads_request('backwards'))
+        self.assertFalse(CopyOnWriteTransform(CompositeTransform([TestModelTransform0002()])).reads_request('backwards'))
+        self.assertTrue(CompositeTransform([MagicMock()]).reads_request('backwards'))
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = PromotionCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual((1, None, 3), (cache.get('a'), cache.get('b'), cache.get('c')))
+
+    def test_cache_drops_expired_entries(self):
+        cache = PromotionCache(timeout=10)
+        with patch('rest_framework_transforms.cache.default_timer', return_value=100):
+            cache.set('a', 1)
+        with patch('rest_framework_transforms.cache.default_timer', return_value=105):
+            self.assertEqual(1, cache.get('a'))
+        with patch('rest_framework_transforms.cache.default_timer', return_value=111):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_cache_returns_copies(self):
+        cache = PromotionCache()
+        cache.set('a', {'items': [1]})
+        cache.get('a')['items'].append(2)
+
+        self.assertEqual({'items': [1]}, cache.get('a'))
+
+    def test_unpicklable_data_is_not_cached(self):
+        cache = PromotionCache()
+        cache.set('a', {'function': lambda: None})
+
+        self.assertEqual(0, len(cache))
+
+    def test_repeated_bodies_are_promoted_once(self):
+        parser = CachedDeclarativeTestParser()
+        with patch.object(DeclarativeTransform, 'forwards', autospec=True, side_effect=DeclarativeTransform.forwards) as forwards:
+            first = self.parse(parser)
+            calls = forwards.call_count
+            second = self.parse(parser)
+
+        self.assertEqual(calls, forwards.call_count)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.parse(DeclarativeTestParser()), second)
+
+    def test_bodies_are_cached_per_version(self):
+        parser = CachedDeclarativeTestParser()
+        self.parse(parser)
+        self.request.version = 4
+        self.parse(parser)
+
+        self.assertEqual(2, len(CachedDeclarativeTestParser.promotion_cache))
+
+    def test_uncacheable_chains_are_not_cached(self):
+        data = self.parse(CachedTestParser())
+
+        self.assertEqual('one', data['new_test_field'])
+        self.assertEqual(0, len(CachedTestParser.promotion_cache))
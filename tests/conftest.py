@@ -33,6 +33,7 @@ def pytest_configure():
 
             'rest_framework',
             'rest_framework.authtoken',
+            'rest_framework_transforms',
             'tests',
         ),
         PASSWORD_HASHERS=(
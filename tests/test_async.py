@@ -0,0 +1,53 @@
+import asyncio
+from rest_framework import serializers
+from rest_framework_transforms.asynchronous import (
+    AsyncTransform, BaseAsyncVersioningParser, BaseAsyncVersioningSerializer,
+)
+from tests.test_transforms import TestModelTransform0003
+
+
+class AsyncTestModelTransform0002(AsyncTransform):
+    async def aforwards(self, data, request):
+        await asyncio.sleep(0)
+        if 'test_field_one' in data:
+            data['new_test_field'] = data.pop('test_field_one')
+        return data
+
+    async def abackwards(self, data, request, instance):
+        await asyncio.sleep(0)
+        if 'new_test_field' in data:
+            data['test_field_one'] = data.pop('new_test_field')
+        return data
+
+
+class AsyncTestModelTransform0003(TestModelTransform0003):
+    pass
+
+
+class ConcurrentTestModelTransform0002(AsyncTransform):
+    in_flight = 0
+    most_in_flight = 0
+
+    async def abackwards(self, data, request, instance):
+        cls = ConcurrentTestModelTransform0002
+        cls.in_flight += 1
+        cls.most_in_flight = max(cls.most_in_flight, cls.in_flight)
+        await asyncio.sleep(0.001)
+        cls.in_flight -= 1
+        return dict(data, instance=instance)
+
+
+class LimitedConcurrentTestModelTransform0002(ConcurrentTestModelTransform0002):
+    concurrency = 2
+
+
+class AsyncTestParser(BaseAsyncVersioningParser):
+    media_type = 'application/vnd.test.testtype+json'
+    transform_base = 'tests.test_async.AsyncTestModelTransform'
+
+
+class AsyncTestSerializer(BaseAsyncVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_async.AsyncTestModelTransform'
+
+    new_test_field = serializers.CharField()
+    new_related_object_id_list = serializers.ListField(child=serializers.IntegerField())
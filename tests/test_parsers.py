@@ -1,6 +1,39 @@
-from rest_framework_transforms.parsers import BaseVersioningParser
+import json
+from rest_framework_transforms.cache import PromotionCache
+from rest_framework_transforms.parsers import BaseVersioningParser, StreamingVersioningParser
 
 
 class TestParser(BaseVersioningParser):
     media_type = 'application/vnd.test.testtype+json'
     transform_base = 'tests.test_transforms.TestModelTransform'
+
+
+class DeclarativeTestParser(BaseVersioningParser):
+    media_type = 'application/vnd.test.testtype+json'
+    transform_base = 'tests.test_transforms.DeclarativeTestModelTransform'
+
+
+class StreamingTestParser(StreamingVersioningParser):
+    media_type = 'application/vnd.test.testtype+json'
+    transform_base = 'tests.test_transforms.TestModelTransform'
+    chunk_size = 7
+
+
+class CopyOnWriteTestParser(TestParser):
+    copy_on_write = True
+
+
+class CachedTestParser(TestParser):
+    promotion_cache = PromotionCache(max_size=2)
+
+
+class CachedDeclarativeTestParser(DeclarativeTestParser):
+    promotion_cache = PromotionCache(max_size=2)
+
+
+loaded_bodies = []
+
+
+def recording_loads(body):
+    loaded_bodies.append(body)
+    return json.loads(body)
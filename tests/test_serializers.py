@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rest_framework_transforms.cache import DjangoRepresentationCache, LRURepresentationCache
+from rest_framework_transforms.executors import ThreadPoolDemotionExecutor
 from rest_framework_transforms.serializers import BaseVersioningSerializer
 from tests.models import TestModel, TestModelV3
 
@@ -59,3 +61,114 @@ class TestSerializerV3(BaseVersioningSerializer, serializers.Serializer):
     test_field_five = serializers.CharField()
     new_test_field = serializers.CharField()
     new_related_object_id_list = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+
+class CustomListSerializer(serializers.ListSerializer):
+    pass
+
+
+class TestModelSerializerWithListSerializer(BaseVersioningSerializer, serializers.ModelSerializer):
+    transform_base = 'tests.test_transforms.TestModelTransform'
+
+    class Meta:
+        model = TestModel
+        exclude = tuple()
+        list_serializer_class = CustomListSerializer
+
+
+class DeclarativeTestSerializer(BaseVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_transforms.DeclarativeTestModelTransform'
+
+    newest_test_field = serializers.CharField(source='new_test_field')
+    test_field_two = serializers.CharField()
+    test_field_four = serializers.CharField()
+    test_field_five = serializers.CharField()
+
+
+class CachedTestModelSerializerV3(TestModelSerializerV3):
+    representation_cache = LRURepresentationCache(max_size=10)
+
+
+class DjangoCachedTestModelSerializerV3(TestModelSerializerV3):
+    representation_cache = DjangoRepresentationCache()
+
+
+class PerUserCachedTestModelSerializerV3(TestModelSerializerV3):
+    transform_base = 'tests.test_transforms.PerUserTestModelTransform'
+    representation_cache = LRURepresentationCache(max_size=10)
+
+
+class CopyOnWriteTestSerializerV3(TestSerializerV3):
+    copy_on_write = True
+
+
+class ParallelTestSerializer(BaseVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_transforms.TestModelTransform'
+    demotion_executor = ThreadPoolDemotionExecutor(max_workers=2, chunk_size=2, threshold=3)
+
+    new_test_field = serializers.CharField()
+    new_related_object_id_list = serializers.ListField(child=serializers.IntegerField())
+
+
+class LazyTestSerializer(BaseVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_transforms.ScopedTestModelTransform'
+    lazy_demotion = True
+
+    newest_test_field = serializers.CharField()
+    flag = serializers.BooleanField()
+
+
+class SharedTestSerializer(BaseVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_transforms.TestModelTransform'
+    share_representations = True
+
+    new_test_field = serializers.CharField()
+    new_related_object_id_list = serializers.SerializerMethodField()
+
+    def get_new_related_object_id_list(self, instance):
+        return []
+
+
+class OverridingTestSerializer(SharedTestSerializer):
+    def to_representation(self, instance):
+        data = super(OverridingTestSerializer, self).to_representation(instance)
+        data['overridden'] = True
+        return data
+
+
+class UnsharedTestSerializer(SharedTestSerializer):
+    share_representations = False
+
+
+class FieldsTestSerializer(SharedTestSerializer):
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super(FieldsTestSerializer, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BriefAndFullTreeTestSerializer(serializers.Serializer):
+    brief = FieldsTestSerializer(source='first', fields=['new_related_object_id_list'])
+    full = FieldsTestSerializer(source='first')
+
+
+class SharedTreeTestSerializer(serializers.Serializer):
+    first = SharedTestSerializer()
+    second = SharedTestSerializer()
+    items = SharedTestSerializer(many=True)
+
+
+class UnsharedTreeTestSerializer(serializers.Serializer):
+    first = UnsharedTestSerializer()
+    second = UnsharedTestSerializer()
+    items = UnsharedTestSerializer(many=True)
+
+
+class RenameTestSerializer(BaseVersioningSerializer, serializers.Serializer):
+    transform_base = 'tests.test_transforms.RenameTestModelTransform'
+
+    id = serializers.IntegerField()
+    newest_test_field = serializers.CharField()
+    renamed_field_two = serializers.CharField()
@@ -1,4 +1,5 @@
-from rest_framework_transforms.transforms import BaseTransform
+from rest_framework_transforms.operations import AddDefault, Flatten, Nest, Rename
+from rest_framework_transforms.transforms import BaseTransform, DeclarativeTransform
 
 
 class TestModelTransform0002(BaseTransform):
@@ -22,3 +23,172 @@ class TestModelTransform0003(BaseTransform):
     def backwards(self, data, request, instance):
         data.pop('new_related_object_id_list')
         return data
+
+
+class BatchTestModelTransform0002(TestModelTransform0002):
+    def forwards_many(self, items, request):
+        return [dict(item, batched=True) for item in items]
+
+    def backwards_many(self, items, request, instances):
+        return [dict(item, batched=True) for item in items]
+
+
+class DeclarativeTestModelTransform0002(DeclarativeTransform):
+    operations = [
+        Rename('test_field_one', 'new_test_field'),
+    ]
+
+
+class DeclarativeTestModelTransform0003(DeclarativeTransform):
+    operations = [
+        AddDefault('new_related_object_id_list', default=lambda: [1, 2, 3, 4, 5]),
+    ]
+
+
+class DeclarativeTestModelTransform0004(DeclarativeTransform):
+    operations = [
+        Nest(['test_field_four', 'test_field_five'], into='nested_fields'),
+    ]
+
+
+class DeclarativeTestModelTransform0005(DeclarativeTransform):
+    operations = [
+        Flatten('nested_fields', ['test_field_four', 'test_field_five']),
+        Rename('new_test_field', 'newest_test_field'),
+    ]
+
+
+class GappedTestModelTransform0002(TestModelTransform0002):
+    pass
+
+
+class GappedTestModelTransform0005(TestModelTransform0003):
+    pass
+
+
+class WideGapTestModelTransform0002(TestModelTransform0002):
+    pass
+
+
+class WideGapTestModelTransform0004(TestModelTransform0002):
+    pass
+
+
+class WideGapTestModelTransform0100(TestModelTransform0003):
+    pass
+
+
+class DatedTestModelTransform20240101(TestModelTransform0002):
+    pass
+
+
+class DatedTestModelTransform20240615(TestModelTransform0003):
+    pass
+
+
+class BrokenTestModelTransform0002(DeclarativeTransform):
+    operations = [
+        'not an operation',
+    ]
+
+
+class ScopedTestModelTransform0002(BaseTransform):
+    fields = ('test_field_one', 'new_test_field')
+
+    def forwards(self, data, request):
+        if 'test_field_one' in data:
+            data['new_test_field'] = data.pop('test_field_one')
+        return data
+
+    def backwards(self, data, request, instance):
+        if 'new_test_field' in data:
+            data['test_field_one'] = data.pop('new_test_field')
+        return data
+
+
+class ScopedTestModelTransform0003(BaseTransform):
+    fields = ('new_test_field', 'newest_test_field')
+
+    def forwards(self, data, request):
+        if 'new_test_field' in data:
+            data['newest_test_field'] = data.pop('new_test_field')
+        return data
+
+    def backwards(self, data, request, instance):
+        if 'newest_test_field' in data:
+            data['new_test_field'] = data.pop('newest_test_field')
+        return data
+
+
+class ScopedTestModelTransform0004(DeclarativeTransform):
+    operations = [
+        Rename('legacy_flag', 'flag'),
+    ]
+
+
+class JumpTestModelTransform0002(ScopedTestModelTransform0002):
+    pass
+
+
+class JumpTestModelTransform0003(ScopedTestModelTransform0003):
+    pass
+
+
+class JumpTestModelTransform0004(ScopedTestModelTransform0004):
+    pass
+
+
+class JumpTestModelTransform0001To0003(DeclarativeTransform):
+    operations = [
+        Rename('test_field_one', 'newest_test_field'),
+    ]
+
+
+class BadJumpTestModelTransform0002(TestModelTransform0002):
+    pass
+
+
+class BadJumpTestModelTransform0003To0002(TestModelTransform0002):
+    pass
+
+
+class RenameTestModelTransform0002(DeclarativeTransform):
+    operations = [
+        Rename('test_field_one', 'new_test_field'),
+    ]
+
+
+class RenameTestModelTransform0003(DeclarativeTransform):
+    operations = [
+        Rename('new_test_field', 'newest_test_field'),
+        Rename('test_field_two', 'renamed_field_two'),
+    ]
+
+
+class PureTestModelTransform0002(TestModelTransform0002):
+    pure = True
+
+
+class RequestReadingTestModelTransform0002(TestModelTransform0002):
+    pure = True
+
+    def forwards(self, data, request):
+        self.get_request_state(request)['seen'] = True
+        return data
+
+
+class RequestReadingDeclarativeTestModelTransform0002(DeclarativeTestModelTransform0002):
+    def forwards(self, data, request):
+        data['user'] = request.user
+        return data
+
+
+class PerUserTestModelTransform0002(TestModelTransform0002):
+    def backwards(self, data, request, instance):
+        data = super(PerUserTestModelTransform0002, self).backwards(data, request, instance)
+        data['user'] = request.user
+        return data
+
+
+class PerUserTestModelTransform0003(TestModelTransform0003):
+    pass